@@ -8,10 +8,18 @@ contract Cert {
         bool revoked;
     }
 
+    struct Batch {
+        uint256 issuedAt;
+        uint256 size;
+    }
+
     mapping(bytes32 => Certificate) private certificates;
+    mapping(bytes32 => Batch) private batches;
+    mapping(bytes32 => bool) private batchRevoked;
     address public immutable owner;
     event Issued(bytes32 indexed hash, string cid, uint256 issuedAt);
     event Revoked(bytes32 indexed hash, uint256 revokedAt);
+    event BatchIssued(bytes32 indexed root, uint256 size, uint256 issuedAt);
     modifier onlyOwner() {
         require(msg.sender == owner, "Not owner");
         _;
@@ -46,4 +54,51 @@ contract Cert {
 
         return (cert.cid, cert.issuedAt, cert.revoked);
     }
+
+    // ----------------------------
+    // Merkle-batched certificates
+    // ----------------------------
+    // Leaf   = keccak256(0x00 || hash || cid)
+    // Parent = keccak256(0x01 || min(a, b) || max(a, b))
+    function issueBatch(bytes32 _root, uint256 _size) external onlyOwner {
+        require(batches[_root].issuedAt == 0, "Batch already issued");
+
+        batches[_root] = Batch({
+            issuedAt: block.timestamp,
+            size: _size
+        });
+
+        emit BatchIssued(_root, _size, block.timestamp);
+    }
+    function getBatch(bytes32 _root) external view returns (uint256 issuedAt, uint256 size) {
+        Batch storage batch = batches[_root];
+        return (batch.issuedAt, batch.size);
+    }
+    function revokeBatchedCertificate(bytes32 _root, bytes32 _hash, string calldata _cid, bytes32[] calldata _proof) external onlyOwner {
+        require(batches[_root].issuedAt != 0, "Batch not found");
+        require(_verifyProof(_root, _leaf(_hash, _cid), _proof), "Invalid proof");
+        require(!batchRevoked[_hash], "Already revoked");
+
+        batchRevoked[_hash] = true;
+        emit Revoked(_hash, block.timestamp);
+    }
+    function getBatchedCertificate(bytes32 _root, bytes32 _hash, string calldata _cid, bytes32[] calldata _proof) external view returns (uint256 issuedAt, bool revoked) {
+        Batch storage batch = batches[_root];
+        require(batch.issuedAt != 0, "Batch not found");
+        require(_verifyProof(_root, _leaf(_hash, _cid), _proof), "Invalid proof");
+
+        return (batch.issuedAt, batchRevoked[_hash]);
+    }
+    function _leaf(bytes32 _hash, string calldata _cid) private pure returns (bytes32) {
+        return keccak256(abi.encodePacked(bytes1(0x00), _hash, _cid));
+    }
+    function _verifyProof(bytes32 _root, bytes32 _node, bytes32[] calldata _proof) private pure returns (bool) {
+        for (uint256 i = 0; i < _proof.length; i++) {
+            bytes32 sibling = _proof[i];
+            _node = _node < sibling
+                ? keccak256(abi.encodePacked(bytes1(0x01), _node, sibling))
+                : keccak256(abi.encodePacked(bytes1(0x01), sibling, _node));
+        }
+        return _node == _root;
+    }
 }
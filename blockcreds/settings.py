@@ -32,6 +32,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.UploadSizeLimitMiddleware',    # must come before CsrfViewMiddleware
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -62,11 +63,71 @@ TEMPLATES = [
 WSGI_APPLICATION = 'blockcreds.wsgi.application'
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE selects the profile: "sqlite" (default) or "postgres" (needs `pip install "psycopg[binary]"`).
+# Connections are kept open for DB_CONN_MAX_AGE seconds instead of one per request.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'blockcreds'),
+            'USER': os.getenv('POSTGRES_USER', 'blockcreds'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),  # seconds to wait on a locked database
+            },
+        }
     }
+
+# Applied to every new SQLite connection (core/db.py). WAL lets readers run alongside the
+# single writer, so several gunicorn workers and the background commands don't hit "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',    # durable with WAL except for the last commits on power loss
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 20)) * 1000,
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': -20000,       # KiB (negative) -> 20 MB page cache per connection
+    'temp_store': 'MEMORY',
+}
+
+# Cache
+# "verification" backs the read-through cache in core/utils/verification_cache.py.
+# It must be shared by every process: revocations handled by another gunicorn worker,
+# sync_blockchain_events or follow_chain invalidate entries from their own process.
+# The default FileBasedCache is shared by everything on this host (Redis/Memcached
+# for several hosts). It lives under BASE_DIR, not the shared temp directory: entries
+# are pickles, so anyone able to write there could run code in the web process.
+# It isn't LRU: once MAX_ENTRIES is reached it deletes a third of the entries at
+# random. Hot records come back on their next lookup; use Redis with
+# maxmemory-policy allkeys-lru where true LRU eviction matters.
+VERIFICATION_CACHE_TTL = int(os.getenv('VERIFICATION_CACHE_TTL', 300))  # seconds
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'verification': {
+        'BACKEND': os.getenv('VERIFICATION_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('VERIFICATION_CACHE_LOCATION', str(BASE_DIR / 'cache' / 'verification')),
+        'TIMEOUT': VERIFICATION_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('VERIFICATION_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
 }
 
 # Password validators
@@ -91,6 +152,10 @@ STATICFILES_DIRS = [BASE_DIR / "core" / "static"]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Optional JSON certificate layout (same shape as
+# core.utils.certificate_template.default_template_spec()); unset uses the default.
+CERTIFICATE_TEMPLATE_PATH = os.getenv('CERTIFICATE_TEMPLATE_PATH')
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Email settings (use Gmail SMTP or any other)
@@ -100,6 +165,9 @@ EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')  # your email
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')  # your email password or app password
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', 30))
+# Budget for `manage.py send_outbox` (Gmail throttles bursts); 0 = unlimited
+EMAIL_RATE_PER_MINUTE = int(os.getenv('EMAIL_RATE_PER_MINUTE', 20))
 
 # Blockchain & IPFS (from .env)
 INFURA_URL = os.getenv('INFURA_URL')
@@ -108,5 +176,9 @@ PRIVATE_KEY = os.getenv('PRIVATE_KEY')
 ACCOUNT_ADDRESS = os.getenv('ACCOUNT_ADDRESS')
 CONTRACT_ABI_PATH = os.path.join(BASE_DIR, "core", "cert_abi.json")
 
+# Serve verify_result from the local DB (no RPC) while `manage.py follow_chain`
+# has checkpointed within this many seconds. 0 disables.
+CHAIN_FOLLOWER_MAX_LAG = int(os.getenv('CHAIN_FOLLOWER_MAX_LAG', 60))
+
 PINATA_API_KEY = os.getenv('PINATA_API_KEY')
 PINATA_SECRET_API_KEY = os.getenv('PINATA_SECRET_API_KEY')
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Student, Certificate, RevokedCertificate
+from django.urls import reverse
+from .models import Student, Certificate, CertificateBatch, RevokedCertificate, IssuanceJob, PinnedFile, OutboundEmail, \
+    DailyCertificateStats
 
 
 @admin.register(Student)
@@ -18,9 +20,10 @@ class CertificateAdmin(admin.ModelAdmin):
     list_filter = ("revoked", "issued_at")
     search_fields = (
         "student__name", "student__email",
-        "student__roll_no", "course_name", "ipfs_cid", "blockchain_hash"
+        "student__roll_no", "course_name", "ipfs_cid",
+        "^blockchain_hash",     # hex prefix, matched as a binary range (core.fields.HashStartsWith)
     )
-    readonly_fields = ("issued_at", "transaction_hash")
+    readonly_fields = ("issued_at", "transaction_hash", "batch", "merkle_proof")
 
     def pdf_link(self, obj):
         if obj.pdf_file:
@@ -29,9 +32,9 @@ class CertificateAdmin(admin.ModelAdmin):
     pdf_link.short_description = "PDF"
 
     def qr_link(self, obj):
-        if obj.qr_code:
-            return format_html('<a href="{}" target="_blank">View QR</a>', obj.qr_code.url)
-        return "-"
+        # Rendered on request; new certificates don't store a QR image.
+        url = reverse("certificate_qr", args=[obj.blockchain_hash])
+        return format_html('<a href="{}" target="_blank">View QR</a>', url)
     qr_link.short_description = "QR Code"
 
 
@@ -40,3 +43,40 @@ class CertificateAdmin(admin.ModelAdmin):
 class RevokedCertificateAdmin(admin.ModelAdmin):
     list_display = ("id", "certificate", "revoked_at")
     readonly_fields = ("revoked_at",)
+
+
+@admin.register(CertificateBatch)
+class CertificateBatchAdmin(admin.ModelAdmin):
+    list_display = ("id", "merkle_root", "size", "transaction_hash", "created_at")
+    search_fields = ("merkle_root", "transaction_hash")
+    readonly_fields = ("created_at",)
+
+
+@admin.register(IssuanceJob)
+class IssuanceJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "roll_no", "course_name", "status", "stage", "attempts", "created_at")
+    list_filter = ("status", "stage")
+    search_fields = ("name", "email", "roll_no", "cert_hash")
+    readonly_fields = ("created_at", "updated_at", "started_at", "finished_at", "stage_timings")
+
+
+@admin.register(PinnedFile)
+class PinnedFileAdmin(admin.ModelAdmin):
+    list_display = ("id", "cid", "pinata_cid", "size", "status", "created_at")
+    list_filter = ("status",)
+    search_fields = ("cid", "pinata_cid")
+    readonly_fields = ("created_at", "updated_at")
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "to_email", "subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("to_email", "subject")
+    readonly_fields = ("created_at", "updated_at", "sent_at", "last_error")
+
+
+@admin.register(DailyCertificateStats)
+class DailyCertificateStatsAdmin(admin.ModelAdmin):
+    list_display = ("day", "issued", "revoked")
+    date_hierarchy = "day"
@@ -0,0 +1,127 @@
+# core/fields.py
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+HASH_BYTES = 32
+
+
+def normalize_hash(value) -> str:
+    """
+    Canonical form of a 32-byte hash: 64 lowercase hex digits without 0x.
+    Accepts bytes (e.g. HexBytes from web3) or hex text in any case, with or
+    without the 0x prefix. Raises ValueError for anything else.
+    """
+    return hash_to_bytes(value).hex()
+
+
+def hash_to_bytes(value) -> bytes:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        raw = bytes(value)
+    elif isinstance(value, str):
+        text = value.strip()
+        if text[:2] in ("0x", "0X"):
+            text = text[2:]
+        raw = bytes.fromhex(text)
+    else:
+        raise ValueError(f"Expected a hash as hex text or bytes, got {type(value).__name__}")
+    if len(raw) != HASH_BYTES:
+        raise ValueError(f"Expected a {HASH_BYTES}-byte hash, got {len(raw)} bytes")
+    return raw
+
+
+def hash_prefix_bounds(prefix: str):
+    """Smallest and largest 32-byte values whose hex starts with `prefix` (any case, optional 0x)."""
+    text = prefix.strip().lower()
+    if text.startswith("0x"):
+        text = text[2:]
+    if not text or len(text) > HASH_BYTES * 2:
+        raise ValueError("Hash prefix must be 1 to 64 hex digits")
+    return (
+        bytes.fromhex(text.ljust(HASH_BYTES * 2, "0")),
+        bytes.fromhex(text.ljust(HASH_BYTES * 2, "f")),
+    )
+
+
+class _HashDescriptor(DeferredAttribute):
+    """Normalizes on assignment, so instance.hash is canonical hex whatever it was set from."""
+
+    def __set__(self, instance, value):
+        if value is not None:
+            try:
+                value = normalize_hash(value) if value != "" else None
+            except ValueError:
+                pass    # left as given; full_clean() / save() report it
+        instance.__dict__[self.field.attname] = value
+
+
+class HashField(models.Field):
+    """
+    A 32-byte hash (certificate hash, transaction hash) stored as a fixed-size
+    binary value (BLOB / bytea) instead of hex text: half the index size and
+    no case or 0x-prefix mismatches. Python code keeps seeing canonical hex
+    strings; lookups accept hex in any form or bytes.
+    """
+    description = "32-byte hash stored as binary"
+    descriptor_class = _HashDescriptor
+
+    def get_internal_type(self):
+        return "BinaryField"
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else bytes(value).hex()
+
+    def to_python(self, value):
+        if value is None or value == "":
+            return None
+        try:
+            return normalize_hash(value)
+        except ValueError as e:
+            raise ValidationError(str(e), code="invalid")
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None or value == "":
+            return None
+        try:
+            return hash_to_bytes(value)
+        except ValueError as e:
+            raise e.__class__(f"Field '{self.name}' expected a 32-byte hash but got {value!r}.") from e
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is not None:
+            return connection.Database.Binary(value)
+        return value
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj) or ""
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{"form_class": forms.CharField, "max_length": 66, **kwargs})
+
+
+@HashField.register_lookup
+class HashStartsWith(models.Lookup):
+    """
+    `hash__startswith="0xab12"`: a prefix match written as a BETWEEN on the
+    binary value, so it is served by the index. Anything that isn't a hex
+    prefix matches nothing (e.g. a student name typed into an admin search).
+    """
+    lookup_name = "startswith"
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        try:
+            low, high = hash_prefix_bounds(str(self.rhs))
+        except ValueError:
+            return "1 = 0", []
+        return f"{lhs} BETWEEN %s AND %s", [*lhs_params, low, high]
+
+
+@HashField.register_lookup
+class HashIStartsWith(HashStartsWith):
+    lookup_name = "istartswith"     # hex is case-insensitive anyway; used by admin "^field" searches
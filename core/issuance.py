@@ -0,0 +1,337 @@
+# core/issuance.py
+
+import os
+import time
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now, localdate
+
+from core.models import Student, Certificate, CertificateBatch, IssuanceJob, PinnedFile
+from core.utils.blockchain import (
+    issue_certificate_on_chain, send_certificate_on_chain, issue_batch_on_chain, get_batch_from_chain,
+    get_certificate_from_chain
+)
+from core.utils.merkle import MerkleTree, certificate_leaf
+from core.utils.pinata import upload_to_pinata, PINATA_CID_VERSION
+from core.utils.cid import compute_cid
+from core.utils.certificate_utils import generate_certificate_pdf, qr_png_bytes
+from core.utils.render_service import get_render_service
+from core.outbox import queue_certificate_email
+from core.stats import bump_daily_stats
+
+logger = logging.getLogger(__name__)
+
+QR_CODE_BASE_URL = os.getenv("QR_CODE_BASE_URL", "http://127.0.0.1:8000/verify/?hash=")
+LOGO_PATH = os.path.join(settings.BASE_DIR, "core/static/core/images/logo.png")
+
+
+# ----------------------------
+# Issuance Stages
+# ----------------------------
+def new_certificate_hash() -> str:
+    """Generate a random 32-byte certificate hash (hex, no 0x prefix)."""
+    return os.urandom(32).hex()
+
+
+def render_certificate(student_name, course_name, cert_hash, percentage="", issued_on=None):
+    """Render the certificate PDF (QR code included) and return its path."""
+    verify_url = f"{QR_CODE_BASE_URL}{cert_hash}"
+    return generate_certificate_pdf(
+        student_name=student_name,
+        course_name=course_name,
+        hash_value=cert_hash,
+        verify_url=verify_url,
+        logo_path=LOGO_PATH,
+        cgpa=percentage,
+        issued_on=issued_on
+    )
+
+
+def upload_certificate(pdf_path: str) -> str:
+    """
+    Pin the rendered PDF on IPFS and return its CID.
+
+    The CID is computed locally first; a file already recorded as pinned is
+    not uploaded again (retries, re-runs). After an upload the CID Pinata
+    returns is checked against the local one and any mismatch is recorded.
+    """
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+    local_cid = compute_cid(data, version=PINATA_CID_VERSION)
+
+    pinned = PinnedFile.objects.filter(cid=local_cid, status=PinnedFile.PINNED).first()
+    if pinned:
+        logger.info(f"[IPFS] {os.path.basename(pdf_path)} already pinned as {local_cid}; skipping upload")
+        return pinned.cid
+
+    remote_cid = upload_to_pinata(data, filename=os.path.basename(pdf_path))
+    status = PinnedFile.PINNED if remote_cid == local_cid else PinnedFile.MISMATCH
+    if status == PinnedFile.MISMATCH:
+        logger.warning(f"[IPFS] CID mismatch for {os.path.basename(pdf_path)}: local {local_cid}, Pinata {remote_cid}")
+    PinnedFile.objects.update_or_create(
+        cid=local_cid,
+        defaults={"pinata_cid": remote_cid, "size": len(data), "status": status}
+    )
+    return remote_cid
+
+
+def anchor_certificate(cert_hash: str, ipfs_cid: str) -> str:
+    """Issue the certificate on chain and return the transaction hash."""
+    tx_hash = issue_certificate_on_chain(bytes.fromhex(cert_hash), ipfs_cid)
+    if not tx_hash:
+        raise RuntimeError("Failed to issue certificate on blockchain.")
+    return tx_hash
+
+
+def anchored_cid(cert_hash: str):
+    """The CID recorded on chain for the certificate, or None if it isn't anchored."""
+    from web3.exceptions import ContractLogicError
+    try:
+        cid, _, _ = get_certificate_from_chain(bytes.fromhex(cert_hash))
+    except ContractLogicError:
+        return None     # "Certificate not found"
+    return cid
+
+
+def send_certificate_anchor(cert_hash: str, ipfs_cid: str):
+    """
+    Broadcast the certificate's issue transaction without waiting for it to
+    be mined (bulk issuance). Returns (tx_hash, confirmation); see
+    core.utils.blockchain.wait_for_confirmation().
+    """
+    tx_hash, confirmation = send_certificate_on_chain(bytes.fromhex(cert_hash), ipfs_cid)
+    if not tx_hash:
+        raise RuntimeError("Failed to issue certificate on blockchain.")
+    return tx_hash, confirmation
+
+
+def get_or_create_student(name, email, roll_no):
+    """The student with this email, created if new (raises IntegrityError if the roll_no is taken)."""
+    student, _ = Student.objects.get_or_create(
+        email=email,
+        defaults={"name": name, "roll_no": roll_no}
+    )
+    return student
+
+
+def save_certificate(name, email, roll_no, course_name, cert_hash, pdf_path, ipfs_cid, tx_hash,
+                     batch=None, merkle_proof=None):
+    """Persist the issued certificate (and its student) to the database."""
+    student = get_or_create_student(name, email, roll_no)
+    with transaction.atomic():
+        certificate = Certificate.objects.create(
+            student=student,
+            course_name=course_name,
+            pdf_file=f"certificates/{os.path.basename(pdf_path)}",
+            blockchain_hash=cert_hash,
+            transaction_hash=tx_hash,
+            ipfs_cid=ipfs_cid,
+            revoked=False,
+            batch=batch,
+            merkle_proof=merkle_proof or []
+        )
+        bump_daily_stats(issued=[certificate.issued_at])
+    return certificate
+
+
+def queue_student_email(email, name, pdf_path, cert_hash):
+    """Queue the certificate email (PDF plus a QR code for its verify page) for send_outbox."""
+    qr_png = qr_png_bytes(f"{QR_CODE_BASE_URL}{cert_hash}")
+    return queue_certificate_email(email, name, pdf_path, qr_png)
+
+
+# ----------------------------
+# Merkle-Batched Issuance
+# ----------------------------
+def certificate_batch_tree(entries) -> MerkleTree:
+    """The Merkle tree over the entries' leaves, in entry order."""
+    return MerkleTree([certificate_leaf(bytes.fromhex(e["cert_hash"]), e["ipfs_cid"]) for e in entries])
+
+
+def anchor_certificate_batch(tree, size):
+    """
+    Anchor the batch root on chain and return the transaction hash, or None
+    if the root is already anchored (sent by an earlier, interrupted run):
+    issueBatch would revert with "Batch already issued".
+    """
+    issued_at, _ = get_batch_from_chain(tree.root)
+    if issued_at:
+        logger.info(f"[Batch Issue] Root {tree.root.hex()} is already on chain; not sending it again")
+        return None
+    tx_hash = issue_batch_on_chain(tree.root, size)
+    if not tx_hash:
+        raise RuntimeError("Failed to issue certificate batch on blockchain.")
+    return tx_hash
+
+
+def save_certificate_batch(entries, tree, tx_hash):
+    """Save an anchored batch and its certificates, each with its inclusion proof."""
+    with transaction.atomic():
+        batch = CertificateBatch.objects.create(
+            merkle_root=tree.root.hex(),
+            transaction_hash=tx_hash,
+            size=len(entries)
+        )
+        for index, e in enumerate(entries):
+            save_certificate(
+                e["name"], e["email"], e["roll_no"], e["course_name"],
+                e["cert_hash"], e["pdf_path"], e["ipfs_cid"], None,
+                batch=batch,
+                merkle_proof=[node.hex() for node in tree.proof(index)]
+            )
+    return batch
+
+
+def issue_certificate_batch(entries):
+    """
+    Anchor many rendered and pinned certificates with a single transaction.
+    Each entry is a dict with name, email, roll_no, course_name, cert_hash,
+    pdf_path and ipfs_cid. Returns the saved CertificateBatch.
+
+    Students are looked up or created first, so an entry that can't be saved
+    (say, a roll_no taken by another student) fails before any gas is spent.
+    """
+    for e in entries:
+        get_or_create_student(e["name"], e["email"], e["roll_no"])
+    tree = certificate_batch_tree(entries)
+    tx_hash = anchor_certificate_batch(tree, len(entries))
+    batch = save_certificate_batch(entries, tree, tx_hash)
+    logger.info(f"[Batch Issue] Anchored {len(entries)} certificates under root {batch.merkle_root} ({tx_hash})")
+    return batch
+
+
+# ----------------------------
+# Issuance Job Queue
+# ----------------------------
+JOB_STAGES = ("pdf", "ipfs", "chain", "db", "email")
+
+
+def enqueue_issuance_job(name, email, roll_no, course_name, percentage=""):
+    """Queue a certificate for the background worker and return the job."""
+    return IssuanceJob.objects.create(
+        name=name,
+        email=email,
+        roll_no=roll_no,
+        course_name=course_name,
+        percentage=str(percentage)
+    )
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest queued job to running and return it.
+    The conditional UPDATE makes this safe with several worker processes.
+    """
+    while True:
+        job = IssuanceJob.objects.filter(status=IssuanceJob.QUEUED).order_by("created_at").first()
+        if job is None:
+            return None
+        claimed = IssuanceJob.objects.filter(pk=job.pk, status=IssuanceJob.QUEUED).update(
+            status=IssuanceJob.RUNNING,
+            started_at=now(),
+            attempts=F("attempts") + 1
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def requeue_stale_jobs(older_than: timedelta) -> int:
+    """Return jobs left running by a crashed worker to the queue."""
+    return IssuanceJob.objects.filter(
+        status=IssuanceJob.RUNNING, updated_at__lt=now() - older_than
+    ).update(status=IssuanceJob.QUEUED)
+
+
+def _run_job_stage(job, stage):
+    if stage == "pdf":
+        if not job.cert_hash:
+            job.cert_hash = new_certificate_hash()
+        job.pdf_path = get_render_service().submit(
+            render_certificate, job.name, job.course_name, job.cert_hash, job.percentage,
+            localdate(job.created_at)
+        ).result()
+    elif stage == "ipfs":
+        job.ipfs_cid = upload_certificate(job.pdf_path)
+    elif stage == "chain":
+        # An earlier attempt may have been mined after it gave up waiting; sending again
+        # would revert with "Certificate already issued". The sync records its transaction.
+        if job.attempts > 1 and anchored_cid(job.cert_hash):
+            logger.info(f"[Issuance Job] #{job.pk} {job.cert_hash} is already on chain; not sending it again")
+            return
+        job.transaction_hash = anchor_certificate(job.cert_hash, job.ipfs_cid)
+    elif stage == "db":
+        job.certificate = save_certificate(
+            job.name, job.email, job.roll_no, job.course_name,
+            job.cert_hash, job.pdf_path, job.ipfs_cid, job.transaction_hash
+        )
+    elif stage == "email":
+        # Delivered by the send_outbox worker over a shared SMTP connection
+        queue_student_email(job.email, job.name, job.pdf_path, job.cert_hash)
+
+
+def run_issuance_job(job, max_attempts=3):
+    """
+    Run the remaining stages of a claimed job, saving progress after each one.
+    On error the job is re-queued until it has used max_attempts.
+    """
+    for stage in JOB_STAGES:
+        if stage in job.stage_timings:
+            continue
+
+        job.stage = stage
+        job.save(update_fields=["stage", "updated_at"])
+        started = time.time()
+        try:
+            _run_job_stage(job, stage)
+        except Exception as e:
+            logger.warning(f"[Issuance Job] #{job.pk} failed at {stage} (attempt {job.attempts}): {e}")
+            job.error = f"{stage}: {e}"
+            job.status = IssuanceJob.QUEUED if job.attempts < max_attempts else IssuanceJob.FAILED
+            if job.status == IssuanceJob.FAILED:
+                job.finished_at = now()
+            job.save()
+            return job
+
+        job.stage_timings[stage] = round(time.time() - started, 3)
+        job.save()
+
+    job.status = IssuanceJob.SUCCEEDED
+    job.error = ""
+    job.finished_at = now()
+    job.save()
+    logger.info(f"[Issuance Job] #{job.pk} issued {job.cert_hash} in {sum(job.stage_timings.values()):.2f}s")
+    return job
+
+
+def job_progress(job):
+    """Per-stage progress report used by the status endpoint."""
+    stages = []
+    for stage in JOB_STAGES:
+        if stage in job.stage_timings:
+            state = "done"
+        elif stage == job.stage and job.status == IssuanceJob.RUNNING:
+            state = "running"
+        elif stage == job.stage and job.error:
+            state = "failed" if job.status == IssuanceJob.FAILED else "retrying"
+        else:
+            state = "pending"
+        stages.append({"name": stage, "status": state, "seconds": job.stage_timings.get(stage)})
+
+    return {
+        "job_id": job.pk,
+        "status": job.status,
+        "stage": job.stage,
+        "stages": stages,
+        "attempts": job.attempts,
+        "error": job.error or None,
+        "hash": job.cert_hash or None,
+        "cid": job.ipfs_cid or None,
+        "transactionHash": job.transaction_hash or None,
+        "createdAt": int(job.created_at.timestamp()),
+        "startedAt": int(job.started_at.timestamp()) if job.started_at else None,
+        "finishedAt": int(job.finished_at.timestamp()) if job.finished_at else None,
+    }
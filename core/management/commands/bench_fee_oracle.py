@@ -0,0 +1,191 @@
+import json
+import random
+from statistics import mean
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.fee_oracle import FeeOracle, GWEI, MIN_PRIORITY_FEE, TIERS
+
+FIXTURE_PERCENTILES = [1, 5, 10, 25, 50, 75, 90, 95, 99]
+FEE_HISTORY_PAGE = 1024     # most nodes cap eth_feeHistory at 1024 blocks per call
+BLOCK_TIME = 2.0            # seconds, Polygon PoS
+STALL_BLOCKS = 60           # RECEIPT_TIMEOUT (120 s) in blocks: when a stuck transaction is bumped
+FIXTURE_WARMUP = 20         # blocks of history the oracle needs before the first transaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a recorded eth_feeHistory fixture and compare the old fee rule (2x gas price, 30 gwei tip, "
+        "x1.5 bumps) with the fee oracle tiers: overpayment over the cheapest tip each block accepted, "
+        "confirmation latency in blocks, bumps and fee RPC calls. --record captures a fixture from the RPC."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fixture", help="Fee-history JSON to replay (or to write, with --record)")
+        parser.add_argument("--record", type=int, metavar="BLOCKS", help="Record this many recent blocks")
+        parser.add_argument("--synthetic", type=int, metavar="BLOCKS",
+                            help="Replay a generated EIP-1559 history instead of a fixture (no network)")
+        parser.add_argument("--tx-every", type=int, default=1, help="Submit one transaction every N blocks")
+        parser.add_argument("--inclusion-percentile", type=int, default=1,
+                            help="Tip percentile taken as the cheapest a block still accepted (default 1)")
+
+    def handle(self, *args, **options):
+        if options["record"]:
+            if not options["fixture"]:
+                raise CommandError("--record needs --fixture PATH to write to")
+            self.record(options["record"], options["fixture"])
+            return
+        if options["synthetic"]:
+            fixture = synthetic_history(options["synthetic"])
+            self.stdout.write(f"Synthetic fee history, {options['synthetic']} blocks")
+        elif options["fixture"]:
+            with open(options["fixture"]) as f:
+                fixture = json.load(f)
+            self.stdout.write(f"Fixture {options['fixture']}, {len(fixture['blocks'])} blocks "
+                              f"from #{fixture['blocks'][0]['number']}")
+        else:
+            raise CommandError("Pass --fixture PATH, --synthetic BLOCKS, or --record BLOCKS --fixture PATH")
+
+        if options["inclusion_percentile"] not in fixture["percentiles"]:
+            raise CommandError(f"The fixture has no p{options['inclusion_percentile']} tips")
+        self.replay(fixture, options["tx_every"], options["inclusion_percentile"])
+
+    # ----------------------------
+    # Recording
+    # ----------------------------
+    def record(self, blocks, path):
+        from core.utils.blockchain import get_web3
+
+        w3 = get_web3()
+        newest = w3.eth.block_number
+        oldest = newest - blocks + 1
+        recorded = []
+        end = newest
+        while end >= oldest:
+            count = min(FEE_HISTORY_PAGE, end - oldest + 1)
+            history = w3.eth.fee_history(count, end, FIXTURE_PERCENTILES)
+            first = history["oldestBlock"]
+            page = [
+                {
+                    "number": first + i,
+                    "baseFeePerGas": history["baseFeePerGas"][i],
+                    "gasUsedRatio": history["gasUsedRatio"][i],
+                    "reward": list(history["reward"][i]),
+                }
+                for i in range(count)
+            ]
+            recorded = page + recorded
+            end = first - 1
+            self.stdout.write(f"  blocks #{first}..#{first + count - 1}")
+
+        with open(path, "w") as f:
+            json.dump({"percentiles": FIXTURE_PERCENTILES, "blocks": recorded}, f)
+        self.stdout.write(self.style.SUCCESS(f"Recorded {len(recorded)} blocks to {path}"))
+
+    # ----------------------------
+    # Replay
+    # ----------------------------
+    def replay(self, fixture, tx_every, inclusion_percentile):
+        blocks = fixture["blocks"]
+        column = fixture["percentiles"].index(inclusion_percentile)
+        # The cheapest tip each block accepted, and never below the network minimum
+        floor_tip = [max(b["reward"][column], MIN_PRIORITY_FEE) for b in blocks]
+        last_submit = len(blocks) - STALL_BLOCKS * 3
+        if last_submit <= FIXTURE_WARMUP:
+            raise CommandError("Fixture too short to replay")
+
+        self.stdout.write(f"One transaction every {tx_every} blocks, included once its tip reaches the "
+                          f"block's p{inclusion_percentile} tip, bumped after {STALL_BLOCKS} blocks stuck")
+        self.stdout.write(f"{'strategy':<20}{'paid gwei':>10}{'overpay':>9}{'wait p50':>9}{'wait p95':>9}"
+                          f"{'bumps':>7}{'unconf':>7}{'fee RPCs':>10}")
+        for name in ["old (2x gas price)", *(f"oracle {tier}" for tier in TIERS)]:
+            clock = {"block": 0}
+            if name.startswith("oracle"):
+                oracle = FeeOracle(
+                    fee_history=self.fixture_fee_history(fixture, clock),
+                    background=False, clock=lambda: clock["block"] * BLOCK_TIME,
+                )
+                tier = name.split()[1]
+                new_fees = lambda: oracle.estimate(tier)
+                bumped_fees = oracle.replacement_fees
+            else:
+                oracle = None
+                new_fees = lambda: self.old_fees(blocks, clock["block"])
+                bumped_fees = lambda fees: {key: int(value * 1.5) for key, value in fees.items()}
+
+            pending, done = [], []
+            for number in range(FIXTURE_WARMUP, len(blocks)):
+                # Block `number` is mined: pending transactions whose fees clear it are included
+                base = blocks[number]["baseFeePerGas"]
+                still_pending = []
+                for tx in pending:
+                    tip = min(tx["fees"]["maxPriorityFeePerGas"], tx["fees"]["maxFeePerGas"] - base)
+                    if tip >= floor_tip[number]:
+                        done.append({**tx, "block": number, "paid": base + tip, "floor": base + floor_tip[number]})
+                    else:
+                        still_pending.append(tx)
+                pending = still_pending
+
+                # After seeing the block: bump stuck transactions, submit new ones
+                clock["block"] = number
+                for tx in pending:
+                    if number - tx["last_bump"] >= STALL_BLOCKS and number + 1 < len(blocks):
+                        tx["fees"] = bumped_fees(tx["fees"])
+                        tx["bumps"] += 1
+                        tx["last_bump"] = number
+                if number < last_submit and number % tx_every == 0:
+                    pending.append({"sent_at": number, "last_bump": number, "bumps": 0, "fees": new_fees()})
+
+            paid = [tx["paid"] / GWEI for tx in done]
+            overpay = [tx["paid"] / tx["floor"] - 1 for tx in done]
+            waits = sorted(tx["block"] - tx["sent_at"] for tx in done)
+            submitted = len(done) + len(pending)
+            self.stdout.write(
+                f"{name:<20}{mean(paid):>10.1f}{mean(overpay):>9.1%}{waits[len(waits) // 2]:>9}"
+                f"{waits[int(len(waits) * 0.95)]:>9}{sum(tx['bumps'] for tx in done + pending):>7}"
+                f"{len(pending):>7}{oracle.refreshes if oracle else submitted:>10}"
+            )
+
+    @staticmethod
+    def fixture_fee_history(fixture, clock):
+        """eth_feeHistory as a node would have answered it at the simulated block."""
+        blocks = fixture["blocks"]
+        columns = {p: i for i, p in enumerate(fixture["percentiles"])}
+
+        def fee_history(block_count, newest_block, percentiles):
+            end = clock["block"]
+            window = blocks[max(0, end - block_count + 1):end + 1]
+            return {
+                # the next block's base fee follows from the newest block, so a node reports it too
+                "baseFeePerGas": [b["baseFeePerGas"] for b in window] + [blocks[end + 1]["baseFeePerGas"]],
+                "gasUsedRatio": [b["gasUsedRatio"] for b in window],
+                "reward": [[b["reward"][columns[p]] for p in percentiles] for b in window],
+            }
+        return fee_history
+
+    @staticmethod
+    def old_fees(blocks, number):
+        """The replaced get_dynamic_gas(): 2x eth_gasPrice (~ next base fee + median tip), 30 gwei tip."""
+        reward = blocks[number]["reward"]
+        gas_price = blocks[number + 1]["baseFeePerGas"] + sorted(reward)[len(reward) // 2]
+        return {"maxFeePerGas": gas_price * 2, "maxPriorityFeePerGas": 30 * GWEI}
+
+
+def synthetic_history(count, seed=7):
+    """Base fee following the EIP-1559 rule (Polygon's 1/16 change per block) under bursty demand."""
+    rng = random.Random(seed)
+    base = 40 * GWEI
+    demand = 0.5
+    blocks = []
+    for number in range(count):
+        demand += 0.05 * (0.4 - demand) + rng.gauss(0, 0.05) + (0.4 if rng.random() < 0.005 else 0)
+        demand = min(1.0, max(0.05, demand))
+        used = min(1.0, max(0.0, rng.gauss(demand, 0.15)))
+        # Below ~80% full every tip at the network minimum gets in; above, the cheapest ones wait
+        floor_tip = MIN_PRIORITY_FEE + (int(rng.expovariate(1 / 10) * GWEI) if used > 0.8 else 0)
+        reward = sorted(
+            floor_tip + int(rng.expovariate(1 / (5 + 40 * max(0.0, used - 0.6))) * GWEI * (p - 1) / 50)
+            for p in FIXTURE_PERCENTILES
+        )
+        blocks.append({"number": number, "baseFeePerGas": base, "gasUsedRatio": used, "reward": reward})
+        base = max(GWEI, int(base * (1 + (used - 0.5) / 0.5 / 16)))
+    return {"percentiles": FIXTURE_PERCENTILES, "blocks": blocks}
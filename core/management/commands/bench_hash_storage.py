@@ -0,0 +1,86 @@
+import os
+import time
+import random
+import tempfile
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+INSERT_BATCH = 10_000
+
+# Column types for the same 32-byte hash stored as hex text and as binary
+COLUMN_TYPES = {
+    "sqlite": {"text": "varchar(255)", "binary": "BLOB"},
+    "postgresql": {"text": "varchar(255)", "binary": "bytea"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare 32-byte hashes stored as hex text (the old CharField) and as binary (HashField): "
+        "unique index size and lookup latency, on a scratch database with the configured profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--lookups", type=int, default=20_000, help="Random lookups per layout")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in COLUMN_TYPES:
+            self.stderr.write(f"Unsupported database vendor: {connection.vendor}")
+            return
+
+        if connection.vendor == "sqlite":
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(
+                tempfile.mkdtemp(), "bench_hashes.sqlite3"
+            )
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.run(options["rows"], options["lookups"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, rows, lookups):
+        rng = random.Random(42)
+        hashes = [rng.randbytes(32) for _ in range(rows)]
+        probes = rng.sample(hashes, min(lookups, rows))
+        missing = [rng.randbytes(32) for _ in range(len(probes))]
+
+        self.stdout.write(f"{connection.vendor}, {rows} rows, {len(probes)} hit + {len(missing)} miss lookups")
+        self.stdout.write(f"{'layout':<10}{'index MB':>10}{'hit us':>10}{'miss us':>10}{'load s':>10}")
+        for layout, encode in (("text", lambda h: h.hex()), ("binary", bytes)):
+            table = f"bench_hash_{layout}"
+            column_type = COLUMN_TYPES[connection.vendor][layout]
+            with connection.cursor() as cursor:
+                cursor.execute(f"CREATE TABLE {table} (id integer PRIMARY KEY, hash {column_type} NOT NULL)")
+
+                started = time.perf_counter()
+                for start in range(0, rows, INSERT_BATCH):
+                    cursor.executemany(
+                        f"INSERT INTO {table} (id, hash) VALUES (%s, %s)",
+                        [(i + 1, encode(hashes[i])) for i in range(start, min(rows, start + INSERT_BATCH))]
+                    )
+                cursor.execute(f"CREATE UNIQUE INDEX {table}_idx ON {table} (hash)")
+                load = time.perf_counter() - started
+                if connection.vendor == "postgresql":
+                    cursor.execute(f"ANALYZE {table}")
+
+                size = self.index_size(cursor, f"{table}_idx")
+                hit = self.time_lookups(cursor, table, [encode(h) for h in probes])
+                miss = self.time_lookups(cursor, table, [encode(h) for h in missing])
+            self.stdout.write(f"{layout:<10}{size / 2 ** 20:>10.1f}{hit:>10.1f}{miss:>10.1f}{load:>10.1f}")
+
+    def index_size(self, cursor, index):
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT pg_relation_size(%s)", [index])
+        else:
+            cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [index])
+        return cursor.fetchone()[0] or 0
+
+    def time_lookups(self, cursor, table, values):
+        """Mean microseconds per single-row lookup by hash."""
+        sql = f"SELECT id FROM {table} WHERE hash = %s"
+        started = time.perf_counter()
+        for value in values:
+            cursor.execute(sql, [value])
+            cursor.fetchone()
+        return (time.perf_counter() - started) / len(values) * 1e6
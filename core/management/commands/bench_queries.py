@@ -0,0 +1,168 @@
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, OperationalError
+from django.utils.timezone import now
+
+from core.models import Certificate, Student
+from core.search import certificate_page
+from core.stats import dashboard_stats, rebuild_daily_stats, _aggregate_by_day
+
+SEED_BATCH = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the app's main queries (dashboard, revocation console, verification, sync) "
+        "against a scratch database created with the configured profile (SQLite or PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="Certificates to seed")
+        parser.add_argument("--repeat", type=int, default=20, help="Runs per query")
+        parser.add_argument("--writers", type=int, default=4,
+                            help="Concurrent writer threads for the lock test (0 to skip)")
+        parser.add_argument("--writes", type=int, default=200, help="Transactions per writer")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Profile: {connection.vendor} (CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']})")
+
+        # Never touch the real database: seed a test copy. For SQLite use a file,
+        # so WAL and the other pragmas apply as they do in production.
+        if connection.vendor == "sqlite":
+            scratch = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = scratch
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            if connection.vendor == "sqlite":
+                with connection.cursor() as cursor:
+                    cursor.execute("PRAGMA journal_mode")
+                    self.stdout.write(f"journal_mode={cursor.fetchone()[0]}")
+
+            started = time.perf_counter()
+            sample = self.seed(options["rows"])
+            self.stdout.write(f"Seeded {options['rows']} certificates in {time.perf_counter() - started:.1f}s\n")
+
+            self.run_queries(sample, options["repeat"])
+            if options["writers"]:
+                self.run_lock_test(options["writers"], options["writes"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, rows):
+        today = now()
+        for start in range(0, rows, SEED_BATCH):
+            end = min(rows, start + SEED_BATCH)
+            students = Student.objects.bulk_create([
+                Student(name=f"Student {i}", email=f"student{i}@example.com", roll_no=f"R{i:08d}")
+                for i in range(start, end)
+            ])
+            certificates = Certificate.objects.bulk_create([
+                Certificate(
+                    student=student,
+                    course_name=f"Course {i % 50}",
+                    pdf_file=f"certificates/{i}.pdf",
+                    blockchain_hash=hashlib.sha256(str(i).encode()).hexdigest(),
+                    issued_block=1_000_000 + i,
+                    revoked=i % 20 == 0,
+                    revoked_block=2_000_000 + i if i % 20 == 0 else None,
+                )
+                for i, student in zip(range(start, end), students)
+            ])
+            # issued_at is auto_now_add; spread batches over the last 60 days
+            Certificate.objects.filter(pk__in=[c.pk for c in certificates]).update(
+                issued_at=today - timedelta(days=(start // SEED_BATCH) % 60)
+            )
+        rebuild_daily_stats()
+
+        middle = rows // 2
+        return {
+            "hash": hashlib.sha256(str(middle).encode()).hexdigest(),
+            "middle_id": Certificate.objects.order_by("id").values_list("id", flat=True)[middle],
+            "student_id": Student.objects.order_by("id").values_list("id", flat=True)[middle],
+            "last_block": 1_000_000 + rows,
+        }
+
+    def run_queries(self, sample, repeat):
+        benchmarks = [
+            ("dashboard (rollup)", lambda: dashboard_stats()),
+            ("daily counts (grouped scan)", lambda: _aggregate_by_day()),
+            ("revoke page 1", lambda: certificate_page()),
+            ("revoke page, deep cursor", lambda: certificate_page(after=sample["middle_id"])),
+            ("revoke page, revoked only", lambda: certificate_page(status="revoked")),
+            ("search roll number", lambda: certificate_page("R0000123")),
+            ("search student name", lambda: certificate_page("student 4242")),
+            ("search course", lambda: certificate_page("course 7")),
+            ("search hash prefix", lambda: certificate_page(sample["hash"][:12])),
+            ("verify by hash", lambda: Certificate.objects.select_related("student").get(
+                blockchain_hash=sample["hash"])),
+            ("student's certificates", lambda: list(Certificate.objects.filter(
+                student_id=sample["student_id"]).order_by("-issued_at")[:20])),
+            ("reorg rollback scan", lambda: Certificate.objects.filter(
+                issued_block__gt=sample["last_block"] - 100).count()),
+        ]
+
+        self.stdout.write(f"{'query':<30}{'median ms':>12}{'p95 ms':>10}")
+        for name, run in benchmarks:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(f"{name:<30}{timings[len(timings) // 2]:>12.2f}{p95:>10.2f}")
+
+    def run_lock_test(self, writers, writes):
+        """Writers insert certificates while a reader polls the dashboard; count lock errors."""
+        errors = []
+        stop = threading.Event()
+
+        def writer(n):
+            try:
+                student = Student.objects.create(name=f"Writer {n}", email=f"writer{n}@example.com",
+                                                 roll_no=f"W{n:04d}")
+                for i in range(writes):
+                    try:
+                        Certificate.objects.create(
+                            student=student, course_name="Lock test", pdf_file="certificates/lock.pdf",
+                            blockchain_hash=hashlib.sha256(f"w{n}-{i}".encode()).hexdigest()
+                        )
+                    except OperationalError as e:
+                        errors.append(e)
+            finally:
+                connections.close_all()
+
+        def reader():
+            try:
+                while not stop.is_set():
+                    try:
+                        dashboard_stats()
+                        certificate_page()
+                    except OperationalError as e:
+                        errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        poller = threading.Thread(target=reader)
+        started = time.perf_counter()
+        poller.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stop.set()
+        poller.join()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"\nLock test: {writers} writers x {writes} inserts with a concurrent reader in {elapsed:.2f}s "
+            f"({writers * writes / elapsed:.0f} inserts/s), {len(errors)} lock errors"
+        )
+        for e in errors[:3]:
+            self.stdout.write(f"  {e}")
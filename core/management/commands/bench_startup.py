@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import subprocess
+from statistics import median
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# What a gunicorn worker does before serving its first request: load the WSGI
+# application and the URLconf (which imports every view module).
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+from blockcreds.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "loaded": sorted(m for m in %r if m in sys.modules),
+}))
+"""
+
+HEAVY_MODULES = ("web3", "reportlab", "qrcode", "PIL", "requests", "PyPDF2")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure web worker boot in fresh interpreters: time and peak RSS to load the WSGI app "
+        "and URLconf, which heavy libraries got imported, and the slowest imports (-X importtime)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--top", type=int, default=15, help="Slowest packages to list")
+
+    def handle(self, *args, **options):
+        probe = PROBE % (HEAVY_MODULES,)
+        env = dict(os.environ)
+        env.setdefault("DJANGO_SETTINGS_MODULE", "blockcreds.settings")
+
+        samples = [self.run_probe([sys.executable, "-c", probe], env)[0] for _ in range(options["runs"])]
+        self.stdout.write(
+            f"Worker boot over {len(samples)} runs: "
+            f"median {median(s['seconds'] for s in samples) * 1000:.0f} ms, "
+            f"peak RSS {median(s['max_rss_kb'] for s in samples) / 1024:.1f} MB"
+        )
+        self.stdout.write(f"Heavy libraries imported at boot: {', '.join(samples[0]['loaded']) or 'none'}")
+
+        _, stderr = self.run_probe([sys.executable, "-X", "importtime", "-c", probe], env)
+        self.stdout.write("\nImport time by package (ms):")
+        for package, micros in self.top_imports(stderr, options["top"]):
+            self.stdout.write(f"  {micros / 1000:8.1f}  {package}")
+
+    def run_probe(self, command, env):
+        result = subprocess.run(command, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if result.returncode:
+            raise RuntimeError(f"Boot probe failed:\n{result.stderr[-2000:]}")
+        return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+    @staticmethod
+    def top_imports(importtime_output, top):
+        """Import time per top-level package (sum of self µs of its modules), from `-X importtime` stderr."""
+        totals = {}
+        for line in importtime_output.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            self_us, _, name = line[len("import time:"):].split("|")
+            package = name.strip().split(".")[0]
+            totals[package] = totals.get(package, 0) + int(self_us)
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
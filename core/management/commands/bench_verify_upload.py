@@ -0,0 +1,118 @@
+import os
+import time
+import tempfile
+import tracemalloc
+from datetime import date
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from eth_hash.auto import keccak
+
+from core.models import BlockchainSyncStatus, Certificate, Student
+from core.utils.certificate_utils import generate_certificate_pdf_bytes
+from core.utils.cid import compute_cid
+from core.utils.pinata import PINATA_CID_VERSION
+from core.utils.upload_verify import digest_file, extract_certificate_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Throughput of verify-by-upload on a batch of rendered certificate PDFs: digest (keccak, SHA-256, "
+        "CID), Certificate ID extraction and full /verify-api/upload/ requests (originals and edited "
+        "copies) against a scratch database, plus peak memory hashing a large file streamed versus read whole."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--files", type=int, default=200, help="Certificates in the batch")
+        parser.add_argument("--large-mb", type=int, default=100, help="Size of the file for the memory test")
+
+    def handle(self, *args, **options):
+        pdfs = self.render(options["files"])
+        size = sum(len(pdf) for _, pdf in pdfs)
+        self.stdout.write(f"{len(pdfs)} certificate PDFs, {size / len(pdfs) / 1024:.1f} KiB average")
+
+        self.stdout.write(f"{'stage':<26}{'files/s':>10}{'ms/file':>10}{'MB/s':>10}")
+        self.time_stage("digest", pdfs, size,
+                        lambda f: digest_file(f, cid_version=PINATA_CID_VERSION))
+        self.time_stage("extract Certificate ID", pdfs, size, extract_certificate_id)
+
+        if connection.vendor == "sqlite":
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(
+                tempfile.mkdtemp(), "bench_upload.sqlite3"
+            )
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.seed(pdfs)
+            # The follower checkpoint is fresh, so records come from the database, not the RPC
+            with override_settings(CHAIN_FOLLOWER_MAX_LAG=3600):
+                self.time_requests(pdfs, size)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.memory_test(options["large_mb"])
+
+    def render(self, count):
+        pdfs = []
+        for i in range(count):
+            cert_hash = keccak(f"bench-upload-{i}".encode()).hex()
+            pdfs.append((cert_hash, generate_certificate_pdf_bytes(
+                f"Student {i}", f"Course {i % 20}", cert_hash, f"https://example.com/verify/?hash={cert_hash}",
+                issued_on=date(2025, 1, 1),
+            )))
+        return pdfs
+
+    def time_stage(self, name, pdfs, size, run):
+        files = [SimpleUploadedFile("certificate.pdf", pdf) for _, pdf in pdfs]
+        started = time.perf_counter()
+        for f in files:
+            run(f)
+        self.report(name, len(files), size, time.perf_counter() - started)
+
+    def seed(self, pdfs):
+        for i, (cert_hash, pdf) in enumerate(pdfs):
+            student = Student.objects.create(name=f"Student {i}", email=f"student{i}@example.com", roll_no=f"R{i}")
+            Certificate.objects.create(student=student, course_name=f"Course {i % 20}",
+                                       blockchain_hash=cert_hash, ipfs_cid=compute_cid(pdf, PINATA_CID_VERSION))
+        BlockchainSyncStatus.objects.update_or_create(id=1, defaults={"last_synced_block": 1})
+
+    def time_requests(self, pdfs, size):
+        client = Client()
+        # Originals are matched by CID; a copy with bytes appended no longer is, so its Certificate ID is read
+        for name, batch in (
+            ("request, original files", [pdf for _, pdf in pdfs]),
+            ("request, edited copies", [pdf + b"\n% edited\n" for _, pdf in pdfs]),
+        ):
+            verdicts = {}
+            started = time.perf_counter()
+            for pdf in batch:
+                response = client.post("/verify-api/upload/", {"file": SimpleUploadedFile("certificate.pdf", pdf)})
+                status = response.json()["status"]
+                verdicts[status] = verdicts.get(status, 0) + 1
+            self.report(name, len(batch), size, time.perf_counter() - started)
+            self.stdout.write(f"  verdicts: {verdicts}")
+
+    def memory_test(self, megabytes):
+        chunk = os.urandom(1024 * 1024)
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+            for _ in range(megabytes):
+                f.write(chunk)
+            f.flush()
+
+            self.stdout.write(f"\nPeak Python memory hashing a {megabytes} MB file:")
+            for name, run in (
+                ("read whole (old)", lambda: keccak(open(f.name, "rb").read())),
+                ("streamed digest", lambda: digest_file(open(f.name, "rb"), cid_version=PINATA_CID_VERSION)),
+            ):
+                tracemalloc.start()
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.stdout.write(f"  {name:<22}{peak / 2 ** 20:>8.1f} MB peak{megabytes / elapsed:>9.0f} MB/s")
+
+    def report(self, name, count, size, elapsed):
+        self.stdout.write(f"{name:<26}{count / elapsed:>10.0f}{elapsed / count * 1000:>10.2f}"
+                          f"{size / elapsed / 2 ** 20:>10.1f}")
@@ -0,0 +1,95 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from core.models import BlockchainSyncStatus, Certificate, SyncedBlock
+from core.utils.blockchain import CONTRACT_ADDRESS
+from core.utils.offline_index import DELTA, SNAPSHOT, OfflineIndex, write_index
+
+EXPORT_CHUNK = 10_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the offline verification index: every certificate issued on chain up to the sync checkpoint, "
+        "sorted, with a revocation bitmap. With --delta-from, write only what changed since that file's block. "
+        "Certificates issued inside Merkle batches are not included (their anchoring isn't synced per block); "
+        "they and certificates saved locally but not yet confirmed by the sync are counted in the report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to write")
+        parser.add_argument("--delta-from", metavar="INDEX",
+                            help="Previous snapshot or delta; write a delta on top of it")
+        parser.add_argument("--block", type=int, help="Export the state as of this block (default: checkpoint)")
+
+    def handle(self, *args, **options):
+        checkpoint = BlockchainSyncStatus.objects.filter(id=1).values_list("last_synced_block", flat=True).first()
+        if not checkpoint:
+            raise CommandError("No sync checkpoint yet; run sync_blockchain_events / follow_chain first.")
+        block = options["block"] or checkpoint
+        if block > checkpoint:
+            raise CommandError(f"Block {block} is past the sync checkpoint ({checkpoint}).")
+
+        contract = bytes.fromhex(CONTRACT_ADDRESS.removeprefix("0x")) if CONTRACT_ADDRESS else b""
+        certificates = Certificate.objects.filter(issued_block__isnull=False, issued_block__lte=block)
+        kind, base_block = SNAPSHOT, 0
+        if options["delta_from"]:
+            with OfflineIndex(options["delta_from"]) as base:
+                base_block = self.check_base(base, block, contract)
+            kind = DELTA
+            certificates = certificates.filter(
+                Q(issued_block__gt=base_block) | Q(revoked_block__gt=base_block, revoked_block__lte=block)
+            )
+
+        rows = certificates.order_by("blockchain_hash").values_list("blockchain_hash", "revoked_block")
+        entries = (
+            (bytes.fromhex(cert_hash), revoked_block is not None and revoked_block <= block)
+            for cert_hash, revoked_block in rows.iterator(chunk_size=EXPORT_CHUNK)
+        )
+        count = write_index(
+            options["path"], entries, block, kind=kind, base_block=base_block,
+            block_hash=self.block_hash(block), contract=contract,
+        )
+
+        label = f"delta {base_block}..{block}" if kind == DELTA else f"snapshot at block {block}"
+        size = os.path.getsize(options["path"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {label}: {count} certificates, {size / 2 ** 20:.1f} MB to {options['path']}"
+        ))
+        self.report_excluded()
+
+    def report_excluded(self):
+        batched = Certificate.objects.filter(batch__isnull=False).count()
+        if batched:
+            self.stdout.write(self.style.WARNING(
+                f"Not exported: {batched} certificates issued inside Merkle batches."
+            ))
+        unconfirmed = Certificate.objects.filter(issued_block__isnull=True, batch__isnull=True).exclude(
+            pdf_file=""
+        ).count()
+        if unconfirmed:
+            self.stdout.write(self.style.WARNING(
+                f"Not exported: {unconfirmed} certificates saved locally whose Issued event hasn't been synced. "
+                f"If they predate the upgrade that records it, run follow_chain --rescan-from-deployment once."
+            ))
+
+    def check_base(self, base, block, contract):
+        if base.contract != contract.rjust(20, b"\0"):
+            raise CommandError(f"{base.path} was exported for a different contract.")
+        if base.block >= block:
+            raise CommandError(f"{base.path} is already at block {base.block}; nothing to add.")
+        # If follow_chain rolled back past the base block since it was exported, the base
+        # contains certificates that are gone; a delta can't express that.
+        known = self.block_hash(base.block)
+        if base.block_hash.strip(b"\0") and known.strip(b"\0") and known != base.block_hash:
+            raise CommandError(
+                f"Block {base.block} was reorganized after {base.path} was exported; write a new snapshot."
+            )
+        return base.block
+
+    @staticmethod
+    def block_hash(number):
+        """The synced block's hash if follow_chain still remembers it, else zeros."""
+        stored = SyncedBlock.objects.filter(number=number).values_list("block_hash", flat=True).first()
+        return bytes.fromhex(stored.removeprefix("0x")) if stored else bytes(32)
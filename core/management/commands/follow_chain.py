@@ -0,0 +1,71 @@
+import time
+import logging
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.models import BlockchainSyncStatus
+from core.utils.blockchain import get_contract
+from core.sync_events import (
+    sync_blockchain_events,
+    rescan_issued_events,
+    record_block_hashes,
+    find_reorg_ancestor,
+    rollback_to_block,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Keep the local certificate table in sync with the chain, handling reorgs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--confirmations", type=int, default=12,
+                            help="Only sync blocks this far behind the head")
+        parser.add_argument("--poll-interval", type=float, default=4.0,
+                            help="Seconds between polls for new blocks")
+        parser.add_argument("--reorg-window", type=int, default=128,
+                            help="Number of recent block hashes kept for reorg detection")
+        parser.add_argument(
+            "--rescan-from-deployment", action="store_true",
+            help="First re-read Issued events up to the checkpoint to confirm certificates saved before "
+                 "the sync recorded their block (once, after upgrading)"
+        )
+
+    def handle(self, *args, **options):
+        web3 = get_contract().w3
+        confirmations = options["confirmations"]
+        if options["rescan_from_deployment"]:
+            confirmed = rescan_issued_events()
+            self.stdout.write(f"Rescan confirmed {confirmed} certificates saved before their block was recorded.")
+        self.stdout.write(
+            f"Following chain (confirmations={confirmations}, poll={options['poll_interval']}s)."
+        )
+
+        while True:
+            try:
+                close_old_connections()
+                self.poll(web3, confirmations, options["reorg_window"])
+            except KeyboardInterrupt:
+                self.stdout.write("Stopped.")
+                return
+            except Exception as e:
+                logger.error(f"[Chain Follower] Poll failed: {e}")
+            time.sleep(options["poll_interval"])
+
+    def poll(self, web3, confirmations, reorg_window):
+        ancestor = find_reorg_ancestor(web3)
+        if ancestor is not None:
+            self.stdout.write(self.style.WARNING(f"Reorg detected; rolling back to block {ancestor}."))
+            rollback_to_block(ancestor)
+
+        target = web3.eth.block_number - confirmations
+        synced = sync_blockchain_events(to_block=target)
+        if synced is None:
+            return
+
+        record_block_hashes(web3, synced, reorg_window)
+
+        # Touch the checkpoint so readers can tell the follower is alive.
+        status, _ = BlockchainSyncStatus.objects.get_or_create(id=1)
+        status.save(update_fields=["updated_at"])
@@ -0,0 +1,392 @@
+import csv
+import os
+import json
+import time
+import threading
+from datetime import date
+from functools import partial
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import localdate
+
+from core.models import Certificate, CertificateBatch
+from core.issuance import (
+    new_certificate_hash,
+    render_certificate,
+    upload_certificate,
+    send_certificate_anchor,
+    save_certificate,
+    queue_student_email,
+    anchored_cid,
+    get_or_create_student,
+    certificate_batch_tree,
+    anchor_certificate_batch,
+    save_certificate_batch,
+)
+from core.utils.blockchain import wait_for_confirmation
+from core.utils.pipeline import Pipeline, Stage, StageFailure
+from core.utils.render_service import RenderService, RENDER_WORKERS
+
+REQUIRED_COLUMNS = ("name", "email", "roll_no", "course_name")
+
+
+class Checkpoint:
+    """
+    Append-only record of bulk issuance progress. A bare row number means
+    the row was fully issued and saved; a resumed run skips it. A JSON line
+    {"row": ..., "cert_hash": ..., "issued_on": ...} is written when a row is
+    given its hash and issue date, before anything is sent on chain, and
+    again with its CID, PDF path and transaction hash once it is sent. A
+    resumed run reuses these, so a row anchored before the run stopped is
+    never anchored under a new hash, and its PDF is rendered with the same
+    date. Whether a recorded transaction was mined is checked on chain.
+    Rows of a Merkle batch record its root and rows, in leaf order, before
+    the batch is sent, so a resumed run rebuilds the same tree.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.progress = {}      # row -> fields recorded by earlier runs
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith("{"):
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue    # torn last line of an interrupted run
+                        self.progress.setdefault(entry.pop("row"), {}).update(entry)
+                    elif line:
+                        self.done.add(int(line))
+        self._file = open(path, "a")
+
+    def _append(self, line):
+        with self._lock:
+            self._file.write(f"{line}\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record(self, row_number, **fields):
+        self._append(json.dumps({"row": row_number, **fields}))
+
+    def mark(self, row_number):
+        self._append(row_number)
+        self.done.add(row_number)
+
+    def close(self):
+        self._file.close()
+
+
+def missing_columns(csv_path):
+    """Required columns absent from the CSV header."""
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        fieldnames = csv.DictReader(f).fieldnames or []
+    return [col for col in REQUIRED_COLUMNS if col not in fieldnames]
+
+
+def iter_csv_rows(csv_path, skip=()):
+    """
+    Stream rows from the CSV one at a time, skipping already issued rows.
+    A row with a required value missing (e.g. a short line) is yielded as a
+    StageFailure, so it is reported like any other failed row.
+    """
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        for row_number, row in enumerate(csv.DictReader(f), start=1):
+            if row_number in skip:
+                continue
+            item = {"row": row_number}
+            for col in REQUIRED_COLUMNS + ("percentage",):
+                item[col] = (row.get(col) or "").strip()
+            empty = [col for col in REQUIRED_COLUMNS if not item[col]]
+            if empty:
+                yield StageFailure(item, "csv", f"missing {', '.join(empty)}")
+                continue
+            yield item
+
+
+def in_batch_order(entries):
+    """Entries of a recorded batch sorted into their leaf order."""
+    order = {row: index for index, row in enumerate(entries[0]["batch_rows"])}
+    return sorted(entries, key=lambda entry: order[entry["row"]])
+
+
+# ----------------------------
+# Pipeline Stages
+# ----------------------------
+def render_stage(item, service, checkpoint):
+    # A row left unfinished by an earlier run keeps its hash (and its CID and
+    # transaction if it got that far)
+    item.update(checkpoint.progress.get(item["row"], {}))
+    item["resumed"] = bool(item.get("cert_hash"))
+    if not item["resumed"]:
+        item["cert_hash"] = new_certificate_hash()
+        item["issued_on"] = localdate().isoformat()
+        checkpoint.record(item["row"], cert_hash=item["cert_hash"], issued_on=item["issued_on"])
+    if not (item.get("pdf_path") and os.path.exists(item["pdf_path"])):
+        # The recorded date, so a re-render on another day gives the same PDF and CID
+        issued_on = date.fromisoformat(item["issued_on"]) if item.get("issued_on") else None
+        item["pdf_path"] = service.submit(
+            render_certificate, item["name"], item["course_name"], item["cert_hash"], item["percentage"],
+            issued_on
+        ).result()
+    return item
+
+
+def upload_stage(item):
+    if not item.get("ipfs_cid"):
+        item["ipfs_cid"] = upload_certificate(item["pdf_path"])
+    return item
+
+
+def chain_stage(item, checkpoint):
+    if item["resumed"]:
+        # Only the chain says whether the earlier run's transaction was mined: it may not
+        # have recorded it, or recorded one that was dropped or reverted
+        cid = anchored_cid(item["cert_hash"])
+        if cid:
+            item["ipfs_cid"] = cid
+            return item
+        item["tx_hash"] = None
+    # Only broadcast: the receipt is awaited in the background and collected before the row is saved
+    item["tx_hash"], item["confirmation"] = send_certificate_anchor(item["cert_hash"], item["ipfs_cid"])
+    checkpoint.record(
+        item["row"], cert_hash=item["cert_hash"], ipfs_cid=item["ipfs_cid"],
+        pdf_path=item["pdf_path"], tx_hash=item["tx_hash"]
+    )
+    return item
+
+
+class Command(BaseCommand):
+    help = "Bulk issue certificates from a CSV (name, email, roll_no, course_name[, percentage])."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="Path to the CSV file")
+        parser.add_argument("--checkpoint", help="Progress file (default: <csv_path>.progress)")
+        parser.add_argument(
+            "--render-workers", type=int, default=RENDER_WORKERS,
+            help="Processes rendering PDFs (default: one per CPU core)"
+        )
+        parser.add_argument("--upload-workers", type=int, default=8)
+        parser.add_argument(
+            "--chain-workers", type=int, default=8,
+            help="Threads broadcasting transactions (nonces are allocated locally; receipts are awaited "
+                 "in the background, so up to --queue-size transactions can be unconfirmed at once)"
+        )
+        parser.add_argument("--queue-size", type=int, default=64,
+                            help="Max items buffered between two stages")
+        parser.add_argument(
+            "--merkle-batch", type=int, default=0,
+            help="Anchor certificates in Merkle batches of this size (one transaction per batch)"
+        )
+
+    def handle(self, *args, **options):
+        csv_path = options["csv_path"]
+        if not os.path.exists(csv_path):
+            raise CommandError(f"CSV file not found: {csv_path}")
+        missing = missing_columns(csv_path)
+        if missing:
+            raise CommandError(f"CSV is missing required columns: {', '.join(missing)}")
+
+        checkpoint = Checkpoint(options["checkpoint"] or f"{csv_path}.progress")
+        if checkpoint.done:
+            self.stdout.write(f"Resuming: {len(checkpoint.done)} rows already issued.")
+
+        batch_size = options["merkle_batch"]
+        if not batch_size and any(p.get("merkle_root") for p in checkpoint.progress.values()):
+            checkpoint.close()
+            raise CommandError("The checkpoint has Merkle batches in progress; resume with --merkle-batch.")
+        render_service = RenderService(workers=options["render_workers"]).start()
+        stages = [
+            # One pipeline thread per render process; the threads only wait on the pool.
+            Stage("pdf", partial(render_stage, service=render_service, checkpoint=checkpoint),
+                  options["render_workers"]),
+            Stage("ipfs", upload_stage, options["upload_workers"]),
+        ]
+        if not batch_size:
+            stages.append(Stage("chain", partial(chain_stage, checkpoint=checkpoint), options["chain_workers"]))
+        pipeline = Pipeline(stages, queue_size=options["queue_size"])
+
+        self.issued = self.failed = 0
+        self.save_seconds = self.confirm_seconds = 0.0
+        self.confirmed = 0
+        self.batches = 0
+        pending = []
+        resumed_batches = {}    # merkle_root -> rows of a batch recorded by an earlier run
+        started = time.time()
+        try:
+            for result in pipeline.run(iter_csv_rows(csv_path, skip=checkpoint.done)):
+                if isinstance(result, StageFailure):
+                    self.failed += 1
+                    self.stderr.write(
+                        f"Row {result.item['row']} ({result.item['roll_no']}) failed "
+                        f"at {result.stage}: {result.error}"
+                    )
+                    continue
+
+                if batch_size and result.get("merkle_root"):
+                    group = resumed_batches.setdefault(result["merkle_root"], [])
+                    group.append(result)
+                    if len(group) == len(result["batch_rows"]):
+                        self.flush_batch(in_batch_order(resumed_batches.pop(result["merkle_root"])), checkpoint)
+                elif batch_size:
+                    pending.append(result)
+                    if len(pending) >= batch_size:
+                        self.flush_batch(pending, checkpoint)
+                        pending = []
+                elif self.confirm(result, checkpoint):
+                    self.save_row(result, checkpoint)
+
+            if pending:
+                self.flush_batch(pending, checkpoint)
+            for merkle_root, group in resumed_batches.items():
+                self.finish_partial_batch(merkle_root, group, checkpoint)
+        finally:
+            checkpoint.close()
+            render_service.close()
+
+        elapsed = time.time() - started
+        self.stdout.write("")
+        self.stdout.write(f"{'stage':<8}{'workers':>8}{'done':>8}{'failed':>8}{'items/s':>10}{'avg s':>8}")
+        for stats in pipeline.stats:
+            self.stdout.write(
+                f"{stats.name:<8}{stats.workers:>8}{stats.processed:>8}{stats.failed:>8}"
+                f"{stats.throughput:>10.2f}{stats.avg_latency:>8.2f}"
+            )
+        if not batch_size:
+            # avg s here is how long saving was held up per row waiting for its receipt
+            self.stdout.write(
+                f"{'confirm':<8}{'':>8}{self.confirmed:>8}{'':>8}{'':>10}"
+                f"{(self.confirm_seconds / max(self.confirmed, 1)):>8.2f}"
+            )
+        label = "batch" if batch_size else "db"
+        units = self.batches if batch_size else self.issued
+        self.stdout.write(
+            f"{label:<8}{1:>8}{units:>8}{'':>8}{'':>10}"
+            f"{(self.save_seconds / max(units, 1)):>8.2f}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Issued {self.issued} certificates ({self.failed} failed) in {elapsed:.1f}s "
+            f"({self.issued / elapsed if elapsed else 0:.2f}/s overall)."
+        ))
+
+    def confirm(self, result, checkpoint):
+        """Wait for the row's transaction to be mined (the later ones keep confirming meanwhile)."""
+        if result.get("confirmation") is None:
+            return True
+        confirm_started = time.time()
+        try:
+            result["tx_hash"] = wait_for_confirmation(result.pop("confirmation"))
+        except Exception as e:
+            # Forget the transaction, so a resumed run checks the chain instead of trusting it
+            checkpoint.record(result["row"], cert_hash=result["cert_hash"], tx_hash=None)
+            self.failed += 1
+            self.stderr.write(f"Row {result['row']} ({result['roll_no']}) failed at confirm: {e}")
+            return False
+        finally:
+            self.confirm_seconds += time.time() - confirm_started
+        self.confirmed += 1
+        return True
+
+    def save_row(self, result, checkpoint):
+        save_started = time.time()
+        try:
+            # Saved by the earlier run, which stopped before marking the row done
+            if not (result["resumed"] and Certificate.objects.filter(blockchain_hash=result["cert_hash"]).exists()):
+                # The email is queued with the row, so a resumed run never sends it twice
+                with transaction.atomic():
+                    save_certificate(
+                        result["name"], result["email"], result["roll_no"], result["course_name"],
+                        result["cert_hash"], result["pdf_path"], result["ipfs_cid"], result.get("tx_hash")
+                    )
+                    queue_student_email(result["email"], result["name"], result["pdf_path"], result["cert_hash"])
+        except Exception as e:
+            self.failed += 1
+            self.stderr.write(f"Row {result['row']} ({result['roll_no']}) failed at db: {e}")
+            return
+        finally:
+            self.save_seconds += time.time() - save_started
+
+        checkpoint.mark(result["row"])
+        self.issued += 1
+
+    def flush_batch(self, entries, checkpoint):
+        """
+        Anchor a Merkle batch on chain (one transaction) and save its certificates.
+
+        Each row's student is created first and a row that fails is left out,
+        so it can't roll back the whole batch after the gas is spent. A new
+        batch is then checkpointed; one recorded by an earlier run is rebuilt
+        from its recorded rows and is only sent if its root isn't on chain.
+        """
+        batch_started = time.time()
+        recorded_root = entries[0].get("merkle_root")
+        try:
+            if not recorded_root:
+                entries = [entry for entry in entries if self.create_student(entry)]
+                if not entries:
+                    return
+            tree = certificate_batch_tree(entries)
+            merkle_root = tree.root.hex()
+            if recorded_root and recorded_root != merkle_root:
+                raise RuntimeError(f"rebuilt root {merkle_root} doesn't match the checkpoint's {recorded_root}")
+            if not recorded_root:
+                rows = [entry["row"] for entry in entries]
+                for entry in entries:
+                    checkpoint.record(
+                        entry["row"], cert_hash=entry["cert_hash"], ipfs_cid=entry["ipfs_cid"],
+                        pdf_path=entry["pdf_path"], merkle_root=merkle_root, batch_rows=rows
+                    )
+
+            # Saved by an earlier run that stopped before marking its rows done
+            if not CertificateBatch.objects.filter(merkle_root=merkle_root).exists():
+                tx_hash = anchor_certificate_batch(tree, len(entries))
+                # The emails are queued with the batch, so a resumed run never sends them twice
+                with transaction.atomic():
+                    save_certificate_batch(entries, tree, tx_hash)
+                    for entry in entries:
+                        queue_student_email(entry["email"], entry["name"], entry["pdf_path"], entry["cert_hash"])
+        except Exception as e:
+            self.failed += len(entries)
+            self.stderr.write(
+                f"Batch of rows {entries[0]['row']}..{entries[-1]['row']} failed at chain: {e}"
+            )
+            return
+        finally:
+            self.save_seconds += time.time() - batch_started
+
+        for entry in entries:
+            checkpoint.mark(entry["row"])
+        self.issued += len(entries)
+        self.batches += 1
+        self.stdout.write(f"Anchored batch {merkle_root} ({len(entries)} certificates)")
+
+    def create_student(self, entry):
+        try:
+            get_or_create_student(entry["name"], entry["email"], entry["roll_no"])
+        except Exception as e:
+            self.failed += 1
+            self.stderr.write(f"Row {entry['row']} ({entry['roll_no']}) failed at db: {e}")
+            return False
+        return True
+
+    def finish_partial_batch(self, merkle_root, entries, checkpoint):
+        """
+        A recorded batch of which only some rows came through this run. The
+        others were marked done, which happens only once the batch is saved,
+        or failed again before reaching it; the latter leave the batch for
+        the next run.
+        """
+        if CertificateBatch.objects.filter(merkle_root=merkle_root).exists():
+            for entry in entries:
+                checkpoint.mark(entry["row"])
+            self.issued += len(entries)
+            return
+        self.failed += len(entries)
+        missing = sorted(set(entries[0]["batch_rows"]) - {entry["row"] for entry in entries})
+        self.stderr.write(
+            f"Batch {merkle_root} is missing rows {', '.join(map(str, missing))}; "
+            f"its other rows are left for the next run"
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard's daily certificate rollup from the certificates table."
+
+    def handle(self, *args, **options):
+        days = rebuild_daily_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt daily stats for {days} days."))
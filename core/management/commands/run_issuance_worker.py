@@ -0,0 +1,60 @@
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.issuance import claim_next_job, requeue_stale_jobs, run_issuance_job
+from core.utils.render_service import get_render_service
+
+
+class Command(BaseCommand):
+    help = "Process queued certificate issuance jobs (DB-backed queue, no broker needed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=4,
+                            help="Jobs processed at once by this worker")
+        parser.add_argument("--poll-interval", type=float, default=2.0,
+                            help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--max-attempts", type=int, default=3)
+        parser.add_argument("--stale-after", type=int, default=30,
+                            help="Minutes before a running job is assumed orphaned and re-queued")
+        parser.add_argument("--once", action="store_true",
+                            help="Drain the queue and exit instead of polling forever")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(timedelta(minutes=options["stale_after"]))
+        if requeued:
+            self.stdout.write(f"Re-queued {requeued} orphaned jobs.")
+
+        # Render processes are started before the job threads exist
+        get_render_service().start()
+        concurrency = max(1, options["concurrency"])
+        in_flight = set()
+        self.stdout.write(f"Issuance worker started (concurrency={concurrency}).")
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="issuance") as pool:
+            try:
+                while True:
+                    while len(in_flight) < concurrency:
+                        job = claim_next_job()
+                        if job is None:
+                            break
+                        in_flight.add(pool.submit(self.process, job, options["max_attempts"]))
+
+                    if in_flight:
+                        _, in_flight = wait(in_flight, timeout=options["poll_interval"],
+                                            return_when=FIRST_COMPLETED)
+                        continue
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping; waiting for running jobs to finish...")
+
+    def process(self, job, max_attempts):
+        try:
+            job = run_issuance_job(job, max_attempts=max_attempts)
+            self.stdout.write(f"Job #{job.pk}: {job.status} {job.stage_timings}")
+        finally:
+            connections.close_all()
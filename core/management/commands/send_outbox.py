@@ -0,0 +1,47 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.outbox import RateLimiter, drain_outbox, requeue_stale_emails
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails over a reused SMTP connection, within a per-minute budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rate", type=int, default=settings.EMAIL_RATE_PER_MINUTE,
+                            help="Max messages per minute (0 = unlimited)")
+        parser.add_argument("--batch-size", type=int, default=50,
+                            help="Messages claimed from the outbox at a time")
+        parser.add_argument("--max-attempts", type=int, default=5,
+                            help="Attempts before a soft-failing message is marked failed")
+        parser.add_argument("--poll-interval", type=float, default=10.0,
+                            help="Seconds to sleep when nothing is due")
+        parser.add_argument("--stale-after", type=int, default=15,
+                            help="Minutes before a 'sending' message is assumed orphaned and re-queued")
+        parser.add_argument("--once", action="store_true",
+                            help="Send what is due and exit instead of polling forever")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_emails(timedelta(minutes=options["stale_after"]))
+        if requeued:
+            self.stdout.write(f"Re-queued {requeued} orphaned messages.")
+
+        limiter = RateLimiter(options["rate"])
+        self.stdout.write(f"Outbox sender started (rate={options['rate'] or 'unlimited'}/min).")
+        while True:
+            try:
+                close_old_connections()
+                sent, failed = drain_outbox(options["batch_size"], limiter, options["max_attempts"])
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent} messages ({failed} failed).")
+            except KeyboardInterrupt:
+                self.stdout.write("Stopped.")
+                return
+            except Exception as e:
+                self.stderr.write(f"Outbox delivery failed: {e}")
+            if options["once"]:
+                return
+            time.sleep(options["poll_interval"])
@@ -0,0 +1,29 @@
+# core/middleware.py
+
+from core.utils.upload_verify import UPLOAD_CHUNK_SIZE, VERIFY_UPLOAD_MAX_BYTES
+
+UPLOAD_VIEWS = ("verify_upload", "verify_upload_api")
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Refuses verify-by-upload requests whose Content-Length is over
+    VERIFY_UPLOAD_MAX_BYTES before anything reads the body. Listed ahead of
+    CsrfViewMiddleware, which reads request.POST for the HTML form and would
+    otherwise spool the whole upload to disk first.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.resolver_match.url_name not in UPLOAD_VIEWS:
+            return None
+        # One chunk of slack for the multipart framing around the file
+        if int(request.META.get("CONTENT_LENGTH") or 0) <= VERIFY_UPLOAD_MAX_BYTES + UPLOAD_CHUNK_SIZE:
+            return None
+        from core.views import upload_too_large_response
+        return upload_too_large_response(request)
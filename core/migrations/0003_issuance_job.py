@@ -0,0 +1,42 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_certificate_batch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssuanceJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('roll_no', models.CharField(max_length=100)),
+                ('course_name', models.CharField(max_length=255)),
+                ('percentage', models.CharField(blank=True, max_length=20)),
+                ('cert_hash', models.CharField(blank=True, max_length=64)),
+                ('pdf_path', models.CharField(blank=True, max_length=500)),
+                ('ipfs_cid', models.CharField(blank=True, max_length=255)),
+                ('transaction_hash', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('stage', models.CharField(blank=True, max_length=20)),
+                ('stage_timings', models.JSONField(blank=True, default=dict)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('certificate', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='issuance_job', to='core.certificate')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='core_issuan_status_8f2db8_idx')],
+            },
+        ),
+    ]
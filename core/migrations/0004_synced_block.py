@@ -0,0 +1,21 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_issuance_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncedBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.BigIntegerField(unique=True)),
+                ('block_hash', models.CharField(max_length=66)),
+            ],
+        ),
+    ]
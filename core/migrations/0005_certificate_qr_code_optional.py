@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_synced_block'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificate',
+            name='qr_code',
+            field=models.ImageField(blank=True, upload_to='qr/'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_certificate_qr_code_optional'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PinnedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cid', models.CharField(max_length=100, unique=True)),
+                ('pinata_cid', models.CharField(blank=True, max_length=100)),
+                ('size', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('pinned', 'Pinned'), ('mismatch', 'CID mismatch')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:22
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def populate_daily_stats(apps, schema_editor):
+    Certificate = apps.get_model('core', 'Certificate')
+    DailyCertificateStats = apps.get_model('core', 'DailyCertificateStats')
+    rows = (
+        Certificate.objects.annotate(day=TruncDate('issued_at'))
+        .values('day')
+        .annotate(issued=Count('id'), revoked=Count('id', filter=Q(revoked=True)))
+    )
+    DailyCertificateStats.objects.bulk_create([
+        DailyCertificateStats(day=row['day'], issued=row['issued'], revoked=row['revoked'])
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_outbound_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCertificateStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('issued', models.IntegerField(default=0)),
+                ('revoked', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:26
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_daily_certificate_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['revoked', 'id'], name='core_certif_revoked_f6e161_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['issued_at'], name='core_certif_issued__453c9f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['student', 'issued_at'], name='core_certif_student_739cec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['issued_block'], name='core_certif_issued__6b8619_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['revoked_block'], name='core_certif_revoked_32c595_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(django.db.models.functions.text.Lower('course_name'), name='cert_course_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['name'], name='core_studen_name_a58b91_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='student_name_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,169 @@
+"""
+Store Certificate.blockchain_hash / transaction_hash as 32-byte binary values.
+
+Existing hex is normalized (case, 0x prefix) on the way. Certificates that
+turn out to share a hash under different spellings (a 0x-prefixed copy from
+chain sync next to the locally issued row) are merged into the oldest row,
+and the dashboard rollup is recomputed if any were.
+"""
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+import core.fields
+
+CHUNK = 2000
+
+
+def _normalize(value):
+    try:
+        return core.fields.hash_to_bytes(value)
+    except ValueError:
+        return None
+
+
+def copy_to_binary(apps, schema_editor):
+    Certificate = apps.get_model("core", "Certificate")
+    RevokedCertificate = apps.get_model("core", "RevokedCertificate")
+    IssuanceJob = apps.get_model("core", "IssuanceJob")
+
+    invalid = []
+    batch = []
+    rows = Certificate.objects.order_by("id").values("id", "blockchain_hash", "transaction_hash")
+    for row in rows.iterator(chunk_size=CHUNK):
+        raw = _normalize(row["blockchain_hash"])
+        if raw is None:
+            invalid.append(row["id"])
+            continue
+        batch.append(Certificate(
+            id=row["id"],
+            blockchain_hash_bin=raw,
+            transaction_hash_bin=_normalize(row["transaction_hash"]) if row["transaction_hash"] else None,
+        ))
+        if len(batch) == CHUNK:
+            Certificate.objects.bulk_update(batch, ["blockchain_hash_bin", "transaction_hash_bin"])
+            batch = []
+    Certificate.objects.bulk_update(batch, ["blockchain_hash_bin", "transaction_hash_bin"])
+    if invalid:
+        raise RuntimeError(
+            f"{len(invalid)} certificates have a blockchain_hash that is not a 32-byte hex value "
+            f"(ids {invalid[:10]}); fix or remove them before migrating."
+        )
+
+    merged = 0
+    duplicated = (
+        Certificate.objects.values("blockchain_hash_bin").annotate(n=Count("id")).filter(n__gt=1)
+    )
+    for entry in list(duplicated):
+        kept, *others = Certificate.objects.filter(
+            blockchain_hash_bin=entry["blockchain_hash_bin"]
+        ).order_by("id")
+        for duplicate in others:
+            if duplicate.revoked and not kept.revoked:
+                kept.revoked = True
+                kept.revoked_block = duplicate.revoked_block
+            kept.issued_block = kept.issued_block or duplicate.issued_block
+            kept.transaction_hash_bin = kept.transaction_hash_bin or duplicate.transaction_hash_bin
+            if RevokedCertificate.objects.filter(certificate_id=duplicate.id).exists():
+                RevokedCertificate.objects.get_or_create(certificate_id=kept.id)
+            if not IssuanceJob.objects.filter(certificate_id=kept.id).exists():
+                IssuanceJob.objects.filter(certificate_id=duplicate.id).update(certificate_id=kept.id)
+            duplicate.delete()
+            merged += 1
+        kept.save()
+
+    # A transaction hash stays only on the oldest certificate that references it
+    duplicated = (
+        Certificate.objects.filter(transaction_hash_bin__isnull=False)
+        .values("transaction_hash_bin").annotate(n=Count("id")).filter(n__gt=1)
+    )
+    for entry in list(duplicated):
+        ids = list(Certificate.objects.filter(
+            transaction_hash_bin=entry["transaction_hash_bin"]
+        ).order_by("id").values_list("id", flat=True))
+        Certificate.objects.filter(id__in=ids[1:]).update(transaction_hash_bin=None)
+
+    if merged:
+        _rebuild_daily_stats(apps)
+        print(f"\n  Merged {merged} certificates stored twice under differently spelled hashes.")
+
+
+def _rebuild_daily_stats(apps):
+    Certificate = apps.get_model("core", "Certificate")
+    DailyCertificateStats = apps.get_model("core", "DailyCertificateStats")
+    DailyCertificateStats.objects.all().delete()
+    DailyCertificateStats.objects.bulk_create([
+        DailyCertificateStats(day=row["day"], issued=row["issued"], revoked=row["revoked"])
+        for row in Certificate.objects.annotate(day=TruncDate("issued_at")).values("day").annotate(
+            issued=Count("id"), revoked=Count("id", filter=Q(revoked=True))
+        )
+    ])
+
+
+def copy_to_text(apps, schema_editor):
+    Certificate = apps.get_model("core", "Certificate")
+    rows = Certificate.objects.values("id", "blockchain_hash_bin", "transaction_hash_bin")
+    for row in rows.iterator(chunk_size=CHUNK):
+        Certificate.objects.filter(pk=row["id"]).update(
+            blockchain_hash=row["blockchain_hash_bin"],
+            transaction_hash=row["transaction_hash_bin"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='blockchain_hash_bin',
+            field=core.fields.HashField(null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='transaction_hash_bin',
+            field=core.fields.HashField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='blockchain_hash',
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='transaction_hash',
+            field=models.CharField(max_length=255, blank=True, null=True),
+        ),
+        migrations.RunPython(copy_to_binary, copy_to_text),
+        migrations.RemoveField(
+            model_name='certificate',
+            name='blockchain_hash',
+        ),
+        migrations.RemoveField(
+            model_name='certificate',
+            name='transaction_hash',
+        ),
+        migrations.RenameField(
+            model_name='certificate',
+            old_name='blockchain_hash_bin',
+            new_name='blockchain_hash',
+        ),
+        migrations.RenameField(
+            model_name='certificate',
+            old_name='transaction_hash_bin',
+            new_name='transaction_hash',
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='blockchain_hash',
+            field=core.fields.HashField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='transaction_hash',
+            field=core.fields.HashField(blank=True, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_binary_hashes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['ipfs_cid'], name='core_certif_ipfs_ci_bf89b7_idx'),
+        ),
+    ]
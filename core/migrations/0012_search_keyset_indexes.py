@@ -0,0 +1,30 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:29
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_certificate_cid_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='certificate',
+            name='cert_course_lower_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='student',
+            name='student_name_lower_idx',
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(django.db.models.functions.text.Lower('course_name'), models.F('id'), name='cert_course_lower_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('id'), name='student_name_lower_id_idx'),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.utils import timezone
+from django.db.models.functions import Lower
+
+from .fields import HashField
 
 
 class Student(models.Model):
@@ -7,30 +10,189 @@ class Student(models.Model):
     email = models.EmailField(unique=True)
     roll_no = models.CharField(max_length=100, unique=True)  # ✅ Roll number for uniqueness
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["name"]),
+            # Revocation console search, newest first: the prefix match and its id order in one index
+            models.Index(Lower("name"), "id", name="student_name_lower_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.roll_no})"
 
 
+class CertificateBatch(models.Model):
+    """A Merkle batch of certificates anchored on chain with a single transaction."""
+    merkle_root = models.CharField(max_length=64, unique=True)
+    transaction_hash = models.CharField(max_length=255, unique=True, blank=True, null=True)
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Batch {self.merkle_root[:10]}… ({self.size} certificates)"
+
+
 class Certificate(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="certificates")
     course_name = models.CharField(max_length=255)
 
     pdf_file = models.FileField(upload_to="certificates/")
-    qr_code = models.ImageField(upload_to="qr/")
+    qr_code = models.ImageField(upload_to="qr/", blank=True)  # legacy; QR PNGs are now rendered on demand
 
     ipfs_cid = models.CharField(max_length=255, blank=True, null=True)  # ✅ IPFS storage
-    blockchain_hash = models.CharField(max_length=255, unique=True)     # ✅ Unique blockchain hash
-    transaction_hash = models.CharField(max_length=255, unique=True)    # ✅ Blockchain TX reference
+    blockchain_hash = HashField(unique=True)     # ✅ Unique blockchain hash (32 bytes, hex in Python)
+    transaction_hash = HashField(unique=True, blank=True, null=True)  # ✅ Blockchain TX reference (on the batch for batched certs)
     issued_block = models.IntegerField(null=True, blank=True, default=None)
     revoked_block = models.IntegerField(null=True, blank=True)
 
     issued_at = models.DateTimeField(auto_now_add=True)
     revoked = models.BooleanField(default=False)
 
+    # Merkle-batched issuance: inclusion proof (hex siblings) against batch.merkle_root
+    batch = models.ForeignKey(CertificateBatch, on_delete=models.PROTECT, related_name="certificates",
+                              null=True, blank=True)
+    merkle_proof = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["revoked", "id"]),                       # status filter + keyset paging
+            models.Index(fields=["issued_at"]),                           # per-day counts
+            models.Index(fields=["student", "issued_at"]),                # a student's certificates
+            models.Index(fields=["issued_block"]),                        # reorg rollback
+            models.Index(fields=["revoked_block"]),
+            models.Index(Lower("course_name"), "id", name="cert_course_lower_id_idx"),    # console search
+            models.Index(fields=["ipfs_cid"]),                            # verify-by-upload without a readable ID
+        ]
+
     def __str__(self):
         return f"{self.student.name} - {self.course_name} ({'Revoked' if self.revoked else 'Active'})"
 
 
+class IssuanceJob(models.Model):
+    """
+    A queued certificate issuance. Processed outside the request by
+    `manage.py run_issuance_worker`; each stage's output is stored so a retry
+    resumes after the last completed stage instead of re-issuing on chain.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    # Request payload
+    name = models.CharField(max_length=255)
+    email = models.EmailField()
+    roll_no = models.CharField(max_length=100)
+    course_name = models.CharField(max_length=255)
+    percentage = models.CharField(max_length=20, blank=True)
+
+    # Stage outputs
+    cert_hash = models.CharField(max_length=64, blank=True)
+    pdf_path = models.CharField(max_length=500, blank=True)
+    ipfs_cid = models.CharField(max_length=255, blank=True)
+    transaction_hash = models.CharField(max_length=255, blank=True)
+    certificate = models.OneToOneField(Certificate, on_delete=models.SET_NULL, related_name="issuance_job",
+                                       null=True, blank=True)
+
+    # Progress
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    stage = models.CharField(max_length=20, blank=True)
+    stage_timings = models.JSONField(default=dict, blank=True)  # {stage: seconds}
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"Job #{self.pk} {self.name} ({self.roll_no}) - {self.status}"
+
+
+class OutboundEmail(models.Model):
+    """
+    Outbox for student emails. Issuance only queues messages here; the
+    send_outbox worker delivers them over one reused SMTP connection.
+    """
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    # [{"path": ...}] for files on disk, or {"filename", "content" (base64), "mimetype"}
+    attachments = models.JSONField(default=list, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"Email #{self.pk} to {self.to_email} - {self.status}"
+
+
+class PinnedFile(models.Model):
+    """
+    Local index of files uploaded to IPFS, keyed by the CID computed locally
+    before upload, so an identical file is never uploaded twice.
+    """
+    PINNED = "pinned"
+    MISMATCH = "mismatch"
+    STATUS_CHOICES = [
+        (PINNED, "Pinned"),
+        (MISMATCH, "CID mismatch"),
+    ]
+
+    cid = models.CharField(max_length=100, unique=True)          # computed locally
+    pinata_cid = models.CharField(max_length=100, blank=True)   # returned by Pinata
+    size = models.BigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.cid} ({self.status})"
+
+
+class DailyCertificateStats(models.Model):
+    """
+    Dashboard rollup, one row per issue day (local time), kept up to date
+    incrementally by core.stats. `revoked` counts certificates issued that
+    day which are now revoked, so the totals are sums over all rows.
+    """
+    day = models.DateField(unique=True)
+    issued = models.IntegerField(default=0)
+    revoked = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.issued} issued, {self.revoked} revoked"
+
+
 class BlockchainSyncStatus(models.Model):
     """Tracks the last synced block for incremental updates."""
     last_synced_block = models.BigIntegerField(default=0)
@@ -38,6 +200,17 @@ class BlockchainSyncStatus(models.Model):
 
     def __str__(self):
         return f"Last Synced Block: {self.last_synced_block}"
+
+
+class SyncedBlock(models.Model):
+    """Hashes of recently synced blocks, kept by follow_chain to detect reorgs."""
+    number = models.BigIntegerField(unique=True)
+    block_hash = models.CharField(max_length=66)
+
+    def __str__(self):
+        return f"Block {self.number} ({self.block_hash[:10]}…)"
+
+
 class RevokedCertificate(models.Model):
     certificate = models.OneToOneField(Certificate, on_delete=models.CASCADE, related_name="revocation")
     revoked_at = models.DateTimeField(auto_now_add=True)
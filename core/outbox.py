@@ -0,0 +1,191 @@
+# core/outbox.py
+
+import time
+import base64
+import socket
+import smtplib
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils.timezone import now
+
+from core.models import OutboundEmail
+from core.utils.email_sender import CERTIFICATE_EMAIL_SUBJECT, certificate_email_body
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 3600
+
+
+# ----------------------------
+# Queueing
+# ----------------------------
+def queue_email(to_email, subject, body, attachments=()) -> OutboundEmail:
+    """Add a message to the outbox; send_outbox delivers it."""
+    return OutboundEmail.objects.create(
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        attachments=list(attachments)
+    )
+
+
+def queue_certificate_email(student_email, student_name, certificate_path, qr_png=None) -> OutboundEmail:
+    attachments = [{"path": str(certificate_path)}]
+    if qr_png:
+        attachments.append({
+            "filename": "certificate_qr.png",
+            "content": base64.b64encode(qr_png).decode(),
+            "mimetype": "image/png",
+        })
+    return queue_email(student_email, CERTIFICATE_EMAIL_SUBJECT, certificate_email_body(student_name), attachments)
+
+
+# ----------------------------
+# Delivery
+# ----------------------------
+def build_message(outbound: OutboundEmail, connection=None) -> EmailMessage:
+    message = EmailMessage(
+        outbound.subject, outbound.body, settings.EMAIL_HOST_USER, [outbound.to_email],
+        connection=connection
+    )
+    for attachment in outbound.attachments:
+        if "path" in attachment:
+            message.attach_file(attachment["path"])
+        else:
+            message.attach(
+                attachment["filename"], base64.b64decode(attachment["content"]), attachment["mimetype"]
+            )
+    return message
+
+
+def is_soft_failure(exc) -> bool:
+    """Temporary SMTP problems (4xx replies, dropped connections, timeouts) are worth retrying."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    return _connection_lost(exc)
+
+
+def _connection_lost(exc) -> bool:
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException subclasses OSError; only socket-level errors mean the connection is gone.
+    if isinstance(exc, (smtplib.SMTPException, FileNotFoundError)):
+        return False
+    return isinstance(exc, (socket.timeout, OSError))
+
+
+def claim_due_emails(limit):
+    """Claim up to `limit` due messages (conditional update, safe with several senders)."""
+    candidates = OutboundEmail.objects.filter(
+        status=OutboundEmail.PENDING, next_attempt_at__lte=now()
+    ).order_by("next_attempt_at", "pk")[:limit]
+    claimed = []
+    for outbound in candidates:
+        if OutboundEmail.objects.filter(pk=outbound.pk, status=OutboundEmail.PENDING).update(
+            status=OutboundEmail.SENDING
+        ):
+            outbound.status = OutboundEmail.SENDING
+            claimed.append(outbound)
+    return claimed
+
+
+def requeue_stale_emails(older_than: timedelta) -> int:
+    """Return messages left 'sending' by a crashed sender to the outbox."""
+    return OutboundEmail.objects.filter(
+        status=OutboundEmail.SENDING, updated_at__lt=now() - older_than
+    ).update(status=OutboundEmail.PENDING)
+
+
+def _record_failure(outbound, exc, max_attempts):
+    outbound.attempts += 1
+    outbound.last_error = str(exc)[:2000]
+    if is_soft_failure(exc) and outbound.attempts < max_attempts:
+        outbound.status = OutboundEmail.PENDING
+        outbound.next_attempt_at = now() + timedelta(seconds=min(MAX_BACKOFF_SECONDS, 60 * 2 ** outbound.attempts))
+    else:
+        outbound.status = OutboundEmail.FAILED
+    outbound.save()
+    logger.warning(f"[Outbox] #{outbound.pk} to {outbound.to_email} failed ({outbound.status}): {exc}")
+
+
+class RateLimiter:
+    """Spaces sends evenly to stay within a messages-per-minute budget (0 = no limit)."""
+
+    def __init__(self, per_minute=0):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_at = 0.0
+
+    def wait(self):
+        delay = self._next_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_at = max(self._next_at, time.monotonic()) + self.interval
+
+
+def send_batch(connection, batch, limiter=None, max_attempts=5):
+    """
+    Deliver claimed messages over one open connection, paced by `limiter`.
+
+    Each message goes through connection.send_messages() on its own so one
+    bad recipient doesn't decide the fate of the whole batch; the SMTP
+    session stays open between them. A dropped connection is reopened.
+    Returns (sent, failed).
+    """
+    sent = failed = 0
+    for outbound in batch:
+        if limiter:
+            limiter.wait()
+        try:
+            connection.send_messages([build_message(outbound, connection)])
+        except Exception as e:
+            failed += 1
+            _record_failure(outbound, e, max_attempts)
+            if _connection_lost(e):
+                connection.close()
+                try:
+                    connection.open()
+                except Exception as reconnect_error:
+                    logger.warning(f"[Outbox] Reconnect failed: {reconnect_error}")
+            continue
+
+        outbound.status = OutboundEmail.SENT
+        outbound.attempts += 1
+        outbound.sent_at = now()
+        outbound.last_error = ""
+        outbound.save()
+        sent += 1
+
+    return sent, failed
+
+
+def drain_outbox(batch_size=50, limiter=None, max_attempts=5):
+    """
+    Send everything currently due over a single connection, opened only if
+    there is something to send. Returns (sent, failed).
+    """
+    batch = claim_due_emails(batch_size)
+    if not batch:
+        return 0, 0
+
+    total_sent = total_failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception:
+        # e.g. SMTP login failed: put the claimed messages back untouched.
+        OutboundEmail.objects.filter(pk__in=[o.pk for o in batch]).update(status=OutboundEmail.PENDING)
+        raise
+
+    try:
+        while batch:
+            sent, failed = send_batch(connection, batch, limiter, max_attempts)
+            total_sent += sent
+            total_failed += failed
+            batch = claim_due_emails(batch_size)
+    finally:
+        connection.close()
+    return total_sent, total_failed
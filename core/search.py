@@ -0,0 +1,106 @@
+# core/search.py
+
+import re
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+from core.models import Certificate
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Sorts after every character a prefix can be followed by, closing the range.
+_RANGE_END = "\U0010ffff"
+_HEX_PREFIX = re.compile(r"^(0x[0-9a-f]+|[0-9a-f]{8,})$")
+
+LISTING_FIELDS = (
+    "id", "blockchain_hash", "course_name", "issued_at", "revoked",
+    "student__name", "student__roll_no",
+)
+
+
+def _prefix(field, value) -> Q:
+    """
+    `field` (a name or an expression such as Lower("course_name")) starts
+    with `value`, written as a range so it can use a B-tree index (LIKE /
+    istartswith generally can't, e.g. on SQLite).
+    """
+    if isinstance(field, str):
+        return Q(**{f"{field}__gte": value, f"{field}__lt": value + _RANGE_END})
+    # An expression, not an annotation: annotating would join every filter's query to the student
+    return Q(GreaterThanOrEqual(field, value), LessThan(field, value + _RANGE_END))
+
+
+def search_filters(query: str) -> list:
+    """
+    Filters for the revocation console search box, one per indexed column.
+    Something that looks like a hash (0x and hex digits, or eight or more
+    hex digits) is matched as a hash or roll number prefix; anything else as
+    a prefix of the roll number, student name or course name (the latter two
+    case-insensitively).
+    """
+    query = query.strip()
+    lowered = query.lower()
+    if _HEX_PREFIX.match(lowered):
+        return [
+            Q(blockchain_hash__startswith=lowered),     # binary range, see core.fields.HashStartsWith
+            _prefix("student__roll_no", query),
+        ]
+    return [
+        _prefix("student__roll_no", query),
+        _prefix(Lower("student__name"), lowered),
+        _prefix(Lower("course_name"), lowered),
+    ]
+
+
+def certificate_page(query: str = "", after: int = None, limit: int = PAGE_SIZE, status: str = ""):
+    """
+    One page of the certificate listing, newest first, using keyset
+    pagination: `after` is the id of the last row already shown. Returns
+    (rows, next_cursor) where rows are plain dicts and next_cursor is None
+    on the last page.
+
+    Each search filter runs as its own LIMITed query for ids and the results
+    are merged: ORed across tables, the database could only answer them with
+    a full scan. The page's rows are then read by primary key. Cost is a few
+    bounded queries however deep the page.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    certificates = Certificate.objects.all()
+    if status == "active":
+        certificates = certificates.filter(revoked=False)
+    elif status == "revoked":
+        certificates = certificates.filter(revoked=True)
+    if after:
+        certificates = certificates.filter(id__lt=after)
+
+    if query.strip():
+        ids = set()
+        for condition in search_filters(query):
+            ids.update(_newest_ids(certificates.filter(condition), limit + 1))
+        ids = sorted(ids, reverse=True)[:limit + 1]
+        rows = list(Certificate.objects.filter(id__in=ids).order_by("-id").values(*LISTING_FIELDS))
+    else:
+        rows = list(certificates.order_by("-id").values(*LISTING_FIELDS)[:limit + 1])
+
+    next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def _newest_ids(certificates, count):
+    # Ids only, so the sort and LIMIT are answered from the (Lower(column), id) indexes
+    # without reading a certificate row; the page's rows are fetched by primary key after.
+    return list(certificates.order_by("-id").values_list("id", flat=True)[:count])
+
+
+def serialize_row(row) -> dict:
+    return {
+        "id": row["id"],
+        "hash": row["blockchain_hash"],
+        "student": row["student__name"],
+        "roll_no": row["student__roll_no"],
+        "course": row["course_name"],
+        "issued_at": row["issued_at"].isoformat(),
+        "revoked": row["revoked"],
+    }
@@ -0,0 +1,96 @@
+# core/stats.py
+
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction, IntegrityError
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils.timezone import localdate
+
+from core.models import Certificate, DailyCertificateStats
+
+
+# ----------------------------
+# Incremental Updates
+# ----------------------------
+def bump_daily_stats(issued=(), revoked=(), sign=1):
+    """
+    Adjust the rollup. `issued` and `revoked` are the issued_at datetimes of
+    certificates that were just created / just revoked; pass sign=-1 to undo
+    (deleted certificates, reverted revocations). Call it inside the same
+    transaction as the change it describes.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for issued_at in issued:
+        deltas[localdate(issued_at)][0] += sign
+    for issued_at in revoked:
+        deltas[localdate(issued_at)][1] += sign
+
+    for day, (issued_delta, revoked_delta) in deltas.items():
+        if not issued_delta and not revoked_delta:
+            continue
+        changes = {"issued": F("issued") + issued_delta, "revoked": F("revoked") + revoked_delta}
+        if DailyCertificateStats.objects.filter(day=day).update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                DailyCertificateStats.objects.create(day=day, issued=issued_delta, revoked=revoked_delta)
+        except IntegrityError:
+            # Another writer created the row first
+            DailyCertificateStats.objects.filter(day=day).update(**changes)
+
+
+def rebuild_daily_stats():
+    """Recompute the whole rollup from the certificates table. Returns the number of days."""
+    rows = _aggregate_by_day()
+    with transaction.atomic():
+        DailyCertificateStats.objects.all().delete()
+        DailyCertificateStats.objects.bulk_create([
+            DailyCertificateStats(day=row["day"], issued=row["issued"], revoked=row["revoked"])
+            for row in rows
+        ])
+    return len(rows)
+
+
+def _aggregate_by_day():
+    return list(
+        Certificate.objects.annotate(day=TruncDate("issued_at"))
+        .values("day")
+        .annotate(issued=Count("id"), revoked=Count("id", filter=Q(revoked=True)))
+        .order_by("day")
+    )
+
+
+# ----------------------------
+# Dashboard
+# ----------------------------
+def dashboard_stats(days=7):
+    """
+    Totals plus issued-per-day for the last `days` days, read from the rollup
+    (cost depends on the number of days, not certificates). Falls back to a
+    single grouped query over certificates while the rollup is empty.
+    """
+    today = localdate()
+    first_day = today - timedelta(days=days - 1)
+
+    totals = DailyCertificateStats.objects.aggregate(issued=Sum("issued"), revoked=Sum("revoked"))
+    if totals["issued"] is not None:
+        per_day = dict(
+            DailyCertificateStats.objects.filter(day__gte=first_day).values_list("day", "issued")
+        )
+    else:
+        rows = _aggregate_by_day()
+        totals = {
+            "issued": sum(row["issued"] for row in rows),
+            "revoked": sum(row["revoked"] for row in rows),
+        }
+        per_day = {row["day"]: row["issued"] for row in rows if row["day"] >= first_day}
+
+    day_list = [first_day + timedelta(days=i) for i in range(days)]
+    return {
+        "total_certificates": totals["issued"],
+        "active_certificates": totals["issued"] - totals["revoked"],
+        "revoked_certificates": totals["revoked"],
+        "issued_labels": [day.strftime("%b %d") for day in day_list],
+        "issued_data": [per_day.get(day, 0) for day in day_list],
+    }
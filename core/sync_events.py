@@ -1,25 +1,37 @@
 # core/sync_events.py
 
-from django.utils.timezone import make_aware
-from datetime import datetime
-from core.models import Certificate, BlockchainSyncStatus, Student
-from core.utils.blockchain import get_contract
-from web3 import Web3
+from django.db import transaction
+from django.db.models import Case, When, Value, IntegerField, DateTimeField, F, Q
+from django.utils.timezone import make_aware, now
+from datetime import datetime, timedelta
+from core.models import Certificate, BlockchainSyncStatus, Student, SyncedBlock, RevokedCertificate
+from core.utils.blockchain import get_contract, CONTRACT_DEPLOYMENT_BLOCK
+from core.utils.backfill import iter_event_chunks, SYNC_CHUNK_SIZE, SYNC_MAX_WORKERS
+from core.utils.verification_cache import invalidate_verification
+from core.stats import bump_daily_stats
+from core.fields import HashField, normalize_hash
 import uuid
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def sync_blockchain_events():
+def sync_blockchain_events(chunk_size=SYNC_CHUNK_SIZE, max_workers=SYNC_MAX_WORKERS, to_block=None):
     """
     Incrementally sync issued and revoked certificates from blockchain.
     Safe version: handles connection errors and avoids crashing the dashboard.
+
+    The block range is fetched in adaptive chunks by a bounded thread pool
+    (see core.utils.backfill) and the checkpoint is saved after every chunk,
+    so an interrupted backfill resumes from the last committed chunk.
+    Pass `to_block` to stop short of the chain head (confirmation depth).
     """
 
     try:
         # ✅ Get Web3 instance and Contract
-        web3, contract = get_contract()
+        contract = get_contract()
+        web3 = contract.w3
     except Exception as e:
         logger.error(f"[Blockchain Sync] Unable to connect to blockchain: {e}")
         return None
@@ -28,7 +40,7 @@ def sync_blockchain_events():
     sync_status, _ = BlockchainSyncStatus.objects.get_or_create(id=1)
     last_synced_block = sync_status.last_synced_block or 0
     try:
-        latest_block = web3.eth.block_number
+        latest_block = web3.eth.block_number if to_block is None else to_block
     except Exception as e:
         logger.error(f"[Blockchain Sync] Failed to fetch latest block: {e}")
         return last_synced_block
@@ -37,80 +49,296 @@ def sync_blockchain_events():
     if latest_block <= last_synced_block:
         return latest_block
 
+    # Nothing to scan before the contract existed
+    from_block = max(last_synced_block + 1, CONTRACT_DEPLOYMENT_BLOCK)
+
     # -------------------------------
-    # Fetch new Issued & Revoked events
+    # Fetch & process Issued / Revoked events chunk by chunk
     # -------------------------------
+    started = time.time()
+    total_events = 0
     try:
-        issued_events = contract.events.Issued.create_filter(
-            fromBlock=last_synced_block + 1, toBlock=latest_block
-        ).get_all_entries()
+        for chunk_start, chunk_end, logs in iter_event_chunks(
+            [contract.events.Issued, contract.events.Revoked],
+            from_block, latest_block,
+            chunk_size=chunk_size, max_workers=max_workers
+        ):
+            chunk_started = time.time()
+            # Events and checkpoint are committed together, or not at all
+            with transaction.atomic():
+                sync_status = _lock_checkpoint()
+                created = _process_issued_events(logs["Issued"])
+                revoked_hashes = _process_revoked_events(logs["Revoked"])
+                sync_status.last_synced_block = max(sync_status.last_synced_block, chunk_end)
+                sync_status.save()
+            invalidate_verification(*revoked_hashes)
 
-        revoked_events = contract.events.Revoked.create_filter(
-            fromBlock=last_synced_block + 1, toBlock=latest_block
-        ).get_all_entries()
+            events = len(logs["Issued"]) + len(logs["Revoked"])
+            total_events += events
+            elapsed = time.time() - chunk_started
+            logger.info(
+                f"[Blockchain Sync] Synced blocks {chunk_start} to {chunk_end}: "
+                f"{created} new, {len(revoked_hashes)} revoked, "
+                f"{events / elapsed if elapsed else 0:.0f} events/s"
+            )
     except Exception as e:
         logger.error(f"[Blockchain Sync] Failed to fetch events: {e}")
-        return last_synced_block
+        return sync_status.last_synced_block
 
-    # -------------------------------
-    # Process Issued Certificates
-    # -------------------------------
-    for event in issued_events:
+    elapsed = time.time() - started
+    logger.info(
+        f"[Blockchain Sync] {total_events} events in {elapsed:.1f}s "
+        f"({total_events / elapsed if elapsed else 0:.0f} events/s)"
+    )
+    logger.info(f"[Blockchain Sync] Synced blocks {last_synced_block+1} to {latest_block}")
+    return latest_block
+
+
+def _lock_checkpoint():
+    """
+    Lock the checkpoint row for the rest of the transaction and return it.
+
+    A concurrent sync (follow_chain and a manual sync) then waits for this
+    chunk to commit and sees the events it wrote, instead of inserting or
+    counting them twice. select_for_update() is a no-op on SQLite, so the
+    lock is taken with a write: the UPDATE locks the row on PostgreSQL and,
+    on SQLite, starts the write transaction before anything is read.
+    """
+    BlockchainSyncStatus.objects.filter(id=1).update(last_synced_block=F("last_synced_block"))
+    return BlockchainSyncStatus.objects.get(id=1)
+
+
+def rescan_issued_events(chunk_size=SYNC_CHUNK_SIZE, max_workers=SYNC_MAX_WORKERS):
+    """
+    Re-read Issued events from the deployment block up to the sync checkpoint
+    and record their block on issuer-saved rows that have none. Rows saved
+    before the sync started filling in issued_block (an upgraded deployment)
+    are otherwise never confirmed, since the checkpoint is already past their
+    events. The checkpoint doesn't move. Returns how many rows were confirmed.
+    """
+    unconfirmed = Certificate.objects.filter(issued_block__isnull=True, batch__isnull=True).exclude(pdf_file="")
+    before = unconfirmed.count()
+    checkpoint = BlockchainSyncStatus.objects.filter(id=1).values_list("last_synced_block", flat=True).first()
+    if not before or not checkpoint:
+        return 0
+
+    contract = get_contract()
+    for chunk_start, chunk_end, logs in iter_event_chunks(
+        [contract.events.Issued], CONTRACT_DEPLOYMENT_BLOCK, checkpoint,
+        chunk_size=chunk_size, max_workers=max_workers
+    ):
+        with transaction.atomic():
+            _lock_checkpoint()
+            _process_issued_events(logs["Issued"])
+        logger.info(f"[Blockchain Sync] Rescanned blocks {chunk_start} to {chunk_end}")
+    confirmed = before - unconfirmed.count()
+    logger.info(f"[Blockchain Sync] Rescan confirmed {confirmed} of {before} unconfirmed certificates")
+    return confirmed
+
+
+# DB round trips per statement stay well under SQLite's bound-parameter limit
+DB_BATCH_SIZE = 500
+
+
+def _placeholder_student():
+    """Student used for certificates only known from chain events."""
+    student, _ = Student.objects.get_or_create(
+        roll_no="Unknown",
+        defaults={
+            "name": "Unknown",
+            "email": f"unknown_{uuid.uuid4()}@example.com"
+        }
+    )
+    return student
+
+
+def _existing_hashes(hashes, **filters):
+    existing = set()
+    for i in range(0, len(hashes), DB_BATCH_SIZE):
+        existing.update(Certificate.objects.filter(
+            blockchain_hash__in=hashes[i:i + DB_BATCH_SIZE], **filters
+        ).values_list("blockchain_hash", flat=True))
+    return existing
+
+
+# -------------------------------
+# Process Issued Certificates
+# -------------------------------
+def _process_issued_events(issued_events):
+    """
+    Insert certificates for Issued events not yet in the DB, and record the
+    block and transaction on rows the issuer saved itself. Returns how many
+    were new.
+    """
+    if not issued_events:
+        return 0
+
+    hashes = [normalize_hash(event["args"]["hash"]) for event in issued_events]
+    existing = _existing_hashes(hashes)
+
+    new_certificates = {}
+    issued_times = {}
+    student = None
+    for cert_hash, event in zip(hashes, issued_events):
+        if cert_hash in existing or cert_hash in new_certificates:
+            continue
         try:
-            cert_hash = event["args"]["hash"].hex()
-            ipfs_cid = event["args"]["cid"]
-            block_number = event["blockNumber"]
+            student = student or _placeholder_student()
             issued_at = make_aware(datetime.fromtimestamp(event["args"]["issuedAt"]))
-            tx_hash = event["transactionHash"].hex()
-
-            # Create placeholder student if unknown
-            student, _ = Student.objects.get_or_create(
-                roll_no="Unknown",
-                defaults={
-                    "name": "Unknown",
-                    "email": f"unknown_{uuid.uuid4()}@example.com"
-                }
-            )
-
-            Certificate.objects.get_or_create(
+            new_certificates[cert_hash] = Certificate(
+                student=student,
+                course_name="Unknown",
+                pdf_file="",
+                qr_code="",
                 blockchain_hash=cert_hash,
-                defaults={
-                    "student": student,
-                    "course_name": "Unknown",
-                    "pdf_file": "",
-                    "qr_code": "",
-                    "ipfs_cid": ipfs_cid,
-                    "transaction_hash": tx_hash,
-                    "issued_block": block_number,
-                    "issued_at": issued_at,
-                    "revoked": False
-                }
+                ipfs_cid=event["args"]["cid"],
+                transaction_hash=normalize_hash(event["transactionHash"]),
+                issued_block=event["blockNumber"],
+                revoked=False
             )
+            issued_times[cert_hash] = issued_at
         except Exception as e:
             logger.warning(f"[Blockchain Sync] Failed to process issued event: {e}")
-            continue
 
-    # -------------------------------
-    # Process Revoked Certificates
-    # -------------------------------
-    for event in revoked_events:
-        try:
-            cert_hash = event["args"]["hash"].hex()
-            block_number = event["blockNumber"]
+    Certificate.objects.bulk_create(new_certificates.values(), batch_size=DB_BATCH_SIZE, ignore_conflicts=True)
+    # A row skipped as a conflict was saved meanwhile by the issuer, which counted it. Its row
+    # has a PDF; ours don't. (Concurrent syncs are serialized by _lock_checkpoint().)
+    inserted = _existing_hashes(list(new_certificates), student=student, pdf_file="") if new_certificates else set()
+    issued_times = {h: issued_at for h, issued_at in issued_times.items() if h in inserted}
+    bump_daily_stats(issued=issued_times.values())
+
+    # issued_at is auto_now_add, so the insert stamped "now"; restore the on-chain time
+    items = list(issued_times.items())
+    for i in range(0, len(items), DB_BATCH_SIZE):
+        batch = items[i:i + DB_BATCH_SIZE]
+        Certificate.objects.filter(blockchain_hash__in=[h for h, _ in batch]).update(
+            issued_at=Case(
+                *[When(blockchain_hash=h, then=Value(issued_at)) for h, issued_at in batch],
+                output_field=DateTimeField()
+            )
+        )
 
-            Certificate.objects.filter(blockchain_hash=cert_hash).update(
-                revoked=True,
-                revoked_block=block_number
+    # Rows saved by the issuer (before this sync or during it): confirmed in this event's block
+    confirmed = {
+        cert_hash: event for cert_hash, event in zip(hashes, issued_events) if cert_hash not in inserted
+    }
+    items = list(confirmed.items())
+    for i in range(0, len(items), DB_BATCH_SIZE):
+        batch = items[i:i + DB_BATCH_SIZE]
+        Certificate.objects.filter(blockchain_hash__in=[h for h, _ in batch], issued_block__isnull=True).update(
+            issued_block=Case(
+                *[When(blockchain_hash=h, then=Value(event["blockNumber"])) for h, event in batch],
+                output_field=IntegerField()
+            ),
+            transaction_hash=Case(
+                *[When(blockchain_hash=h, then=Value(normalize_hash(event["transactionHash"]),
+                                                     output_field=HashField()))
+                  for h, event in batch],
+                output_field=HashField()
             )
+        )
+    return len(inserted)
+
+
+# -------------------------------
+# Process Revoked Certificates
+# -------------------------------
+def _process_revoked_events(revoked_events):
+    """Mark certificates revoked with one grouped UPDATE per batch. Returns the revoked hashes."""
+    revoked_blocks = {}
+    for event in revoked_events:
+        try:
+            revoked_blocks[normalize_hash(event["args"]["hash"])] = event["blockNumber"]
         except Exception as e:
             logger.warning(f"[Blockchain Sync] Failed to process revoked event: {e}")
-            continue
 
-    # -------------------------------
-    # Update sync status
-    # -------------------------------
-    sync_status.last_synced_block = latest_block
-    sync_status.save()
+    items = list(revoked_blocks.items())
+    for i in range(0, len(items), DB_BATCH_SIZE):
+        batch = items[i:i + DB_BATCH_SIZE]
+        newly_revoked = Certificate.objects.filter(
+            blockchain_hash__in=[h for h, _ in batch], revoked=False
+        ).values_list("issued_at", flat=True)
+        bump_daily_stats(revoked=list(newly_revoked))
+        Certificate.objects.filter(blockchain_hash__in=[h for h, _ in batch]).update(
+            revoked=True,
+            revoked_block=Case(
+                *[When(blockchain_hash=h, then=Value(block)) for h, block in batch],
+                output_field=IntegerField()
+            )
+        )
+    return list(revoked_blocks)
 
-    logger.info(f"[Blockchain Sync] Synced blocks {last_synced_block+1} to {latest_block}")
-    return latest_block
+
+# -------------------------------
+# Reorg Handling (used by follow_chain)
+# -------------------------------
+def record_block_hashes(web3, up_to_block, window):
+    """Remember the hashes of the last `window` synced blocks; prune older ones."""
+    first = max(up_to_block - window + 1, CONTRACT_DEPLOYMENT_BLOCK)
+    known = set(SyncedBlock.objects.filter(number__gte=first).values_list("number", flat=True))
+    SyncedBlock.objects.bulk_create([
+        SyncedBlock(number=n, block_hash=web3.eth.get_block(n)["hash"].hex())
+        for n in range(first, up_to_block + 1) if n not in known
+    ], ignore_conflicts=True)
+    SyncedBlock.objects.filter(number__lt=first).delete()
+
+
+def find_reorg_ancestor(web3):
+    """
+    Compare stored block hashes with the chain, newest first.
+    Returns None if the newest stored block is still canonical, otherwise the
+    highest block number both agree on (the common ancestor).
+    """
+    stored = list(SyncedBlock.objects.order_by("-number"))
+    for index, block in enumerate(stored):
+        if web3.eth.get_block(block.number)["hash"].hex() == block.block_hash:
+            return None if index == 0 else block.number
+
+    if stored:
+        logger.error(f"[Blockchain Sync] Reorg deeper than the {len(stored)} tracked blocks")
+        return stored[-1].number - 1
+    return None
+
+
+def rollback_to_block(block_number):
+    """Undo everything synced after `block_number` so it is re-synced from the new canonical chain."""
+    with transaction.atomic():
+        orphaned = Certificate.objects.filter(issued_block__gt=block_number)
+        # Rows the issuer saved (they have a PDF) stay; they are unconfirmed again until re-synced
+        unconfirmed = orphaned.exclude(pdf_file="")
+        orphaned = orphaned.filter(pdf_file="")
+        unrevoked = Certificate.objects.filter(revoked_block__gt=block_number)
+        affected = list(orphaned.values_list("blockchain_hash", flat=True))
+        affected += list(unconfirmed.values_list("blockchain_hash", flat=True))
+        affected += list(unrevoked.values_list("blockchain_hash", flat=True))
+
+        # Take the removed certificates and reverted revocations back out of the dashboard rollup
+        bump_daily_stats(
+            issued=orphaned.values_list("issued_at", flat=True),
+            revoked=Certificate.objects.filter(
+                Q(issued_block__gt=block_number, pdf_file="", revoked=True) | Q(revoked_block__gt=block_number)
+            ).values_list("issued_at", flat=True),
+            sign=-1
+        )
+
+        RevokedCertificate.objects.filter(certificate__revoked_block__gt=block_number).delete()
+        unrevoked.update(revoked=False, revoked_block=None)
+        unconfirmed.update(issued_block=None)
+        deleted, _ = orphaned.delete()
+        SyncedBlock.objects.filter(number__gt=block_number).delete()
+        BlockchainSyncStatus.objects.filter(id=1).update(last_synced_block=block_number)
+
+    invalidate_verification(*affected)
+    logger.warning(
+        f"[Blockchain Sync] Rolled back to block {block_number}: "
+        f"{len(affected)} certificates affected ({deleted} rows removed)"
+    )
+
+
+def fresh_checkpoint(max_lag_seconds):
+    """The last synced block if follow_chain has checkpointed within `max_lag_seconds`, else None."""
+    if not max_lag_seconds:
+        return None
+    return BlockchainSyncStatus.objects.filter(
+        id=1, updated_at__gte=now() - timedelta(seconds=max_lag_seconds)
+    ).values_list("last_synced_block", flat=True).first()
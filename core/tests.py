@@ -1,3 +1,1123 @@
-from django.test import TestCase
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import Future
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.models import Certificate, OutboundEmail
+
+from core.utils.pipeline import Pipeline, Stage, StageFailure
+
+
+def write_csv(text):
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, "w", newline="") as f:
+        f.write(text)
+    return path
+
+
+# ----------------------------
+# Bulk CSV issuance
+# ----------------------------
+class LoadCsvValidationTests(SimpleTestCase):
+    def test_missing_column_fails_before_issuing(self):
+        path = write_csv("name,roll_no,course_name\nAsha,R1,Physics\n")
+        self.addCleanup(os.remove, path)
+        with self.assertRaisesMessage(CommandError, "missing required columns: email"):
+            call_command("load_csv", path, checkpoint=f"{path}.progress")
+        self.assertFalse(os.path.exists(f"{path}.progress"))
+
+    def test_short_row_is_a_row_failure(self):
+        from core.management.commands.load_csv import iter_csv_rows
+
+        path = write_csv(
+            "name,email,roll_no,course_name\n"
+            "Asha,asha@example.com,R1,Physics\n"
+            "Ravi,ravi@example.com\n"
+            "Meena,meena@example.com,R3,Maths\n"
+        )
+        self.addCleanup(os.remove, path)
+        rows = list(iter_csv_rows(path))
+        self.assertEqual([r["row"] for r in rows if not isinstance(r, StageFailure)], [1, 3])
+        failure = rows[1]
+        self.assertIsInstance(failure, StageFailure)
+        self.assertEqual(failure.item["row"], 2)
+        self.assertEqual(failure.error, "missing roll_no, course_name")
+
+
+class LoadCsvResumeTests(TestCase):
+    def test_resume_reuses_recorded_hashes_and_transactions(self):
+        from datetime import date
+        from web3.exceptions import ContractLogicError
+
+        path = write_csv(
+            "name,email,roll_no,course_name\n"
+            "Asha,asha@example.com,R1,Physics\n"
+            "Ravi,ravi@example.com,R2,Physics\n"
+            "Meena,meena@example.com,R3,Maths\n"
+            "Kiran,kiran@example.com,R4,Maths\n"
+        )
+        fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        self.addCleanup(os.remove, pdf_path)
+        self.addCleanup(os.remove, f"{path}.progress")
+        # Row 1 was anchored and recorded; row 2 got its hash, then the run stopped around the send;
+        # row 4 recorded a transaction that was dropped, and its PDF is gone
+        with open(f"{path}.progress", "w") as f:
+            f.write(json.dumps({"row": 1, "cert_hash": "aa" * 32}) + "\n")
+            f.write(json.dumps({"row": 2, "cert_hash": "bb" * 32}) + "\n")
+            f.write(json.dumps({"row": 1, "cert_hash": "aa" * 32, "ipfs_cid": "QmOne",
+                                "pdf_path": pdf_path, "tx_hash": "0x" + "a1" * 32}) + "\n")
+            f.write(json.dumps({"row": 4, "cert_hash": "dd" * 32, "issued_on": "2025-01-01"}) + "\n")
+            f.write(json.dumps({"row": 4, "cert_hash": "dd" * 32, "ipfs_cid": "QmFour",
+                                "pdf_path": pdf_path + ".gone", "tx_hash": "0x" + "d1" * 32}) + "\n")
+
+        def on_chain(cert_hash):
+            anchored = {"aa" * 32: "QmOne", "bb" * 32: "QmTwo"}
+            if cert_hash.hex() in anchored:
+                return anchored[cert_hash.hex()], 1700000000, False
+            raise ContractLogicError("execution reverted: Certificate not found")
+
+        def send(cert_hash, cid):
+            # Broadcast, then mined as a gas-bumped replacement
+            mined = Future()
+            mined.set_result(("0x" + cert_hash[::-1], None))
+            return "0x" + "c3" * 32, mined
+
+        command = "core.management.commands.load_csv"
+        with mock.patch(f"{command}.render_certificate", return_value=pdf_path) as render, \
+                mock.patch(f"{command}.upload_certificate", return_value="QmThree") as upload, \
+                mock.patch("core.issuance.get_certificate_from_chain", side_effect=on_chain), \
+                mock.patch(f"{command}.send_certificate_anchor", side_effect=send) as anchor:
+            call_command("load_csv", path, render_workers=1, stdout=open(os.devnull, "w"))
+
+        self.assertEqual(render.call_count, 3)
+        self.assertIn(mock.call("Kiran", "Maths", "dd" * 32, "", date(2025, 1, 1)), render.call_args_list)
+        self.assertEqual(upload.call_count, 2)
+        sent = sorted(call.args for call in anchor.call_args_list)
+        new_hash = next(cert_hash for cert_hash, _ in sent if cert_hash != "dd" * 32)
+        self.assertEqual(sent, sorted([(new_hash, "QmThree"), ("dd" * 32, "QmFour")]))
+        self.assertNotIn(new_hash, ("aa" * 32, "bb" * 32))
+        saved = dict(Certificate.objects.values_list("blockchain_hash", "ipfs_cid"))
+        self.assertEqual(saved, {"aa" * 32: "QmOne", "bb" * 32: "QmTwo", new_hash: "QmThree", "dd" * 32: "QmFour"})
+        self.assertEqual(Certificate.objects.get(blockchain_hash="aa" * 32).transaction_hash, "a1" * 32)
+        self.assertEqual(Certificate.objects.get(blockchain_hash=new_hash).transaction_hash, new_hash[::-1])
+        self.assertEqual(Certificate.objects.get(blockchain_hash="dd" * 32).transaction_hash, "dd" * 32)
+        self.assertEqual(
+            sorted(OutboundEmail.objects.values_list("to_email", flat=True)),
+            ["asha@example.com", "kiran@example.com", "meena@example.com", "ravi@example.com"]
+        )
+
+    def run_batched(self, path, pdf_path, on_chain=(0, 0), send=None):
+        command = "core.management.commands.load_csv"
+        with mock.patch(f"{command}.render_certificate", return_value=pdf_path), \
+                mock.patch(f"{command}.upload_certificate", side_effect=lambda p: "Qm" + os.urandom(4).hex()), \
+                mock.patch("core.issuance.get_batch_from_chain", return_value=on_chain), \
+                mock.patch("core.issuance.issue_batch_on_chain", side_effect=send) as issue:
+            call_command("load_csv", path, render_workers=1, merkle_batch=3,
+                         stdout=open(os.devnull, "w"), stderr=open(os.devnull, "w"))
+        return issue
+
+    def batch_csv(self):
+        path = write_csv(
+            "name,email,roll_no,course_name\n"
+            "Asha,asha@example.com,R1,Physics\n"
+            "Ravi,ravi@example.com,R2,Physics\n"
+            "Meena,meena@example.com,R3,Maths\n"
+        )
+        fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        self.addCleanup(os.remove, pdf_path)
+        self.addCleanup(os.remove, f"{path}.progress")
+        return path, pdf_path
+
+    def test_resumed_batch_found_on_chain_is_not_sent_again(self):
+        from core.models import CertificateBatch
+
+        path, pdf_path = self.batch_csv()
+        # Sent, then the run died before the receipt came back
+        issue = self.run_batched(path, pdf_path, send=ConnectionError("receipt timed out"))
+        issue.assert_called_once()
+        root = issue.call_args.args[0].hex()
+        self.assertFalse(Certificate.objects.exists())
+
+        issue = self.run_batched(path, pdf_path, on_chain=(1700000000, 3))
+        issue.assert_not_called()
+        batch = CertificateBatch.objects.get()
+        self.assertEqual(batch.merkle_root, root)
+        self.assertEqual(batch.certificates.count(), 3)
+        self.assertEqual(OutboundEmail.objects.count(), 3)
+
+    def test_row_whose_student_cant_be_saved_is_left_out_before_sending(self):
+        from core.models import Student
+
+        path, pdf_path = self.batch_csv()
+        Student.objects.create(name="Someone", email="someone@example.com", roll_no="R2")
+        issue = self.run_batched(path, pdf_path, send=lambda root, size: "0x" + "e5" * 32)
+        self.assertEqual(issue.call_args.args[1], 2)
+        self.assertEqual(
+            sorted(Certificate.objects.values_list("student__email", flat=True)),
+            ["asha@example.com", "meena@example.com"]
+        )
+
+
+class PipelineTests(SimpleTestCase):
+    def test_feed_error_is_raised_after_fed_items_finish(self):
+        def items():
+            yield 1
+            yield 2
+            raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+        pipeline = Pipeline([Stage("double", lambda x: x * 2, workers=2)])
+        results = []
+        with self.assertRaises(UnicodeDecodeError):
+            for result in pipeline.run(items()):
+                results.append(result)
+        self.assertEqual(sorted(results), [2, 4])
+
+
+# ----------------------------
+# Issuance jobs
+# ----------------------------
+class IssuanceJobTests(TestCase):
+    def test_retry_after_the_anchor_was_mined_does_not_send_again(self):
+        from web3.exceptions import ContractLogicError
+        from core.issuance import claim_next_job, enqueue_issuance_job, run_issuance_job
+        from core.models import IssuanceJob
+
+        fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        self.addCleanup(os.remove, pdf_path)
+        rendered = Future()
+        rendered.set_result(pdf_path)
+        enqueue_issuance_job("Asha", "asha@example.com", "R1", "Physics")
+
+        def on_chain(cert_hash):
+            if not anchor.called:
+                raise ContractLogicError("execution reverted: Certificate not found")
+            return "QmJob", 1700000000, False
+
+        # The first attempt's transaction is mined after it stops waiting for the receipt
+        with mock.patch("core.issuance.get_render_service") as service, \
+                mock.patch("core.issuance.upload_certificate", return_value="QmJob"), \
+                mock.patch("core.issuance.get_certificate_from_chain", side_effect=on_chain), \
+                mock.patch("core.issuance.anchor_certificate", side_effect=TimeoutError("no receipt")) as anchor:
+            service.return_value.submit.return_value = rendered
+            with self.assertLogs("core.issuance", "WARNING"):
+                job = run_issuance_job(claim_next_job())
+            self.assertEqual((job.status, job.stage), (IssuanceJob.QUEUED, "chain"))
+            job = run_issuance_job(claim_next_job())
+
+        anchor.assert_called_once()
+        self.assertEqual(job.status, IssuanceJob.SUCCEEDED)
+        self.assertEqual(job.certificate.ipfs_cid, "QmJob")
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+
+
+# ----------------------------
+# IPFS
+# ----------------------------
+class ComputeCidTests(SimpleTestCase):
+    def test_known_vectors(self):
+        from core.utils.cid import compute_cid
+
+        # As printed by `ipfs add` (and `ipfs add --cid-version=1`) for the same bytes
+        self.assertEqual(compute_cid(b""), "QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH")
+        self.assertEqual(compute_cid(b"hello world\n"), "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o")
+        self.assertEqual(compute_cid(b"", version=1), "bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku")
+        self.assertEqual(compute_cid(b"hello world", version=1),
+                         "bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e")
+
+    def test_multi_chunk_input_fed_in_any_pieces(self):
+        from core.utils.cid import CHUNK_SIZE, compute_cid
+
+        data = bytes(range(256)) * (CHUNK_SIZE * 3 // 256) + b"tail"
+        for version in (0, 1):
+            whole = compute_cid(data, version)
+            self.assertEqual(compute_cid((data[i:i + 100_000] for i in range(0, len(data), 100_000)), version), whole)
+            self.assertNotEqual(whole, compute_cid(data[:-1] + b"!", version))
+        # Several chunks: the root is a dag-pb node over raw leaves, not a raw block
+        self.assertTrue(compute_cid(data, 1).startswith("bafybei"))
+
+
+class UploadCertificateTests(TestCase):
+    def setUp(self):
+        fd, self.pdf_path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"%PDF-1.4 certificate")
+        self.addCleanup(os.remove, self.pdf_path)
+
+    def test_file_already_pinned_is_not_uploaded_again(self):
+        from core.issuance import upload_certificate
+        from core.models import PinnedFile
+        from core.utils.cid import compute_cid
+        from core.utils.pinata import PINATA_CID_VERSION
+
+        cid = compute_cid(b"%PDF-1.4 certificate", PINATA_CID_VERSION)
+        PinnedFile.objects.create(cid=cid, pinata_cid=cid, size=20, status=PinnedFile.PINNED)
+        with mock.patch("core.issuance.upload_to_pinata") as upload, self.assertLogs("core.issuance", "INFO"):
+            self.assertEqual(upload_certificate(self.pdf_path), cid)
+        upload.assert_not_called()
+
+    def test_cid_mismatch_is_recorded(self):
+        from core.issuance import upload_certificate
+        from core.models import PinnedFile
+
+        with mock.patch("core.issuance.upload_to_pinata", return_value="QmOther") as upload, \
+                self.assertLogs("core.issuance", "WARNING"):
+            self.assertEqual(upload_certificate(self.pdf_path), "QmOther")
+            # A mismatched pin doesn't count as pinned: the next run uploads again
+            upload_certificate(self.pdf_path)
+        self.assertEqual(upload.call_count, 2)
+        pinned = PinnedFile.objects.get()
+        self.assertEqual((pinned.status, pinned.pinata_cid, pinned.size), (PinnedFile.MISMATCH, "QmOther", 20))
+
+
+# ----------------------------
+# Email outbox
+# ----------------------------
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class OutboxTests(TestCase):
+    def queue(self, count):
+        from core.outbox import queue_certificate_email
+
+        return [
+            queue_certificate_email(f"student{i}@example.com", f"Student {i}", __file__, qr_png=b"png")
+            for i in range(count)
+        ]
+
+    def test_drain_sends_every_message_over_one_connection(self):
+        from django.core import mail
+        from django.core.mail import get_connection
+        from core.outbox import drain_outbox
+
+        self.queue(5)
+        with mock.patch("core.outbox.get_connection", wraps=get_connection) as connect:
+            self.assertEqual(drain_outbox(batch_size=2), (5, 0))
+        connect.assert_called_once()
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].attachments[1][0], "certificate_qr.png")
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.SENT).exists())
+        self.assertEqual(drain_outbox(), (0, 0))
+
+    def test_rate_limiter_spaces_sends(self):
+        from core.outbox import RateLimiter
+
+        clock = [100.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        limiter = RateLimiter(per_minute=120)
+        with mock.patch("core.outbox.time.monotonic", side_effect=lambda: clock[0]), \
+                mock.patch("core.outbox.time.sleep", side_effect=sleep):
+            for _ in range(3):
+                limiter.wait()
+            clock[0] += 5       # idle for a while: the next send goes straight out
+            limiter.wait()
+        self.assertEqual(sleeps, [0.5, 0.5])
+
+    def test_soft_failures_are_retried_and_hard_failures_are_not(self):
+        import smtplib
+        from django.utils.timezone import now
+        from core.outbox import claim_due_emails, send_batch
+
+        self.queue(3)
+        connection = mock.Mock()
+        connection.send_messages.side_effect = [
+            smtplib.SMTPResponseException(421, b"Try again later"),
+            smtplib.SMTPRecipientsRefused({"student1@example.com": (550, b"No such user")}),
+            1,
+        ]
+        with self.assertLogs("core.outbox", "WARNING"):
+            self.assertEqual(send_batch(connection, claim_due_emails(10), max_attempts=5), (1, 2))
+
+        soft, hard, sent = OutboundEmail.objects.order_by("pk")
+        self.assertEqual((soft.status, soft.attempts), (OutboundEmail.PENDING, 1))
+        self.assertGreater(soft.next_attempt_at, now())
+        self.assertIn("Try again later", soft.last_error)
+        self.assertEqual((hard.status, hard.attempts), (OutboundEmail.FAILED, 1))
+        self.assertEqual(sent.status, OutboundEmail.SENT)
+        # Not due yet
+        self.assertEqual(claim_due_emails(10), [])
+        connection.close.assert_not_called()
+
+
+# ----------------------------
+# Verification cache
+# ----------------------------
+def use_scratch_verification_cache(test):
+    """Point the verification cache at a fresh directory for the duration of `test`; returns it."""
+    location = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, location, ignore_errors=True)
+    caches_setting = {**settings.CACHES, "verification": {**settings.CACHES["verification"], "LOCATION": location}}
+    override = override_settings(CACHES=caches_setting)
+    override.enable()
+    test.addCleanup(override.disable)
+    return location
+
+
+class VerificationCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.location = use_scratch_verification_cache(self)
+
+    def test_invalidation_from_another_process_reaches_this_one(self):
+        from core.utils.verification_cache import cache_verification, get_cached_verification
+
+        cert_hash = "ab" * 32
+        cache_verification(cert_hash, {"revoked": False})
+        # e.g. follow_chain or another gunicorn worker handling the revoke
+        subprocess.run([
+            sys.executable, "-c",
+            "import django; django.setup(); "
+            "from core.utils.verification_cache import invalidate_verification; "
+            f"invalidate_verification({cert_hash!r})",
+        ], check=True, cwd=settings.BASE_DIR, env={
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "blockcreds.settings",
+            "VERIFICATION_CACHE_LOCATION": self.location,
+        })
+        self.assertIsNone(get_cached_verification(cert_hash))
+
+    def test_stats_count_hits_and_misses(self):
+        from core.utils.verification_cache import cache_stats, cache_verification, get_cached_verification
+
+        before = cache_stats()
+        get_cached_verification("cd" * 32)
+        cache_verification("cd" * 32, {"revoked": False})
+        get_cached_verification("cd" * 32)
+        get_cached_verification("cd" * 32)
+        after = cache_stats()
+        self.assertEqual(after["hits"] - before["hits"], 2)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+
+
+# ----------------------------
+# Chain event sync
+# ----------------------------
+def issued_event(cert_hash, block, tx_hash, cid="QmChain", issued_at=1700000000):
+    return {
+        "args": {"hash": bytes.fromhex(cert_hash), "cid": cid, "issuedAt": issued_at},
+        "transactionHash": bytes.fromhex(tx_hash),
+        "blockNumber": block,
+    }
+
+
+class SyncEventsTests(TestCase):
+    def test_rows_saved_concurrently_are_not_counted_twice(self):
+        from core import sync_events
+        from core.issuance import save_certificate
+        from core.stats import dashboard_stats
+
+        real_bulk_create = Certificate.objects.bulk_create
+
+        def issuer_saves_first(objs, **kwargs):
+            # The issuer saves "aa" between the sync's existence check and its insert
+            save_certificate("Asha", "asha@example.com", "R1", "Physics", "aa" * 32,
+                             "/tmp/aa.pdf", "QmLocal", "a1" * 32)
+            return real_bulk_create(objs, **kwargs)
+
+        with mock.patch.object(Certificate.objects, "bulk_create", side_effect=issuer_saves_first):
+            created = sync_events._process_issued_events([
+                issued_event("aa" * 32, 10, "a1" * 32),
+                issued_event("bb" * 32, 11, "b1" * 32),
+            ])
+
+        self.assertEqual(created, 1)
+        self.assertEqual(Certificate.objects.count(), 2)
+        self.assertEqual(dashboard_stats()["total_certificates"], 2)
+        self.assertEqual(Certificate.objects.get(blockchain_hash="aa" * 32).course_name, "Physics")
+
+    def test_locally_issued_certificate_is_confirmed_and_exported(self):
+        from core import sync_events
+        from core.issuance import save_certificate
+        from core.models import BlockchainSyncStatus
+        from core.stats import dashboard_stats
+        from core.utils.offline_index import VALID, OfflineIndex
+
+        # Broadcast as a1, mined as its gas-bumped replacement a2
+        save_certificate("Asha", "asha@example.com", "R1", "Physics", "aa" * 32,
+                         "/tmp/aa.pdf", "QmLocal", "a1" * 32)
+        self.assertEqual(sync_events._process_issued_events([issued_event("aa" * 32, 10, "a2" * 32)]), 0)
+        cert = Certificate.objects.get(blockchain_hash="aa" * 32)
+        self.assertEqual((cert.issued_block, cert.transaction_hash, cert.ipfs_cid), (10, "a2" * 32, "QmLocal"))
+
+        BlockchainSyncStatus.objects.create(id=1, last_synced_block=12)
+        fd, path = tempfile.mkstemp(suffix=".idx")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command("export_offline_index", path, stdout=open(os.devnull, "w"))
+        with OfflineIndex(path) as index:
+            self.assertEqual(index.status("aa" * 32), VALID)
+
+        # A reorg unconfirms the row instead of deleting it
+        with self.assertLogs("core.sync_events", "WARNING"):
+            sync_events.rollback_to_block(9)
+        cert.refresh_from_db()
+        self.assertIsNone(cert.issued_block)
+        self.assertEqual(cert.course_name, "Physics")
+        self.assertEqual(dashboard_stats()["total_certificates"], 1)
+
+
+    def test_chunk_locks_the_checkpoint_before_reading(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core import sync_events
+        from core.models import BlockchainSyncStatus
+
+        BlockchainSyncStatus.objects.create(id=1, last_synced_block=sync_events.CONTRACT_DEPLOYMENT_BLOCK)
+        chunks = [(sync_events.CONTRACT_DEPLOYMENT_BLOCK + 1, sync_events.CONTRACT_DEPLOYMENT_BLOCK + 9,
+                   {"Issued": [issued_event("aa" * 32, sync_events.CONTRACT_DEPLOYMENT_BLOCK + 5, "a1" * 32)],
+                    "Revoked": []})]
+        with mock.patch.object(sync_events, "get_contract"), \
+                mock.patch.object(sync_events, "iter_event_chunks", return_value=chunks), \
+                CaptureQueriesContext(connection) as queries:
+            sync_events.sync_blockchain_events(to_block=sync_events.CONTRACT_DEPLOYMENT_BLOCK + 9)
+
+        statements = [query["sql"] for query in queries.captured_queries]
+        begin = next(i for i, sql in enumerate(statements) if sql.startswith("SAVEPOINT"))
+        # select_for_update() would be a no-op on SQLite; a write takes the lock there too
+        self.assertRegex(statements[begin + 1], r'^UPDATE "core_blockchainsyncstatus"')
+        self.assertEqual(BlockchainSyncStatus.objects.get(id=1).last_synced_block,
+                         sync_events.CONTRACT_DEPLOYMENT_BLOCK + 9)
+        self.assertTrue(Certificate.objects.filter(blockchain_hash="aa" * 32).exists())
+
+    def test_rescan_confirms_rows_saved_before_the_upgrade(self):
+        import io
+        from core import sync_events
+        from core.issuance import save_certificate
+        from core.models import BlockchainSyncStatus
+
+        # Saved and synced past before the sync recorded issued_block on issuer rows
+        save_certificate("Asha", "asha@example.com", "R1", "Physics", "aa" * 32,
+                         "/tmp/aa.pdf", "QmLocal", "a1" * 32)
+        BlockchainSyncStatus.objects.create(id=1, last_synced_block=200)
+        fd, path = tempfile.mkstemp(suffix=".idx")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        out = io.StringIO()
+        call_command("export_offline_index", path, stdout=out)
+        self.assertIn("Not exported: 1 certificates saved locally", out.getvalue())
+
+        chunks = [(1, 200, {"Issued": [issued_event("aa" * 32, 10, "a1" * 32)]})]
+        with mock.patch.object(sync_events, "get_contract"), \
+                mock.patch.object(sync_events, "iter_event_chunks", return_value=chunks) as scan:
+            self.assertEqual(sync_events.rescan_issued_events(), 1)
+        self.assertEqual(scan.call_args.args[1:], (sync_events.CONTRACT_DEPLOYMENT_BLOCK, 200))
+        self.assertEqual(Certificate.objects.get(blockchain_hash="aa" * 32).issued_block, 10)
+        self.assertEqual(BlockchainSyncStatus.objects.get(id=1).last_synced_block, 200)
+
+        out = io.StringIO()
+        call_command("export_offline_index", path, stdout=out)
+        self.assertIn("1 certificates", out.getvalue())
+        self.assertNotIn("Not exported", out.getvalue())
+
+
+class EventChunkTests(SimpleTestCase):
+    class FakeEvent:
+        event_name = "Issued"
+
+        def __init__(self, max_span, slow_blocks=()):
+            self.max_span = max_span
+            self.slow_blocks = slow_blocks
+            self.fetched = []
+
+        def get_logs(self, fromBlock, toBlock):
+            import time
+            if toBlock - fromBlock + 1 > self.max_span:
+                raise ValueError("query exceeds max block range 4")
+            if fromBlock in self.slow_blocks:
+                time.sleep(0.05)
+            self.fetched.append(fromBlock)
+            return [(fromBlock, toBlock)]
+
+    def test_rejected_ranges_are_split_and_cover_every_block(self):
+        from core.utils.backfill import iter_event_chunks
+
+        event = self.FakeEvent(max_span=4)
+        with self.assertLogs("core.utils.backfill", "INFO"):
+            chunks = list(iter_event_chunks([event], 1, 50, chunk_size=16, min_chunk_size=2, max_workers=2))
+
+        starts = [start for start, _, _ in chunks]
+        self.assertEqual(starts[0], 1)
+        self.assertEqual(chunks[-1][1], 50)
+        for (_, end, _), next_start in zip(chunks, starts[1:]):
+            self.assertEqual(next_start, end + 1)
+        for start, end, logs in chunks:
+            self.assertLessEqual(end - start + 1, 4)
+            self.assertEqual(logs, {"Issued": [(start, end)]})
+
+    def test_chunks_are_yielded_in_block_order(self):
+        from core.utils.backfill import iter_event_chunks
+
+        # The first range answers last; nothing after it may be handed out before it
+        event = self.FakeEvent(max_span=100, slow_blocks=(1,))
+        chunks = list(iter_event_chunks([event], 1, 40, chunk_size=10, min_chunk_size=2, max_workers=4))
+        self.assertNotEqual(event.fetched[0], 1)
+        self.assertEqual([(start, end) for start, end, _ in chunks], [(1, 10), (11, 20), (21, 30), (31, 40)])
+
+    def test_range_error_at_the_minimum_size_is_raised(self):
+        from core.utils.backfill import iter_event_chunks
+
+        event = self.FakeEvent(max_span=1)
+        with mock.patch("core.utils.backfill.SYNC_MAX_RETRIES", 0), self.assertLogs("core.utils.backfill", "INFO"), \
+                self.assertRaisesRegex(ValueError, "block range"):
+            list(iter_event_chunks([event], 1, 8, chunk_size=8, min_chunk_size=2, max_workers=1))
+
+
+class DailyStatsTests(TestCase):
+    def rollup(self):
+        from core.models import DailyCertificateStats
+        return list(DailyCertificateStats.objects.order_by("day").values_list("day", "issued", "revoked"))
+
+    def test_counters_follow_sync_and_rollback(self):
+        from django.utils.timezone import localdate
+        from core import sync_events
+        from core.stats import dashboard_stats
+        from core.models import BlockchainSyncStatus
+
+        day_one, day_two = 1700000000, 1700000000 + 2 * 86400
+        BlockchainSyncStatus.objects.create(id=1, last_synced_block=40)
+        sync_events._process_issued_events([
+            issued_event("aa" * 32, 10, "a1" * 32, issued_at=day_one),
+            issued_event("bb" * 32, 20, "b1" * 32, issued_at=day_one),
+            issued_event("cc" * 32, 30, "c1" * 32, issued_at=day_two),
+        ])
+        sync_events._process_revoked_events([
+            {"args": {"hash": bytes.fromhex("aa" * 32)}, "blockNumber": 25},
+            {"args": {"hash": bytes.fromhex("cc" * 32)}, "blockNumber": 35},
+        ])
+        first, second = (localdate(Certificate.objects.get(blockchain_hash=h).issued_at) for h in ("aa" * 32, "cc" * 32))
+        self.assertEqual(self.rollup(), [(first, 2, 1), (second, 1, 1)])
+
+        # Drops "cc" (issued and revoked after 22) and the revocation of "aa"
+        with self.assertLogs("core.sync_events", "WARNING"):
+            sync_events.rollback_to_block(22)
+        self.assertEqual(self.rollup(), [(first, 2, 0), (second, 0, 0)])
+        stats = dashboard_stats()
+        self.assertEqual((stats["total_certificates"], stats["revoked_certificates"]), (2, 0))
+
+        incremental = [row for row in self.rollup() if row[1] or row[2]]
+        call_command("rebuild_stats", stdout=open(os.devnull, "w"))
+        self.assertEqual(self.rollup(), incremental)
+
+
+# ----------------------------
+# Verification
+# ----------------------------
+class VerifyResultTests(TestCase):
+    def setUp(self):
+        from core.issuance import save_certificate
+        from core.models import BlockchainSyncStatus
+
+        use_scratch_verification_cache(self)
+        # follow_chain checkpointed just now, at block 100
+        BlockchainSyncStatus.objects.create(id=1, last_synced_block=100)
+        self.cert = save_certificate("Asha", "asha@example.com", "R1", "Physics", "aa" * 32,
+                                     "/tmp/aa.pdf", "QmLocal", "a1" * 32)
+
+    def verify(self):
+        return self.client.get(reverse("verify_result"), {"hash": "aa" * 32}).context["status"]
+
+    def test_row_not_confirmed_by_the_follower_is_checked_on_chain(self):
+        from web3.exceptions import ContractLogicError
+
+        # e.g. the issuance reverted, or the row was edited in admin
+        with mock.patch("core.views.get_certificate_from_chain",
+                        side_effect=ContractLogicError("execution reverted: Certificate not found")) as chain:
+            self.assertEqual(self.verify(), "tampered")
+        chain.assert_called_once()
+
+    def test_confirmed_row_is_served_from_the_database(self):
+        Certificate.objects.filter(pk=self.cert.pk).update(issued_block=90)
+        with mock.patch("core.views.get_certificate_from_chain") as chain:
+            self.assertEqual(self.verify(), "valid")
+        chain.assert_not_called()
+
+    def test_row_past_the_checkpoint_is_checked_on_chain(self):
+        Certificate.objects.filter(pk=self.cert.pk).update(issued_block=101)
+        with mock.patch("core.views.get_certificate_from_chain", return_value=("QmLocal", 1700000000, True)) as chain:
+            self.assertEqual(self.verify(), "revoked")
+        chain.assert_called_once()
+
+
+class VerifyBatchApiTests(TestCase):
+    def post(self, payload):
+        return self.client.post(reverse("verify_batch_api"), json.dumps(payload), content_type="application/json")
+
+    def test_more_than_500_hashes_are_refused(self):
+        from core.views import VERIFY_BATCH_MAX_HASHES
+
+        response = self.post({"hashes": ["%064x" % i for i in range(VERIFY_BATCH_MAX_HASHES + 1)]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "At most 500 hashes per request.")
+        self.assertEqual(self.post({"hashes": ["%064x" % i for i in range(VERIFY_BATCH_MAX_HASHES)]}).status_code, 200)
+
+    def test_mixed_results_keep_request_order(self):
+        from core.issuance import save_certificate
+
+        save_certificate("Asha", "asha@example.com", "R1", "Physics", "aa" * 32,
+                         "/tmp/aa.pdf", "QmLocal", "a1" * 32)
+        hashes = ["bb" * 32, "0x" + "AA" * 32, "not-a-hash", "bb" * 32]
+        with mock.patch("core.views.get_contract"), \
+                mock.patch("core.views.read_many", return_value=[None, ("QmLocal", 1700000000, False)]) as chain:
+            body = self.post({"hashes": hashes, "chain": True}).json()
+
+        self.assertEqual(body["count"], 3)
+        missing, found, invalid = body["results"]
+        self.assertEqual(missing, {"hash": "bb" * 32, "status": "error", "message": "Certificate not found.",
+                                   "onChain": {"found": False}})
+        self.assertEqual((found["hash"], found["status"], found["cid"], found["studentName"], found["courseName"]),
+                         ("0x" + "AA" * 32, "success", "QmLocal", "Asha", "Physics"))
+        self.assertEqual(found["onChain"], {"found": True, "cid": "QmLocal", "issuedAt": 1700000000, "revoked": False})
+        self.assertEqual(invalid["message"], "Invalid hash.")
+        # One bulk read for the two valid hashes
+        self.assertEqual(len(chain.call_args.args[0]), 2)
+
+
+class CertificateSearchTests(TestCase):
+    def setUp(self):
+        from core.models import Student
+
+        asha = Student.objects.create(name="Asha", email="asha@example.com", roll_no="R1")
+        ravi = Student.objects.create(name="Ravi", email="ravi@example.com", roll_no="R2")
+        for i in range(6):
+            Certificate.objects.create(student=(asha, ravi)[i % 2], course_name=("Physics", "Art")[i % 3 == 2],
+                                       blockchain_hash=f"{i:02x}" * 32)
+
+    def test_matches_from_every_column_are_paged_newest_first(self):
+        from core.search import certificate_page
+
+        # "a" matches Asha's name and the Art course
+        rows, cursor = certificate_page("a", limit=3)
+        self.assertEqual([row["blockchain_hash"] for row in rows], ["05" * 32, "04" * 32, "02" * 32])
+        rows, cursor = certificate_page("a", after=cursor, limit=3)
+        self.assertEqual([row["blockchain_hash"] for row in rows], ["00" * 32])
+        self.assertIsNone(cursor)
+
+    def test_course_search_reads_the_composite_index_without_a_join(self):
+        from django.db import connection
+        from core.search import search_filters
+
+        if connection.vendor != "sqlite":
+            self.skipTest("query plan text is SQLite's")
+        course = search_filters("phys")[-1]
+        query = Certificate.objects.filter(course).order_by("-id").values_list("id", flat=True)[:51]
+        self.assertNotIn("core_student", str(query.query))
+        self.assertIn("cert_course_lower_id_idx", query.explain())
+
+
+class UploadSizeLimitTests(SimpleTestCase):
+    def post(self, url_name):
+        from django.http import HttpRequest
+        from django.test import Client
+        from core.utils.upload_verify import VERIFY_UPLOAD_MAX_BYTES
+
+        client = Client(enforce_csrf_checks=True)
+        with mock.patch.object(HttpRequest, "_load_post_and_files") as read_body:
+            response = client.post(reverse(url_name), data=b"", content_type="multipart/form-data; boundary=x",
+                                   CONTENT_LENGTH=str(VERIFY_UPLOAD_MAX_BYTES * 2))
+        read_body.assert_not_called()
+        return response
+
+    def test_form_upload_is_refused_before_the_csrf_check_reads_it(self):
+        response = self.post("verify_upload")
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.context["status"], "error")
+        self.assertIn("larger than", response.context["message"])
+
+    def test_api_upload_is_refused_from_its_content_length(self):
+        response = self.post("verify_upload_api")
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()["status"], "error")
+
+
+class CertificateIdTests(SimpleTestCase):
+    def test_id_is_read_from_the_document_subject(self):
+        import io
+        from datetime import date
+        from core.utils.certificate_utils import generate_certificate_pdf_bytes
+        from core.utils.upload_verify import extract_certificate_id
+
+        pdf = generate_certificate_pdf_bytes("Asha", "Physics", "ab" * 32, "https://example.com/verify/?hash=ab",
+                                             issued_on=date(2025, 1, 1))
+        # Small chunks, so the Subject entry straddles a chunk boundary somewhere
+        for chunk_size in (37, 64 * 1024):
+            self.assertEqual(extract_certificate_id(io.BytesIO(pdf + b"\n% edited\n"), chunk_size=chunk_size),
+                             "ab" * 32)
+
+    def test_page_content_is_never_decompressed(self):
+        import io
+        import zlib
+        from core.utils.upload_verify import extract_certificate_id
+
+        # A Certificate ID only inside a compressed stream that inflates to 64 MB
+        content = b"BT (Certificate ID: " + b"ab" * 32 + b") Tj ET" + b" " * (64 * 1024 * 1024)
+        stream = zlib.compress(content, 9)
+        pdf = (b"%%PDF-1.4\n1 0 obj << /Length %d /Filter /FlateDecode >> stream\n" % len(stream)
+               + stream + b"\nendstream endobj\ntrailer << /Root 1 0 R >>\n%EOF\n")
+        with mock.patch("zlib.decompress", side_effect=AssertionError("decompressed")), \
+                mock.patch("PyPDF2.PdfReader", side_effect=AssertionError("parsed")):
+            self.assertIsNone(extract_certificate_id(io.BytesIO(pdf)))
+
+
+class TransactionConfirmationTests(SimpleTestCase):
+    def test_reverted_receipt_raises(self):
+        from core.utils.blockchain import TransactionFailed, wait_for_confirmation
+
+        confirmation = Future()
+        confirmation.set_result(("0x" + "a1" * 32, mock.Mock(status=0, blockNumber=12)))
+        with self.assertRaises(TransactionFailed):
+            wait_for_confirmation(confirmation)
+
+        confirmation = Future()
+        confirmation.set_result(("0x" + "a1" * 32, mock.Mock(status=1, blockNumber=12)))
+        self.assertEqual(wait_for_confirmation(confirmation), "0x" + "a1" * 32)
+
+
+# ----------------------------
+# RPC
+# ----------------------------
+def rpc_response(body, status_code=200):
+    return mock.Mock(status_code=status_code, content=json.dumps(body).encode())
+
+
+class RPCPoolTests(SimpleTestCase):
+    def setUp(self):
+        from core.utils.rpc_pool import RPCPool
+
+        self.pool = RPCPool(["http://first.example", "http://second.example"])
+        self.first, self.second = self.pool.endpoints
+        # No exploration swaps: the ranking is deterministic
+        patcher = mock.patch("core.utils.rpc_pool.random.random", return_value=1.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_failed_endpoint_fails_over_and_cools_down(self):
+        import requests
+        from core.utils.rpc_pool import RPC_COOLDOWN_BASE, EndpointError
+
+        ok = {"jsonrpc": "2.0", "id": 1, "result": "0x10"}
+        with mock.patch.object(self.first.session, "post", side_effect=requests.ConnectionError("refused")), \
+                mock.patch.object(self.second.session, "post", return_value=rpc_response(ok)) as second:
+            self.assertEqual(self.pool.send("eth_blockNumber", b"{}"), ok)
+            second.assert_called_once()
+            self.assertFalse(self.first.available())
+            self.assertEqual(self.pool.ranked(), [self.second, self.first])
+            # Even the primary-only methods skip it while it cools down
+            self.assertEqual(self.pool.ranked(sticky=True), [self.second, self.first])
+            first_cooldown = self.first.cooldown_until
+
+            with self.assertRaises(EndpointError):
+                self.first.post(b"{}", 1)
+        # Consecutive failures double the cooldown
+        self.assertEqual(self.first.consecutive_failures, 2)
+        self.assertGreater(self.first.cooldown_until - first_cooldown, RPC_COOLDOWN_BASE)
+
+    def test_rate_limits_and_server_errors_fail_over(self):
+        limited = {"jsonrpc": "2.0", "id": 1, "error": {"code": -32005, "message": "limit exceeded"}}
+        reverted = {"jsonrpc": "2.0", "id": 1, "error": {"code": 3, "message": "execution reverted"}}
+        with mock.patch.object(self.first.session, "post", return_value=rpc_response(limited)), \
+                mock.patch.object(self.second.session, "post", return_value=rpc_response({}, status_code=429)):
+            with self.assertRaisesRegex(ConnectionError, "RPC error -32005.*HTTP 429"):
+                self.pool.send("eth_call", b"{}")
+        self.assertFalse(self.first.available() or self.second.available())
+
+        # A revert is the chain's answer, not the endpoint's fault
+        for endpoint in self.pool.endpoints:
+            endpoint.cooldown_until = 0.0
+        with mock.patch.object(self.first.session, "post", return_value=rpc_response(reverted)), \
+                mock.patch.object(self.second.session, "post") as second:
+            self.assertEqual(self.pool.send("eth_sendRawTransaction", b"{}"), reverted)
+        second.assert_not_called()
+        self.assertEqual(self.first.consecutive_failures, 0)
+        self.assertTrue(self.first.available())
+
+
+class BatchCallTests(SimpleTestCase):
+    def test_reverts_are_none_and_other_errors_retried_alone(self):
+        from core.utils.blockchain import batch_call
+
+        calls = [mock.Mock(address="0xC0", **{"_encode_transaction_data.return_value": f"0x0{i}"}) for i in range(4)]
+        pool = mock.Mock()
+        pool.send_batch.side_effect = [
+            [
+                {"id": 0, "result": "0xaa"},
+                {"id": 1, "error": {"code": 3, "message": "execution reverted: Certificate not found"}},
+                {"id": 2, "error": {"code": -32000, "message": "execution reverted"}},
+                {"id": 3, "error": {"code": -32603, "message": "missing from batch response"}},
+            ],
+            [{"id": 0, "result": "0xbb"}],
+        ]
+        with mock.patch("core.utils.rpc_pool.get_rpc_pool", return_value=pool), \
+                mock.patch("core.utils.blockchain._decode_output", side_effect=lambda fn, data: data):
+            self.assertEqual(batch_call(calls, batch_size=10, workers=1), [b"\xaa", None, None, b"\xbb"])
+        retry = pool.send_batch.call_args_list[1].args[0]
+        self.assertEqual(retry, [("eth_call", [{"to": "0xC0", "data": "0x03"}, "latest"])])
+
+    def test_error_that_persists_is_raised(self):
+        from core.utils.blockchain import batch_call
+
+        failing = {"id": 0, "error": {"code": -32603, "message": "internal error"}}
+        pool = mock.Mock(**{"send_batch.return_value": [failing]})
+        with mock.patch("core.utils.rpc_pool.get_rpc_pool", return_value=pool), \
+                self.assertRaisesRegex(ValueError, "internal error"):
+            batch_call([mock.Mock(address="0xC0")], workers=1)
+        self.assertEqual(pool.send_batch.call_count, 2)
+
+
+class FeeOracleTests(SimpleTestCase):
+    def oracle(self, **kwargs):
+        from core.utils.fee_oracle import GWEI, FeeOracle
+
+        history = {
+            # percentiles 10 / 50 / 90 per block; the empty block's rewards are ignored
+            "reward": [[20 * GWEI, 40 * GWEI, 60 * GWEI], [0, 0, 0], [10 * GWEI, 30 * GWEI, 80 * GWEI],
+                       [30 * GWEI, 50 * GWEI, 60 * GWEI]],
+            "gasUsedRatio": [0.5, 0.0, 0.4, 0.9],
+            "baseFeePerGas": [90 * GWEI, 95 * GWEI, 100 * GWEI, 100 * GWEI, 100 * GWEI],
+        }
+        self.now = 0.0
+        self.fee_history = mock.Mock(return_value=history)
+        return FeeOracle(fee_history=self.fee_history, ttl=6, background=False, clock=lambda: self.now, **kwargs)
+
+    def test_tiers(self):
+        from core.utils.fee_oracle import GWEI
+
+        oracle = self.oracle(min_priority_fee=25 * GWEI)
+        # slow: median p10 is 20 gwei, raised to the 25 gwei floor
+        self.assertEqual(oracle.estimate("slow"), {"maxFeePerGas": 150 * GWEI, "maxPriorityFeePerGas": 25 * GWEI})
+        self.assertEqual(oracle.estimate(), {"maxFeePerGas": 190 * GWEI, "maxPriorityFeePerGas": 40 * GWEI})
+        self.assertEqual(oracle.estimate("fast"), {"maxFeePerGas": 260 * GWEI, "maxPriorityFeePerGas": 60 * GWEI})
+        with self.assertRaises(ValueError):
+            oracle.estimate("urgent")
+
+        # Served from the snapshot until the TTL runs out
+        self.assertEqual(self.fee_history.call_count, 1)
+        self.now = 7.0
+        oracle.estimate()
+        self.assertEqual(self.fee_history.call_count, 2)
+
+    def test_replacement_bumps_both_fees(self):
+        from core.utils.fee_oracle import GWEI, REPLACEMENT_BUMP
+
+        oracle = self.oracle(min_priority_fee=1 * GWEI)
+        stuck = {"maxFeePerGas": 300 * GWEI, "maxPriorityFeePerGas": 60 * GWEI}
+        fees = oracle.replacement_fees(stuck)
+        self.assertEqual(fees["maxPriorityFeePerGas"], int(60 * GWEI * REPLACEMENT_BUMP) + 1)
+        self.assertEqual(fees["maxFeePerGas"], int(300 * GWEI * REPLACEMENT_BUMP) + 1)
+        for key in stuck:
+            self.assertGreaterEqual(fees[key], stuck[key] * 1.1)
+
+        # When the market moved up further, the fresh estimate wins
+        cheap = {"maxFeePerGas": 10 * GWEI, "maxPriorityFeePerGas": 2 * GWEI}
+        self.assertEqual(oracle.replacement_fees(cheap), oracle.estimate("fast"))
+
+
+# ----------------------------
+# Merkle batches
+# ----------------------------
+class MerkleTreeTests(SimpleTestCase):
+    def leaves(self, count):
+        from core.utils.merkle import certificate_leaf
+        return [certificate_leaf(bytes([i]) * 32, f"Qm{i}") for i in range(count)]
+
+    def test_every_leaf_proves_at_every_size(self):
+        from core.utils.merkle import MerkleTree, verify_proof
+
+        # Odd sizes promote the last node of a level unchanged
+        for count in range(1, 10):
+            leaves = self.leaves(count)
+            tree = MerkleTree(leaves)
+            for index, leaf in enumerate(leaves):
+                self.assertTrue(verify_proof(leaf, tree.proof(index), tree.root), (count, index))
+
+    def test_single_leaf_is_the_root(self):
+        from core.utils.merkle import MerkleTree, verify_proof
+
+        leaf, = self.leaves(1)
+        tree = MerkleTree([leaf])
+        self.assertEqual(tree.root, leaf)
+        self.assertEqual(tree.proof(0), [])
+        self.assertTrue(verify_proof(leaf, [], tree.root))
+
+    def test_tampered_proof_is_rejected(self):
+        from core.utils.merkle import MerkleTree, verify_proof
+
+        leaves = self.leaves(5)
+        tree = MerkleTree(leaves)
+        proof = tree.proof(2)
+        flipped = [bytes([proof[0][0] ^ 1]) + proof[0][1:]] + proof[1:]
+        self.assertFalse(verify_proof(leaves[2], flipped, tree.root))
+        self.assertFalse(verify_proof(leaves[2], proof[:-1], tree.root))
+        self.assertFalse(verify_proof(leaves[3], proof, tree.root))
+
+    def test_parents_are_domain_separated_from_leaves(self):
+        from eth_hash.auto import keccak
+        from core.utils.merkle import hash_pair
+
+        a, b = self.leaves(2)
+        low, high = sorted((a, b))
+        self.assertEqual(hash_pair(a, b), keccak(b"\x01" + low + high))
+        self.assertEqual(hash_pair(b, a), hash_pair(a, b))
+
+
+# ----------------------------
+# Certificate rendering
+# ----------------------------
+class CertificateTemplateTests(SimpleTestCase):
+    def render(self, **values):
+        from datetime import date
+        from core.utils.certificate_utils import generate_certificate_pdf_bytes
+        from core.utils.certificate_template import DEFAULT_LOGO_PATH
+
+        return generate_certificate_pdf_bytes("Asha", "Physics", "ab" * 32, "https://example.com/verify/?hash=ab",
+                                              logo_path=DEFAULT_LOGO_PATH, issued_on=date(2025, 1, 1), **values)
+
+    def test_static_layer_and_fields_are_on_the_page(self):
+        import io
+        from PyPDF2 import PdfReader
+
+        pdf = self.render(cgpa="9.1")
+        text = PdfReader(io.BytesIO(pdf)).pages[0].extract_text()
+        for expected in ("Certificate of Achievement", "Science for Women", "Asha", "'Physics'",
+                         "with a CGPA/percentage of 9.1", "Certificate ID: " + "ab" * 32):
+            self.assertIn(expected, text)
+        self.assertIn(b"/Subtype /Image", pdf)     # the logo
+        self.assertEqual(pdf, self.render(cgpa="9.1"))
+
+    def test_static_layer_is_encoded_once(self):
+        from reportlab.pdfbase.pdfdoc import PDFImageXObject
+
+        from core.utils import certificate_template
+
+        self.render()
+        with mock.patch.object(PDFImageXObject, "__init__", side_effect=AssertionError("logo encoded again")), \
+                mock.patch.object(certificate_template, "_draw_static", wraps=certificate_template._draw_static) as draw:
+            pdf = self.render()
+        # Only the logo is placed again (to register it with the form); the text and border aren't redrawn
+        self.assertEqual([c.args[1]["type"] for c in draw.call_args_list], ["image"])
+        self.assertIn(b"/FormXob.StaticLayer", pdf)
+
+    def test_template_spec_is_not_reread_for_every_render(self):
+        from core.utils import certificate_template
+
+        with mock.patch.object(certificate_template, "_current", {}), \
+                mock.patch.object(certificate_template, "load_template_spec",
+                                  wraps=certificate_template.load_template_spec) as load:
+            self.render()
+            self.render()
+        load.assert_called_once()
+
+    def test_rendering_leaves_reportlab_settings_alone(self):
+        from reportlab import rl_config
+
+        before = {name: getattr(rl_config, name) for name in ("useA85", "pageCompression", "invariant")}
+        self.render()
+        self.assertEqual({name: getattr(rl_config, name) for name in before}, before)
+
+
+class RenderServiceTests(SimpleTestCase):
+    def test_pool_workers_are_not_forked_from_the_calling_process(self):
+        from core.utils.certificate_utils import generate_certificate_pdf_bytes
+        from core.utils.render_service import RenderService
+
+        with RenderService(workers=2).start() as service:
+            pids = {service.submit(os.getpid).result() for _ in range(4)}
+            pdf = service.submit(generate_certificate_pdf_bytes, "Asha", "Physics", "ab" * 32,
+                                 "https://example.com/verify/?hash=ab").result()
+            context = service._pool._mp_context.get_start_method()
+        self.assertNotIn(os.getpid(), pids)
+        self.assertIn(context, ("forkserver", "spawn"))
+        self.assertTrue(pdf.startswith(b"%PDF"))
+
+
+# ----------------------------
+# Migrations
+# ----------------------------
+class BinaryHashMigrationTests(TransactionTestCase):
+    """0010_binary_hashes merges certificates stored twice under differently spelled hashes."""
+
+    def migrate(self, target=None):
+        from django.db import connection
+        from django.db.migrations.executor import MigrationExecutor
+
+        executor = MigrationExecutor(connection)
+        targets = [("core", target)] if target else executor.loader.graph.leaf_nodes()
+        with mock.patch("builtins.print"):
+            executor.migrate(targets)
+        executor.loader.build_graph()
+        return executor.loader.project_state(targets).apps
+
+    def setUp(self):
+        from datetime import datetime, timezone
+
+        self.addCleanup(self.migrate)
+        apps = self.migrate("0009_query_indexes")
+        Student = apps.get_model("core", "Student")
+        Certificate = apps.get_model("core", "Certificate")
+        day_one = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+        day_two = datetime(2025, 1, 2, 12, tzinfo=timezone.utc)
+
+        student = Student.objects.create(name="Asha", email="asha@example.com", roll_no="R1")
+        issued = Certificate.objects.create(student=student, course_name="Physics", pdf_file="certificates/aa.pdf",
+                                            blockchain_hash="aa" * 32, transaction_hash="a1" * 32)
+        # The same certificate again, as chain sync stored it, then revoked through that copy
+        synced = Certificate.objects.create(student=student, course_name="Physics", pdf_file="",
+                                            blockchain_hash="0x" + "AA" * 32, transaction_hash="0x" + "a1" * 32,
+                                            issued_block=40, revoked=True, revoked_block=50)
+        other = Certificate.objects.create(student=student, course_name="Maths", pdf_file="certificates/bb.pdf",
+                                           blockchain_hash="bb" * 32)
+        Certificate.objects.filter(pk__in=[issued.pk, other.pk]).update(issued_at=day_one)
+        Certificate.objects.filter(pk=synced.pk).update(issued_at=day_two)
+        apps.get_model("core", "RevokedCertificate").objects.create(certificate_id=synced.pk)
+        apps.get_model("core", "IssuanceJob").objects.create(
+            name="Asha", email="asha@example.com", roll_no="R1", course_name="Physics", certificate_id=synced.pk
+        )
+        DailyCertificateStats = apps.get_model("core", "DailyCertificateStats")
+        DailyCertificateStats.objects.create(day=day_one.date(), issued=2)
+        DailyCertificateStats.objects.create(day=day_two.date(), issued=1, revoked=1)
+        self.issued, self.other = issued.pk, other.pk
+
+    def test_duplicates_are_merged_into_the_oldest_row(self):
+        apps = self.migrate("0010_binary_hashes")
+        Certificate = apps.get_model("core", "Certificate")
+
+        self.assertEqual(
+            sorted(Certificate.objects.values_list("id", "blockchain_hash")),
+            [(self.issued, "aa" * 32), (self.other, "bb" * 32)]
+        )
+        kept = Certificate.objects.get(pk=self.issued)
+        self.assertEqual((kept.revoked, kept.revoked_block, kept.issued_block), (True, 50, 40))
+        self.assertEqual((kept.transaction_hash, kept.pdf_file), ("a1" * 32, "certificates/aa.pdf"))
+        self.assertEqual(
+            list(apps.get_model("core", "RevokedCertificate").objects.values_list("certificate_id", flat=True)),
+            [self.issued]
+        )
+        self.assertEqual(apps.get_model("core", "IssuanceJob").objects.get().certificate_id, self.issued)
+        self.assertEqual(
+            list(apps.get_model("core", "DailyCertificateStats").objects.values_list("day", "issued", "revoked")),
+            [(kept.issued_at.date(), 2, 1)]
+        )
+
+    def test_reverse_restores_canonical_hex(self):
+        self.migrate("0010_binary_hashes")
+        apps = self.migrate("0009_query_indexes")
+        Certificate = apps.get_model("core", "Certificate")
+
+        self.assertEqual(
+            sorted(Certificate.objects.values_list("blockchain_hash", "transaction_hash", "revoked")),
+            [("aa" * 32, "a1" * 32, True), ("bb" * 32, None, False)]
+        )
@@ -14,7 +14,10 @@ urlpatterns = [
 
     # Admin Certificate Actions
     path('issue-certificate/', views.issue_certificate_view, name='issue_certificate'),
+    path('issue-jobs/<int:job_id>/', views.issuance_job_status_view, name='issuance_job_status'),
+    path('certificates/<str:cert_hash>/qr.png', views.certificate_qr_view, name='certificate_qr'),
     path('revoke-certificate/', views.revoke_certificate_view, name='revoke_certificate'),
+    path('revoke-certificate/data/', views.revoke_certificate_data_view, name='revoke_certificate_data'),
     path('verify/', views.verify_certificate_view, name='verify_certificate'),
     # Verifier Dashboard and Actions
     path('verifier-dashboard/', views.verifier_dashboard_view, name='verifier_dashboard'),
@@ -24,4 +27,9 @@ urlpatterns = [
 
     # API Endpoint (for QR code verification)
     path('verify-api/', views.verify_api_view, name='verify_api'),
+    path('verify-api/batch/', views.verify_batch_api_view, name='verify_batch_api'),
+    path('verify-upload/', views.verify_upload_view, name='verify_upload'),
+    path('verify-api/upload/', views.verify_upload_api_view, name='verify_upload_api'),
+    path('verify-cache-stats/', views.verification_cache_stats_view, name='verification_cache_stats'),
+    path('rpc-stats/', views.rpc_stats_view, name='rpc_stats'),
 ]
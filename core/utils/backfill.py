@@ -0,0 +1,101 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SYNC_CHUNK_SIZE = int(os.getenv("SYNC_CHUNK_SIZE", "5000"))        # blocks per eth_getLogs
+SYNC_MIN_CHUNK_SIZE = int(os.getenv("SYNC_MIN_CHUNK_SIZE", "10"))
+SYNC_MAX_WORKERS = int(os.getenv("SYNC_MAX_WORKERS", "4"))
+SYNC_MAX_RETRIES = 5
+
+# Messages public RPCs use when an eth_getLogs range or result is too large.
+RANGE_ERROR_MARKERS = (
+    "block range",
+    "range is too large",
+    "range too large",
+    "exceed maximum block range",
+    "query returned more than",
+    "response size",
+    "limit exceeded",
+    "too many blocks",
+    "too many results",
+    "-32005",
+    "timed out",
+    "timeout",
+)
+
+
+def is_range_error(exc) -> bool:
+    message = str(exc).lower()
+    return any(marker in message for marker in RANGE_ERROR_MARKERS)
+
+
+def _fetch_chunk(events, from_block, to_block):
+    return {
+        event.event_name: event.get_logs(fromBlock=from_block, toBlock=to_block)
+        for event in events
+    }
+
+
+def iter_event_chunks(events, from_block, to_block, chunk_size=SYNC_CHUNK_SIZE,
+                      min_chunk_size=SYNC_MIN_CHUNK_SIZE, max_workers=SYNC_MAX_WORKERS):
+    """
+    Fetch logs for `events` (contract event classes, e.g. contract.events.Issued)
+    over [from_block, to_block] in chunks, several chunks at a time.
+
+    Yields (chunk_start, chunk_end, {event_name: logs}) for consecutive ranges
+    strictly in block order, so the caller can checkpoint after each one.
+    A chunk the RPC rejects for its size is split in half and retried, and
+    the size used for new chunks shrinks with it; it grows back slowly after
+    successful chunks. Other errors are retried with backoff, then raised.
+    """
+    if from_block > to_block:
+        return
+
+    max_chunk_size = chunk_size
+    next_start = from_block
+    expected = from_block
+    inflight = {}   # chunk_start -> (chunk_end, future)
+    attempts = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="backfill") as pool:
+        def submit(start, end):
+            inflight[start] = (end, pool.submit(_fetch_chunk, events, start, end))
+
+        while expected <= to_block:
+            # Keep the pool busy with the next ranges while we wait on the oldest one.
+            while next_start <= to_block and len(inflight) < max_workers * 2:
+                end = min(next_start + chunk_size - 1, to_block)
+                submit(next_start, end)
+                next_start = end + 1
+
+            end, future = inflight.pop(expected)
+            try:
+                logs = future.result()
+            except Exception as e:
+                span = end - expected + 1
+                if is_range_error(e) and span > min_chunk_size:
+                    # Never grow back to a size the RPC has already rejected.
+                    max_chunk_size = max(min_chunk_size, min(max_chunk_size, span - 1))
+                    chunk_size = max(min_chunk_size, span // 2)
+                    mid = expected + span // 2 - 1
+                    logger.info(f"[Backfill] Range {expected}-{end} rejected, splitting (chunk size now {chunk_size})")
+                    submit(expected, mid)
+                    submit(mid + 1, end)
+                    continue
+
+                attempts[expected] = attempts.get(expected, 0) + 1
+                if attempts[expected] > SYNC_MAX_RETRIES:
+                    raise
+                delay = min(30, 2 ** attempts[expected])
+                logger.warning(f"[Backfill] Range {expected}-{end} failed ({e}); retrying in {delay}s")
+                time.sleep(delay)
+                submit(expected, end)
+                continue
+
+            attempts.pop(expected, None)
+            chunk_size = min(max_chunk_size, int(chunk_size * 1.25) + 1)
+            yield expected, end, logs
+            expected = end + 1
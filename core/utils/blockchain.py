@@ -1,157 +1,481 @@
 import os
 import json
 import time
-from web3 import Web3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from core.utils.backfill import iter_event_chunks
+from core.utils.fee_oracle import get_fee_oracle
+
+# web3 is imported when the client is first needed, not at import time: it is
+# slow to import, and nothing here should touch the network until it's used.
 
 # ----------------------------
 # Environment & RPC Setup
 # ----------------------------
 load_dotenv()
 
-POLYGON_RPC_URL = os.getenv("POLYGON_RPC_URL")
 CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
 PUBLIC_ADDRESS = os.getenv("PUBLIC_ADDRESS")
 
-w3 = Web3(Web3.HTTPProvider(POLYGON_RPC_URL))
-if not w3.is_connected():
-    raise Exception(f"❌ Failed to connect to Polygon RPC at {POLYGON_RPC_URL}")
-
 # Change this if contract deployed at a different block
 CONTRACT_DEPLOYMENT_BLOCK = 25470407
 
-# ----------------------------
-# Load ABI
-# ----------------------------
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 ABI_PATH = os.path.join(BASE_DIR, "blockchain", "abi", "Cert.abi.json")
 
-if not os.path.exists(ABI_PATH):
-    raise FileNotFoundError(f"❌ ABI file not found at {ABI_PATH}")
 
-with open(ABI_PATH, "r") as f:
-    contract_abi = json.load(f)
+# ----------------------------
+# Lazy Client
+# ----------------------------
+class ChainClient:
+    """
+    The Web3 connection and contract objects, built on first use. Requests go
+    through the RPC pool (core/utils/rpc_pool.py), which spreads them over
+    every endpoint in POLYGON_RPC_URLS and fails over between them.
+    """
+
+    def __init__(self, provider=None, contract_address=CONTRACT_ADDRESS, abi_path=ABI_PATH):
+        from web3 import Web3
+        from core.utils.rpc_pool import PooledHTTPProvider, get_rpc_pool
+
+        if not os.path.exists(abi_path):
+            raise FileNotFoundError(f"❌ ABI file not found at {abi_path}")
+        with open(abi_path, "r") as f:
+            contract_abi = json.load(f)
+
+        self.w3 = Web3(provider or PooledHTTPProvider(get_rpc_pool()))
+        self.contract = self.w3.eth.contract(
+            address=Web3.to_checksum_address(contract_address),
+            abi=contract_abi
+        )
+        self.multicall_contract = self.w3.eth.contract(
+            address=Web3.to_checksum_address(MULTICALL3_ADDRESS),
+            abi=MULTICALL3_ABI
+        )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> ChainClient:
+    """Process-wide client, created once (thread-safe) the first time anything needs the chain."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ChainClient()
+    return _client
+
+
+def get_web3():
+    return get_client().w3
+
+
+def get_contract():
+    return get_client().contract
+
+
+def check_connection():
+    """Raise if the RPC is unreachable (one round trip); for commands that want to fail fast."""
+    if not get_web3().is_connected():
+        raise Exception(f"❌ Failed to connect to Polygon RPC at {get_web3().provider}")
+
+
+def __getattr__(name):
+    # `blockchain.w3` / `.contract` / `.multicall_contract` keep working, built on first access.
+    if name in ("w3", "contract", "multicall_contract"):
+        return getattr(get_client(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-contract = w3.eth.contract(
-    address=Web3.to_checksum_address(CONTRACT_ADDRESS),
-    abi=contract_abi
-)
 
 # ----------------------------
 # Helper Functions
 # ----------------------------
 def get_safe_nonce():
-    """Get nonce safely accounting for pending transactions."""
-    pending = w3.eth.get_transaction_count(PUBLIC_ADDRESS, "pending")
-    latest = w3.eth.get_transaction_count(PUBLIC_ADDRESS, "latest")
-    return max(pending, latest)
-
-def get_dynamic_gas():
-    """Fetch dynamic gas price and add buffer for congestion."""
-    base_fee = w3.eth.gas_price
-    max_fee = int(base_fee * 2)
-    priority_fee = w3.to_wei("30", "gwei")
-    return max_fee, priority_fee
+    """Get nonce safely accounting for pending transactions (the pending count includes mined ones)."""
+    return get_web3().eth.get_transaction_count(PUBLIC_ADDRESS, "pending")
+
+
+class NonceManager:
+    """
+    Process-wide nonce allocator for PUBLIC_ADDRESS.
+    Reads the pending nonce from the chain once and then hands out consecutive
+    nonces locally, so concurrent senders never race on get_transaction_count.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = None
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._next = get_safe_nonce()
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def release(self, nonce: int):
+        """Give back a nonce whose transaction was never broadcast."""
+        with self._lock:
+            if self._next is not None and nonce == self._next - 1:
+                self._next = nonce
+            else:
+                # A gap would stall every later transaction; resync on next allocate.
+                self._next = None
+
+    def reconcile(self):
+        """Resync with the node, e.g. after a 'nonce too low' error."""
+        with self._lock:
+            chain_nonce = get_safe_nonce()
+            self._next = max(chain_nonce, self._next or 0)
+
+
+nonce_manager = NonceManager()
+
+# Receipts are awaited on this pool so senders can keep broadcasting.
+RECEIPT_WORKERS = int(os.getenv("TX_RECEIPT_WORKERS", "16"))
+RECEIPT_TIMEOUT = 120
+_receipt_pool = ThreadPoolExecutor(max_workers=RECEIPT_WORKERS, thread_name_prefix="tx-receipt")
 
 def bump_gas(transaction):
-    """Increase gas fees to replace a stuck transaction."""
-    transaction["maxFeePerGas"] = int(transaction["maxFeePerGas"] * 1.5)
-    transaction["maxPriorityFeePerGas"] = int(transaction["maxPriorityFeePerGas"] * 1.5)
+    """Raise a stuck transaction's fees to the oracle's fast tier (at least the minimum replacement bump)."""
+    transaction.update(get_fee_oracle().replacement_fees(transaction))
     print(f"🔄 Bumping gas: maxFee={transaction['maxFeePerGas']}, priorityFee={transaction['maxPriorityFeePerGas']}")
     return transaction
 
 def is_tx_pending(tx_hash):
     """Check if a transaction is still pending."""
     try:
-        w3.eth.get_transaction_receipt(tx_hash)
+        get_web3().eth.get_transaction_receipt(tx_hash)
         return False  # mined
     except:
         return True  # pending or unknown
 
-def build_and_send_txn(transaction, retries=5):
+def _sign_and_send(transaction):
+    signed_txn = get_web3().eth.account.sign_transaction(transaction, private_key=PRIVATE_KEY)
+    try:
+        return get_web3().eth.send_raw_transaction(signed_txn.rawTransaction)
+    except Exception as e:
+        if "already known" in str(e):
+            # Node already has this exact transaction in its mempool.
+            return signed_txn.hash
+        raise
+
+
+def send_transaction(transaction, retries=5):
     """
-    Sign, send, and confirm a transaction with retries and gas bumping.
-    Returns the last transaction hash even if not confirmed.
+    Sign and broadcast a transaction with a locally allocated nonce.
+    Returns (tx_hash, future) without waiting for the receipt; the future
+    resolves to (final_tx_hash, receipt) once confirmed in the background
+    (receipt is None if it never confirmed).
     """
-    last_tx_hash = None
-    transaction["nonce"] = get_safe_nonce()
+    transaction["nonce"] = nonce_manager.allocate()
 
     for attempt in range(1, retries + 1):
         try:
-            signed_txn = w3.eth.account.sign_transaction(transaction, private_key=PRIVATE_KEY)
-            last_tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            print(f"✅ Transaction sent: {w3.to_hex(last_tx_hash)}")
-
-            receipt = w3.eth.wait_for_transaction_receipt(last_tx_hash, timeout=120)
-            if receipt.status == 1:
-                print(f"✅ Transaction confirmed in block {receipt.blockNumber}")
-                return w3.to_hex(last_tx_hash)
-            else:
-                print("❌ Transaction failed on-chain")
-                return w3.to_hex(last_tx_hash)
+            tx_hash = _sign_and_send(transaction)
+            print(f"✅ Transaction sent: {get_web3().to_hex(tx_hash)} (nonce {transaction['nonce']})")
+            future = _receipt_pool.submit(_confirm_transaction, transaction, tx_hash, retries)
+            return get_web3().to_hex(tx_hash), future
 
         except Exception as e:
             print(f"⚠ Error (Attempt {attempt}): {e}")
 
-            if "already known" in str(e) or "replacement transaction" in str(e):
+            if "nonce too low" in str(e):
+                nonce_manager.reconcile()
+                transaction["nonce"] = nonce_manager.allocate()
+            elif "replacement transaction" in str(e):
                 transaction = bump_gas(transaction)
                 time.sleep(5)
             else:
                 time.sleep(3)
 
-    print("⚠ All retries failed. Returning last pending transaction hash.")
-    return w3.to_hex(last_tx_hash) if last_tx_hash else None
+    nonce_manager.release(transaction["nonce"])
+    print("⚠ All retries failed. Transaction was not broadcast.")
+    return None, None
+
+
+def _find_receipt(tx_hashes):
+    """Return the receipt of whichever of these (same-nonce) transactions was mined."""
+    from web3.exceptions import TransactionNotFound
+
+    for tx_hash in tx_hashes:
+        try:
+            return tx_hash, get_web3().eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            continue
+    return None, None
+
+
+def _confirm_transaction(transaction, tx_hash, retries):
+    """Wait for a receipt, re-broadcasting the same nonce with bumped gas if it stalls."""
+    from web3.exceptions import TimeExhausted
+
+    sent = [tx_hash]
+    for attempt in range(1, retries + 1):
+        try:
+            receipt = get_web3().eth.wait_for_transaction_receipt(sent[-1], timeout=RECEIPT_TIMEOUT)
+            mined_hash = sent[-1]
+        except TimeExhausted:
+            print(f"⚠ Transaction {get_web3().to_hex(sent[-1])} not mined after {RECEIPT_TIMEOUT}s (Attempt {attempt})")
+            mined_hash, receipt = _find_receipt(sent[:-1])
+            if receipt is None:
+                try:
+                    transaction = bump_gas(transaction)
+                    sent.append(_sign_and_send(transaction))
+                    print(f"🔄 Replacement sent: {get_web3().to_hex(sent[-1])}")
+                except Exception as e:
+                    # "nonce too low" here means an earlier version was mined meanwhile.
+                    print(f"⚠ Replacement failed: {e}")
+                    mined_hash, receipt = _find_receipt(sent)
+        except Exception as e:
+            print(f"⚠ Error waiting for receipt (Attempt {attempt}): {e}")
+            time.sleep(3)
+            continue
+
+        if receipt is not None:
+            if receipt.status == 1:
+                print(f"✅ Transaction confirmed in block {receipt.blockNumber}")
+            else:
+                print("❌ Transaction failed on-chain")
+            return get_web3().to_hex(mined_hash), receipt
+
+    print("⚠ Transaction not confirmed. Returning last pending transaction hash.")
+    return get_web3().to_hex(sent[-1]), None
+
+
+class TransactionFailed(RuntimeError):
+    """The transaction was mined but reverted (receipt status 0)."""
+
+
+def wait_for_confirmation(confirmation):
+    """
+    Block on a future from send_transaction() and return the final
+    transaction hash (the last one sent if it never confirmed). Raises
+    TransactionFailed if it was mined and reverted.
+    """
+    final_hash, receipt = confirmation.result()
+    if receipt is not None and receipt.status != 1:
+        raise TransactionFailed(f"Transaction {final_hash} reverted in block {receipt.blockNumber}")
+    return final_hash
+
+
+def build_and_send_txn(transaction, retries=5, wait=True):
+    """
+    Sign, send, and confirm a transaction with retries and gas bumping.
+    Returns the last transaction hash even if not confirmed; raises
+    TransactionFailed if it reverted.
+    With wait=False the hash is returned as soon as the transaction is
+    broadcast and confirmation continues in the background.
+    """
+    tx_hash, future = send_transaction(transaction, retries=retries)
+    if future is None or not wait:
+        return tx_hash
+    return wait_for_confirmation(future)
 
 # ----------------------------
 # Core Blockchain Functions
 # ----------------------------
-def issue_certificate_on_chain(cert_hash: bytes, cid: str) -> str:
-    """Store certificate on blockchain."""
-    max_fee, priority_fee = get_dynamic_gas()
-    txn = contract.functions.issueCertificate(cert_hash, cid).build_transaction({
+def _issue_certificate_txn(cert_hash: bytes, cid: str, urgency):
+    return get_contract().functions.issueCertificate(cert_hash, cid).build_transaction({
         "from": PUBLIC_ADDRESS,
-        "nonce": get_safe_nonce(),
         "gas": 3000000,
-        "maxFeePerGas": max_fee,
-        "maxPriorityFeePerGas": priority_fee,
+        **get_fee_oracle().estimate(urgency),
     })
-    return build_and_send_txn(txn)
 
-def revoke_certificate_on_chain(cert_hash: bytes) -> str:
+def issue_certificate_on_chain(cert_hash: bytes, cid: str, urgency="standard") -> str:
+    """Store certificate on blockchain."""
+    return build_and_send_txn(_issue_certificate_txn(cert_hash, cid, urgency))
+
+def send_certificate_on_chain(cert_hash: bytes, cid: str, urgency="standard"):
+    """
+    Broadcast issueCertificate without waiting for it to be mined.
+    Returns (tx_hash, confirmation) like send_transaction(); pass
+    confirmation to wait_for_confirmation() before relying on it.
+    """
+    return send_transaction(_issue_certificate_txn(cert_hash, cid, urgency))
+
+def revoke_certificate_on_chain(cert_hash: bytes, urgency="fast") -> str:
     """Revoke certificate on blockchain."""
-    max_fee, priority_fee = get_dynamic_gas()
-    txn = contract.functions.revokeCertificate(cert_hash).build_transaction({
+    txn = get_contract().functions.revokeCertificate(cert_hash).build_transaction({
         "from": PUBLIC_ADDRESS,
-        "nonce": get_safe_nonce(),
         "gas": 3000000,
-        "maxFeePerGas": max_fee,
-        "maxPriorityFeePerGas": priority_fee,
+        **get_fee_oracle().estimate(urgency),
     })
     return build_and_send_txn(txn)
 
 def get_certificate_from_chain(cert_hash: bytes):
     """Fetch certificate details from blockchain."""
-    return contract.functions.getCertificate(cert_hash).call()
+    return get_contract().functions.getCertificate(cert_hash).call()
+
+# ----------------------------
+# Merkle Batch Functions
+# ----------------------------
+def issue_batch_on_chain(merkle_root: bytes, size: int, urgency="standard") -> str:
+    """Anchor a Merkle root covering `size` certificates in one transaction."""
+    txn = get_contract().functions.issueBatch(merkle_root, size).build_transaction({
+        "from": PUBLIC_ADDRESS,
+        "gas": 3000000,
+        **get_fee_oracle().estimate(urgency),
+    })
+    return build_and_send_txn(txn)
+
+def get_batch_from_chain(merkle_root: bytes):
+    """(issuedAt, size) of an anchored batch; issuedAt is 0 if the root was never anchored."""
+    return get_contract().functions.getBatch(merkle_root).call()
+
+def revoke_batched_certificate_on_chain(merkle_root: bytes, cert_hash: bytes, cid: str, proof: list, urgency="fast") -> str:
+    """Revoke a single certificate that was issued inside a Merkle batch."""
+    txn = get_contract().functions.revokeBatchedCertificate(merkle_root, cert_hash, cid, proof).build_transaction({
+        "from": PUBLIC_ADDRESS,
+        "gas": 3000000,
+        **get_fee_oracle().estimate(urgency),
+    })
+    return build_and_send_txn(txn)
+
+def get_batched_certificate_from_chain(merkle_root: bytes, cert_hash: bytes, cid: str, proof: list):
+    """
+    Check a batched certificate's inclusion proof against its on-chain root.
+    Returns (cid, issuedAt, revoked) like get_certificate_from_chain.
+    """
+    issued_at, revoked = get_contract().functions.getBatchedCertificate(merkle_root, cert_hash, cid, proof).call()
+    return cid, issued_at, revoked
+
+# ----------------------------
+# Multicall (batched reads)
+# ----------------------------
+# Multicall3 is deployed at the same address on Polygon and most EVM chains.
+MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+MULTICALL_CHUNK_SIZE = int(os.getenv("MULTICALL_CHUNK_SIZE", "200"))
+# Bulk reads: "multicall" (one aggregate3 eth_call per chunk) or "batch" (JSON-RPC batch of eth_calls)
+BULK_READ_MODE = os.getenv("BULK_READ_MODE", "multicall")
+RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", "100"))
+BULK_READ_WORKERS = int(os.getenv("BULK_READ_WORKERS", "4"))       # chunks in flight at once
+MULTICALL3_ABI = [{
+    "inputs": [{
+        "components": [
+            {"internalType": "address", "name": "target", "type": "address"},
+            {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+            {"internalType": "bytes", "name": "callData", "type": "bytes"}
+        ],
+        "internalType": "struct Multicall3.Call3[]",
+        "name": "calls",
+        "type": "tuple[]"
+    }],
+    "name": "aggregate3",
+    "outputs": [{
+        "components": [
+            {"internalType": "bool", "name": "success", "type": "bool"},
+            {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+        ],
+        "internalType": "struct Multicall3.Result[]",
+        "name": "returnData",
+        "type": "tuple[]"
+    }],
+    "stateMutability": "payable",
+    "type": "function"
+}]
+
+def _decode_output(fn, data: bytes):
+    output_types = [output["type"] for output in fn.abi["outputs"]]
+    return tuple(get_web3().codec.decode(output_types, data))
+
+def _map_chunks(read_chunk, fn_calls, chunk_size, workers):
+    """Split fn_calls into chunks, read them on up to `workers` threads, flatten in input order."""
+    chunks = [fn_calls[start:start + chunk_size] for start in range(0, len(fn_calls), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        outputs = map(read_chunk, chunks)
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks)), thread_name_prefix="bulk-read") as pool:
+            outputs = list(pool.map(read_chunk, chunks))
+    return [output for chunk in outputs for output in chunk]
+
+def multicall(fn_calls, chunk_size=MULTICALL_CHUNK_SIZE, workers=BULK_READ_WORKERS):
+    """
+    Run many read-only contract calls through Multicall3.aggregate3, one
+    eth_call per chunk instead of one per call. Returns decoded outputs in
+    input order, with None for calls that reverted (e.g. "Certificate not found").
+    """
+    def read_chunk(chunk):
+        calls = [(fn.address, True, fn._encode_transaction_data()) for fn in chunk]
+        replies = get_client().multicall_contract.functions.aggregate3(calls).call()
+        return [_decode_output(fn, data) if success else None for fn, (success, data) in zip(chunk, replies)]
+
+    return _map_chunks(read_chunk, fn_calls, chunk_size, workers)
+
+def _is_revert(error: dict) -> bool:
+    # geth answers a revert with code 3, bor and most providers with -32000 "execution reverted"
+    return error.get("code") == 3 or "revert" in str(error.get("message", "")).lower()
+
+def batch_call(fn_calls, batch_size=RPC_BATCH_SIZE, workers=BULK_READ_WORKERS):
+    """
+    Same contract as multicall(), but each call is its own eth_call inside a
+    JSON-RPC batch request. Works on chains without Multicall3 and isn't
+    bound by a single call's gas limit. Items that fail for another reason
+    than a revert are retried one by one (with failover); if one still
+    fails, the error is raised rather than reported as "not found".
+    """
+    from core.utils.rpc_pool import get_rpc_pool
+
+    def read_chunk(chunk):
+        calls = [
+            ("eth_call", [{"to": fn.address, "data": fn._encode_transaction_data()}, "latest"])
+            for fn in chunk
+        ]
+        results = []
+        for fn, call, response in zip(chunk, calls, get_rpc_pool().send_batch(calls)):
+            if "error" in response and not _is_revert(response["error"]):
+                response = get_rpc_pool().send_batch([call])[0]
+            if "error" in response:
+                if not _is_revert(response["error"]):
+                    raise ValueError(f"eth_call failed: {response['error']}")
+                results.append(None)
+            else:
+                results.append(_decode_output(fn, bytes.fromhex(response["result"].removeprefix("0x"))))
+        return results
+
+    return _map_chunks(read_chunk, fn_calls, batch_size, workers)
+
+def read_many(fn_calls, mode=BULK_READ_MODE):
+    """
+    Bulk read-only contract calls: decoded outputs in input order, None where
+    the call reverted. BULK_READ_MODE picks Multicall3 ("multicall") or
+    JSON-RPC batches ("batch"); multicall falls back to batches on a chain
+    where the Multicall3 contract isn't deployed.
+    """
+    if not fn_calls:
+        return []
+    if mode == "batch":
+        return batch_call(fn_calls)
+    from web3.exceptions import BadFunctionCallOutput
+    try:
+        return multicall(fn_calls)
+    except BadFunctionCallOutput:
+        print(f"⚠ No Multicall3 contract at {MULTICALL3_ADDRESS}; using JSON-RPC batches")
+        return batch_call(fn_calls)
+
+def get_certificates_from_chain(cert_hashes: list):
+    """Batched getCertificate: returns (cid, issuedAt, revoked) or None per hash."""
+    return read_many([get_contract().functions.getCertificate(h) for h in cert_hashes])
 
 # ----------------------------
 # Event Fetching Functions
 # ----------------------------
+def _get_all_events(event):
+    """Fetch every log of `event` since deployment using chunked, parallel eth_getLogs."""
+    entries = []
+    for _, _, logs in iter_event_chunks([event], CONTRACT_DEPLOYMENT_BLOCK, get_web3().eth.block_number):
+        entries.extend(logs[event.event_name])
+    return entries
+
 def get_all_issued_certificates():
     """Fetch all issued certificates since deployment."""
-    event_filter = contract.events.Issued.create_filter(
-        fromBlock=CONTRACT_DEPLOYMENT_BLOCK,
-        toBlock="latest"
-    )
-    return event_filter.get_all_entries()
+    return _get_all_events(get_contract().events.Issued)
 
 def get_all_revoked_certificates():
     """Fetch all revoked certificates since deployment."""
-    event_filter = contract.events.Revoked.create_filter(
-        fromBlock=CONTRACT_DEPLOYMENT_BLOCK,
-        toBlock="latest"
-    )
-    return event_filter.get_all_entries()
-
-def get_contract():
-    return contract
+    return _get_all_events(get_contract().events.Revoked)
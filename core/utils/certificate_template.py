@@ -0,0 +1,287 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from reportlab.pdfgen import canvas
+from reportlab.lib import pagesizes
+from reportlab.lib.colors import HexColor
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFImageXObject, PDFName, PDFStream
+from django.conf import settings
+
+DEFAULT_LOGO_PATH = os.path.join(settings.BASE_DIR, "core/static/core/images/logo.png")
+BRAND_COLOR = "#1E3A8A"
+# Document Subject of every certificate; core.utils.upload_verify reads the ID back from it
+CERTIFICATE_ID_SUBJECT = "Certificate ID: {hash_value}"
+
+
+def default_template_spec(logo_path=DEFAULT_LOGO_PATH) -> dict:
+    """
+    The stock certificate layout (landscape A4), as a template spec.
+
+    `static` elements are drawn once per template version and reused for every
+    certificate; `fields` are filled in per certificate from the values passed
+    to CertificateTemplate.render(). Coordinates are PDF points from the
+    bottom-left corner of the page.
+    """
+    width, height = pagesizes.landscape(pagesizes.A4)
+    margin = 40
+    has_logo = bool(logo_path and os.path.exists(logo_path))
+    text_color = BRAND_COLOR if has_logo else "#000000"
+    static = [
+        {"type": "rect", "x": margin, "y": margin, "width": width - 2 * margin,
+         "height": height - 2 * margin, "stroke": BRAND_COLOR, "line_width": 4},
+    ]
+
+    # Logo + institute name at top-left
+    if has_logo:
+        logo_x, logo_y, logo_size = margin + 10, height - margin - 120, 120
+        static += [
+            {"type": "image", "path": str(logo_path), "x": logo_x, "y": logo_y,
+             "width": logo_size, "height": logo_size, "preserve_aspect_ratio": True},
+            {"type": "text", "text": "Vignan's Nirula Institute of Technology and ",
+             "x": logo_x + logo_size + 40, "y": logo_y + logo_size - 55,
+             "font": "Helvetica-Bold", "size": 25, "color": BRAND_COLOR},
+            {"type": "text", "text": " Science for Women",
+             "x": logo_x + logo_size + 170, "y": logo_y + logo_size - 95,
+             "font": "Helvetica-Bold", "size": 25, "color": BRAND_COLOR},
+        ]
+
+    static += [
+        {"type": "text", "text": "Pedapalakaluru, Guntur", "x": width / 2 + 30, "y": height - 160,
+         "font": "Helvetica", "size": 14, "align": "centre", "color": text_color},
+        {"type": "text", "text": "Certificate of Achievement", "x": width / 2 + 20, "y": height - 240,
+         "font": "Helvetica-Bold", "size": 25, "align": "centre", "color": text_color},
+        {"type": "text", "text": "This is to certify that", "x": width / 2 + 20, "y": height - 270,
+         "font": "Helvetica", "size": 14, "align": "centre", "color": text_color},
+        {"type": "text", "text": "has successfully completed the course", "x": width / 2 + 20,
+         "y": height - 330, "font": "Helvetica", "size": 14, "align": "centre", "color": text_color},
+        {"type": "text", "text": "Principal", "x": margin + 10, "y": margin + 55,
+         "font": "Helvetica", "size": 12, "color": text_color},
+    ]
+
+    fields = {
+        "student_name": {"x": width / 2 + 20, "y": height - 300, "font": "Helvetica-Bold",
+                         "size": 22, "align": "centre"},
+        "course_name": {"x": width / 2 + 20, "y": height - 360, "font": "Helvetica-Bold",
+                        "size": 16, "align": "centre", "format": "'{course_name}'"},
+        "cgpa": {"x": width / 2 + 20, "y": height - 390, "font": "Helvetica", "size": 14,
+                 "align": "centre", "format": "with a CGPA/percentage of {cgpa}"},
+        "signatory": {"x": margin + 10, "y": margin + 70, "font": "Helvetica", "size": 12},
+        "issued_on": {"x": margin + 10, "y": margin + 30, "font": "Helvetica", "size": 10,
+                      "format": "Issued on: {issued_on}"},
+        "verify_url": {"x": width / 2, "y": margin + 30, "font": "Helvetica-Oblique", "size": 9,
+                       "align": "centre", "format": "Verify at: {verify_url}"},
+        "hash_value": {"x": width / 2, "y": margin + 20, "font": "Helvetica", "size": 8,
+                       "align": "centre", "format": "Certificate ID: {hash_value}"},
+    }
+
+    return {
+        "page_size": [width, height],
+        "static": static,
+        "fields": fields,
+        "qr": {"x": width - margin - 80, "y": margin + 40, "size": 60},
+        "text_color": text_color,
+    }
+
+
+class StaticLayer:
+    """
+    The static part of a template, encoded once per template version.
+
+    The layer is drawn once on a scratch canvas, as a form XObject. What
+    that produces is kept: the form's operators (Flate-compressed), the
+    finished image XObjects (decoded, compressed and encoded) and the fonts,
+    in the order they were registered. apply() hands all of it to a new
+    canvas as is, so a render neither redraws the layer nor encodes the logo.
+    """
+
+    FORM_NAME = "StaticLayer"
+
+    def __init__(self, spec):
+        self.images = [
+            {**element, "image": ImageReader(element["path"])}
+            for element in spec["static"] if element["type"] == "image"
+        ]
+        readers = iter(self.images)
+        elements = [next(readers) if element["type"] == "image" else element for element in spec["static"]]
+
+        scratch = canvas.Canvas(None, pagesize=tuple(spec["page_size"]))
+        scratch.beginForm(self.FORM_NAME)
+        for element in elements:
+            _draw_static(scratch, element)
+        scratch.endForm()
+
+        doc = scratch._doc
+        form = doc.idToObject[doc.getXObjectName(self.FORM_NAME)]
+        self.content = zlib.compress(form.stream)
+        # F1, F2 ... in the operators refer to fonts by registration order
+        self.fonts = sorted(doc.fontMapping, key=lambda font: int(doc.fontMapping[font].lstrip("/F")))
+        self.xobjects = {
+            name: obj for name, obj in doc.idToObject.items() if isinstance(obj, PDFImageXObject)
+        }
+
+    def apply(self, c):
+        doc = c._doc
+        for name, obj in self.xobjects.items():
+            # Registered under the name drawImage() looks up, so it finds the image already encoded
+            if name not in doc.idToObject:
+                obj = copy.copy(obj)
+                obj.__dict__.pop("__InternalName__", None)
+                doc.Reference(obj, name)
+
+        c.beginForm(self.FORM_NAME)
+        # Only the form's resources are set up here; its operators are the kept stream
+        for font in self.fonts:
+            c.setFont(font, 1)
+        for element in self.images:
+            _draw_static(c, element)
+        contents = PDFStream(PDFDictionary({"Filter": PDFArray([PDFName("FlateDecode")])}), self.content)
+        c.endForm(Contents=contents)
+        c.doForm(self.FORM_NAME)
+
+
+def _draw_static(c, element):
+    kind = element["type"]
+    if kind == "rect":
+        c.setStrokeColor(HexColor(element.get("stroke", "#000000")))
+        c.setLineWidth(element.get("line_width", 1))
+        c.rect(element["x"], element["y"], element["width"], element["height"])
+    elif kind == "image":
+        c.drawImage(
+            element.get("image") or element["path"], element["x"], element["y"],
+            width=element["width"], height=element["height"],
+            mask=element.get("mask"),
+            preserveAspectRatio=element.get("preserve_aspect_ratio", False),
+        )
+    elif kind == "text":
+        _draw_text(c, element, element["text"])
+    else:
+        raise ValueError(f"Unknown template element type: {kind}")
+
+
+def _draw_text(c, element, text):
+    c.setFont(element["font"], element["size"])
+    if "color" in element:
+        c.setFillColor(HexColor(element["color"]))
+    align = element.get("align", "left")
+    if align == "centre":
+        c.drawCentredString(element["x"], element["y"], text)
+    elif align == "right":
+        c.drawRightString(element["x"], element["y"], text)
+    else:
+        c.drawString(element["x"], element["y"], text)
+
+
+class CertificateTemplate:
+    """A certificate layout: a cached static layer plus per-certificate fields."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.version = template_version(spec)
+        self._static = StaticLayer(spec)
+
+    def render(self, pdf_path, qr_matrix=None, **values):
+        """
+        Draw one certificate to `pdf_path`. `values` fill the template fields;
+        fields with an empty value are skipped. `qr_matrix` is the QR code's
+        module matrix (qrcode's get_matrix()), drawn as vector shapes.
+        The certificate hash, if given as `hash_value`, is also written to the
+        document's Subject, where verify-by-upload reads it back.
+        """
+        spec = self.spec
+        # invariant: fixed creation date and document ID, so equal inputs give identical bytes.
+        # Compression is set on this canvas, not in rl_config, which other ReportLab users share.
+        c = canvas.Canvas(pdf_path, pagesize=tuple(spec["page_size"]), invariant=1, pageCompression=1)
+        if values.get("hash_value"):
+            c.setSubject(CERTIFICATE_ID_SUBJECT.format(hash_value=values["hash_value"]))
+        self._static.apply(c)
+
+        c.setFillColor(HexColor(spec.get("text_color", "#000000")))
+        for name, field in spec["fields"].items():
+            value = values.get(name)
+            if not value:
+                continue
+            _draw_text(c, field, field.get("format", "{" + name + "}").format(**values))
+
+        qr = spec.get("qr")
+        if qr and qr_matrix is not None:
+            _draw_qr(c, qr_matrix, qr["x"], qr["y"], qr["size"])
+
+        c.save()
+        return pdf_path
+
+
+def _draw_qr(c, matrix, x, y, size):
+    """
+    Draw a QR module matrix as one filled vector path: a rectangle per run of
+    dark modules in a row. Coordinates are whole modules (the transform does
+    the scaling), so the operators are written with addLiteral() instead of
+    going through reportlab's per-number float formatting.
+    """
+    module = size / len(matrix)
+    rects = []
+    for r, row in enumerate(matrix):
+        run_start = None
+        for col, dark in enumerate(list(row) + [False]):
+            if dark and run_start is None:
+                run_start = col
+            elif not dark and run_start is not None:
+                rects.append(f"{run_start} {r} {col - run_start} 1 re")
+                run_start = None
+    c.saveState()
+    c.setFillColorRGB(0, 0, 0)
+    c.transform(module, 0, 0, -module, x, y + size)   # rows count down from the top edge
+    c.addLiteral(" ".join(rects) + " f")
+    c.restoreState()
+
+
+def template_version(spec) -> str:
+    """Hash of the spec plus the images it references, so edits give a new version."""
+    digest = hashlib.sha256(json.dumps(spec, sort_keys=True).encode())
+    for element in spec["static"]:
+        if element["type"] == "image":
+            stat = os.stat(element["path"])
+            digest.update(f"{element['path']}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.hexdigest()[:16]
+
+
+_templates = {}
+_current = {}
+_templates_lock = threading.Lock()
+
+# How often get_certificate_template() looks for an edited template or image
+TEMPLATE_CHECK_SECONDS = 10
+
+
+def load_template_spec(logo_path=DEFAULT_LOGO_PATH) -> dict:
+    """The spec from settings.CERTIFICATE_TEMPLATE_PATH (JSON) if set, else the default."""
+    path = getattr(settings, "CERTIFICATE_TEMPLATE_PATH", None)
+    if path:
+        with open(path, "r") as f:
+            return json.load(f)
+    return default_template_spec(logo_path)
+
+
+def get_certificate_template(logo_path=DEFAULT_LOGO_PATH) -> CertificateTemplate:
+    """
+    Return the current template, building its static layer only the first
+    time a given template version is seen in this process. The spec is
+    re-read (and its version recomputed) at most every TEMPLATE_CHECK_SECONDS.
+    """
+    key = (getattr(settings, "CERTIFICATE_TEMPLATE_PATH", None), logo_path)
+    current = _current.get(key)
+    if current is not None and time.monotonic() - current[1] < TEMPLATE_CHECK_SECONDS:
+        return current[0]
+
+    with _templates_lock:
+        spec = load_template_spec(logo_path)
+        version = template_version(spec)
+        template = _templates.get(version)
+        if template is None:
+            template = _templates[version] = CertificateTemplate(spec)
+        _current[key] = (template, time.monotonic())
+    return template
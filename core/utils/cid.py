@@ -0,0 +1,165 @@
+"""
+Local IPFS CID computation, matching what `ipfs add` / Pinata produce with
+their defaults: UnixFS files in dag-pb, fixed 256 KiB chunks, balanced tree
+with up to 174 links per node.
+
+- CIDv0 ("Qm..."): leaves are dag-pb UnixFS nodes.
+- CIDv1 ("bafy..."/"bafk..."): leaves are raw blocks, as with `--cid-version=1`.
+"""
+import hashlib
+
+CHUNK_SIZE = 256 * 1024
+MAX_LINKS = 174
+
+DAG_PB = 0x70
+RAW = 0x55
+SHA2_256 = 0x12
+UNIXFS_FILE = 2
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B32_ALPHABET = "abcdefghijklmnopqrstuvwxyz234567"
+
+
+# ----------------------------
+# Encoding helpers
+# ----------------------------
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field_varint(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+
+def _field_bytes(field: int, value: bytes) -> bytes:
+    return _varint(field << 3 | 2) + _varint(len(value)) + value
+
+
+def _unixfs_file(data: bytes = None, filesize: int = 0, blocksizes=()) -> bytes:
+    msg = _field_varint(1, UNIXFS_FILE)
+    if data:    # go-unixfs omits the field for empty data
+        msg += _field_bytes(2, data)
+    msg += _field_varint(3, filesize)
+    for size in blocksizes:
+        msg += _field_varint(4, size)
+    return msg
+
+
+def _pb_node(data: bytes, links=()) -> bytes:
+    """dag-pb node; links are (cid_bytes, tsize) and are encoded before the data, as go-ipfs does."""
+    node = b""
+    for cid_bytes, tsize in links:
+        link = _field_bytes(1, cid_bytes) + _field_bytes(2, b"") + _field_varint(3, tsize)
+        node += _field_bytes(2, link)
+    return node + _field_bytes(1, data)
+
+
+def _b58encode(raw: bytes) -> str:
+    n = int.from_bytes(raw, "big")
+    out = ""
+    while n:
+        n, rem = divmod(n, 58)
+        out = _B58_ALPHABET[rem] + out
+    pad = len(raw) - len(raw.lstrip(b"\0"))
+    return "1" * pad + out
+
+
+def _b32encode(raw: bytes) -> str:
+    bits = int.from_bytes(raw, "big")
+    nbits = len(raw) * 8
+    out = []
+    for shift in range(nbits - 5, -5, -5):
+        index = (bits >> shift) & 31 if shift >= 0 else (bits << -shift) & 31
+        out.append(_B32_ALPHABET[index])
+    return "".join(out)
+
+
+class _Block:
+    """A finished node: its CID bytes, the link Tsize and the file bytes under it."""
+    __slots__ = ("cid", "tsize", "filesize")
+
+    def __init__(self, cid, tsize, filesize):
+        self.cid = cid
+        self.tsize = tsize
+        self.filesize = filesize
+
+
+# ----------------------------
+# CID Builder
+# ----------------------------
+class CidBuilder:
+    """
+    Incremental CID computation: feed the file with update() in pieces of
+    any size, then call cid(). Only one chunk of data is held at a time.
+    """
+
+    def __init__(self, version: int = 0):
+        if version not in (0, 1):
+            raise ValueError("CID version must be 0 or 1")
+        self.version = version
+        self._buffer = bytearray()
+        self._leaves = []
+
+    def update(self, data: bytes):
+        self._buffer += data
+        while len(self._buffer) >= CHUNK_SIZE:
+            self._add_leaf(bytes(self._buffer[:CHUNK_SIZE]))
+            del self._buffer[:CHUNK_SIZE]
+        return self
+
+    def _cid_bytes(self, codec, block: bytes) -> bytes:
+        multihash = bytes([SHA2_256, 32]) + hashlib.sha256(block).digest()
+        if self.version == 0:
+            return multihash
+        return _varint(1) + _varint(codec) + multihash
+
+    def _add_leaf(self, chunk: bytes):
+        if self.version == 1:
+            self._leaves.append(_Block(self._cid_bytes(RAW, chunk), len(chunk), len(chunk)))
+        else:
+            block = _pb_node(_unixfs_file(chunk, len(chunk)))
+            self._leaves.append(_Block(self._cid_bytes(DAG_PB, block), len(block), len(chunk)))
+
+    def _parent(self, children) -> _Block:
+        filesize = sum(child.filesize for child in children)
+        data = _unixfs_file(None, filesize, [child.filesize for child in children])
+        block = _pb_node(data, [(child.cid, child.tsize) for child in children])
+        return _Block(
+            self._cid_bytes(DAG_PB, block),
+            len(block) + sum(child.tsize for child in children),
+            filesize,
+        )
+
+    def cid(self) -> str:
+        if self._buffer or not self._leaves:
+            self._add_leaf(bytes(self._buffer))
+            self._buffer.clear()
+
+        # Balanced layout: fill each subtree completely, left to right.
+        level = self._leaves
+        while len(level) > 1:
+            level = [self._parent(level[i:i + MAX_LINKS]) for i in range(0, len(level), MAX_LINKS)]
+        root = level[0].cid
+
+        if self.version == 0:
+            return _b58encode(root)
+        return "b" + _b32encode(root)
+
+
+def compute_cid(data, version: int = 0) -> str:
+    """CID of `data` (bytes, or an iterable of byte chunks) as IPFS would pin it."""
+    builder = CidBuilder(version)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        builder.update(bytes(data))
+    else:
+        for piece in data:
+            builder.update(piece)
+    return builder.cid()
@@ -6,30 +6,37 @@ load_dotenv()
 
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 
+CERTIFICATE_EMAIL_SUBJECT = "Your Certificate is Ready"
 
-def send_certificate_email(student_email: str, student_name: str, certificate_path: str, qr_path: str):
-    """
-    Send an email with certificate and optional QR code attached.
-    """
-    if not EMAIL_HOST_USER:
-        raise ValueError("❌ EMAIL_HOST_USER not set in .env")
 
-    subject = "Your Certificate is Ready"
-    body = f"""
+def certificate_email_body(student_name: str) -> str:
+    return f"""
     Hello {student_name},
 
     🎉 Congratulations! Your certificate has been generated and verified on blockchain.
 
     You can find it attached to this email.
 
-    Regards,  
+    Regards,
     Educhain Team
     """
 
-    email = EmailMessage(subject, body, EMAIL_HOST_USER, [student_email])
+
+def send_certificate_email(student_email: str, student_name: str, certificate_path: str, qr_png: bytes = None):
+    """
+    Send an email with certificate and optional QR code (PNG bytes) attached.
+    Sends immediately on its own connection; bulk issuance goes through the
+    outbox instead (core.outbox.queue_certificate_email).
+    """
+    if not EMAIL_HOST_USER:
+        raise ValueError("❌ EMAIL_HOST_USER not set in .env")
+
+    email = EmailMessage(
+        CERTIFICATE_EMAIL_SUBJECT, certificate_email_body(student_name), EMAIL_HOST_USER, [student_email]
+    )
     email.attach_file(certificate_path)
 
-    if qr_path and os.path.exists(qr_path):
-        email.attach_file(qr_path)
+    if qr_png:
+        email.attach("certificate_qr.png", qr_png, "image/png")
 
     email.send()
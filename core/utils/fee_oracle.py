@@ -0,0 +1,160 @@
+"""
+EIP-1559 fee estimates from eth_feeHistory, cached.
+
+The oracle samples priority-fee percentiles over the last FEE_HISTORY_BLOCKS
+blocks and the next block's base fee, and turns them into fees per urgency
+tier. Estimates are served from memory; once older than FEE_ORACLE_TTL the
+stale estimate is still returned while a background thread fetches a new
+one, so a transaction never waits on a fee RPC unless the cache is empty or
+older than FEE_ORACLE_MAX_AGE.
+"""
+import os
+import time
+import threading
+from statistics import median
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GWEI = 10 ** 9
+
+FEE_ORACLE_TTL = float(os.getenv("FEE_ORACLE_TTL", "6"))            # seconds (~3 Polygon blocks)
+FEE_ORACLE_MAX_AGE = float(os.getenv("FEE_ORACLE_MAX_AGE", "60"))   # older than this: refresh before answering
+FEE_HISTORY_BLOCKS = int(os.getenv("FEE_HISTORY_BLOCKS", "20"))
+# Polygon PoS rejects tips below 30 gwei; the old hard-coded tip was this value.
+MIN_PRIORITY_FEE = int(float(os.getenv("MIN_PRIORITY_FEE_GWEI", "30")) * GWEI)
+
+# urgency -> (priority-fee percentile of recent blocks, headroom on the next base fee).
+# maxFeePerGas is only a cap; the base fee actually paid is whatever the block charges.
+TIERS = {
+    "slow": (10, 1.25),
+    "standard": (50, 1.5),
+    "fast": (90, 2.0),
+}
+DEFAULT_URGENCY = "standard"
+
+# Nodes only accept a same-nonce replacement that raises both fees by >= 10%.
+REPLACEMENT_BUMP = 1.125
+
+
+def _web3_fee_history(block_count, newest_block, percentiles):
+    from core.utils.blockchain import get_web3
+    return get_web3().eth.fee_history(block_count, newest_block, percentiles)
+
+
+class FeeOracle:
+    def __init__(self, fee_history=_web3_fee_history, ttl=FEE_ORACLE_TTL, max_age=FEE_ORACLE_MAX_AGE,
+                 blocks=FEE_HISTORY_BLOCKS, min_priority_fee=MIN_PRIORITY_FEE, background=True,
+                 clock=time.monotonic):
+        self.fee_history = fee_history
+        self.ttl = ttl
+        self.max_age = max_age
+        self.blocks = blocks
+        self.min_priority_fee = min_priority_fee
+        self.background = background
+        self.clock = clock
+        self.percentiles = sorted({percentile for percentile, _ in TIERS.values()})
+
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._snapshot = None       # {"at", "base_fee", "tips": {percentile: wei}}
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.served = 0
+
+    def estimate(self, urgency=DEFAULT_URGENCY) -> dict:
+        """maxFeePerGas / maxPriorityFeePerGas (wei) for an urgency tier, ready to go into a transaction."""
+        if urgency not in TIERS:
+            raise ValueError(f"Unknown urgency {urgency!r}; expected one of {', '.join(TIERS)}")
+        snapshot = self._current()
+        percentile, headroom = TIERS[urgency]
+        tip = max(snapshot["tips"][percentile], self.min_priority_fee)
+        return {
+            "maxFeePerGas": int(snapshot["base_fee"] * headroom) + tip,
+            "maxPriorityFeePerGas": tip,
+        }
+
+    def replacement_fees(self, transaction, urgency="fast") -> dict:
+        """
+        Fees for re-broadcasting a stuck transaction: the current estimate for
+        `urgency`, but never less than the minimum bump a node accepts.
+        """
+        fresh = self.estimate(urgency)
+        tip = max(fresh["maxPriorityFeePerGas"], int(transaction["maxPriorityFeePerGas"] * REPLACEMENT_BUMP) + 1)
+        max_fee = max(fresh["maxFeePerGas"], int(transaction["maxFeePerGas"] * REPLACEMENT_BUMP) + 1, tip)
+        return {"maxFeePerGas": max_fee, "maxPriorityFeePerGas": tip}
+
+    def refresh(self):
+        history = self.fee_history(self.blocks, "latest", self.percentiles)
+        # Empty blocks report zero rewards; they say nothing about the going rate.
+        rewards = [
+            reward for reward, used in zip(history["reward"], history["gasUsedRatio"]) if used > 0
+        ]
+        tips = {
+            percentile: int(median(reward[i] for reward in rewards)) if rewards else 0
+            for i, percentile in enumerate(self.percentiles)
+        }
+        snapshot = {
+            "at": self.clock(),
+            "base_fee": history["baseFeePerGas"][-1],   # the last entry is the next block's base fee
+            "tips": tips,
+        }
+        with self._lock:
+            self._snapshot = snapshot
+            self.refreshes += 1
+        return snapshot
+
+    def _current(self):
+        with self._lock:
+            snapshot = self._snapshot
+            self.served += 1
+            age = self.clock() - snapshot["at"] if snapshot else None
+            start_background = (
+                self.background and snapshot is not None and self.ttl < age <= self.max_age and not self._refreshing
+            )
+            if start_background:
+                self._refreshing = True
+
+        if start_background:
+            threading.Thread(target=self._background_refresh, daemon=True, name="fee-oracle").start()
+            return snapshot
+        if snapshot is None or age > (self.max_age if self.background else self.ttl):
+            return self.refresh()
+        return snapshot
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            # Keep serving the previous estimate; the next caller past the TTL retries.
+            with self._lock:
+                self.refresh_errors += 1
+            print(f"⚠ Fee oracle refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                "served": self.served,
+                "refreshes": self.refreshes,
+                "refreshErrors": self.refresh_errors,
+                "ageSeconds": round(self.clock() - snapshot["at"], 1) if snapshot else None,
+                "baseFeeGwei": snapshot["base_fee"] / GWEI if snapshot else None,
+                "tipsGwei": {p: tip / GWEI for p, tip in snapshot["tips"].items()} if snapshot else None,
+            }
+
+
+_oracle = None
+_oracle_lock = threading.Lock()
+
+
+def get_fee_oracle() -> FeeOracle:
+    global _oracle
+    if _oracle is None:
+        with _oracle_lock:
+            if _oracle is None:
+                _oracle = FeeOracle()
+    return _oracle
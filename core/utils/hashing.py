@@ -1,12 +1,31 @@
-from web3 import Web3
+from eth_hash.auto import keccak
+from hexbytes import HexBytes
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def keccak_stream():
+    """
+    Incremental keccak256 with update()/digest(). eth_hash's keccak.new()
+    keeps every chunk it was fed (so it can be copied), which defeats
+    streaming; pycryptodome's object, which web3 installs, doesn't.
+    """
+    try:
+        from Crypto.Hash import keccak as cryptodome_keccak
+    except ImportError:
+        return keccak.new(b"")
+    return cryptodome_keccak.new(digest_bits=256)
 
 
 def generate_hash_from_file(file_path: str) -> bytes:
-    """Generate keccak256 hash from a file"""
+    """Generate keccak256 hash from a file, read in chunks so large files aren't loaded into memory"""
+    digest = keccak_stream()
     with open(file_path, "rb") as f:
-        return Web3.keccak(f.read())
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return HexBytes(digest.digest())
 
 
 def generate_hash_from_text(text: str) -> bytes:
     """Generate keccak256 hash from text"""
-    return Web3.keccak(text.encode())
+    return HexBytes(keccak(text.encode()))
@@ -0,0 +1,61 @@
+from eth_hash.auto import keccak
+
+# Must match Cert.sol:
+#   leaf   = keccak256(0x00 || hash || cid)
+#   parent = keccak256(0x01 || min(a, b) || max(a, b))
+# Sorting each pair means a proof is just the list of siblings, no left/right flags.
+# The prefixes keep leaves and parents apart: a leaf's preimage never equals a
+# parent's, so the two children of an inner node can't pass as a certificate.
+LEAF_PREFIX = b"\x00"
+PARENT_PREFIX = b"\x01"
+
+
+def certificate_leaf(cert_hash: bytes, cid: str) -> bytes:
+    """Compute the Merkle leaf for a certificate hash and its IPFS CID."""
+    return keccak(LEAF_PREFIX + cert_hash + cid.encode())
+
+
+def hash_pair(a: bytes, b: bytes) -> bytes:
+    """Hash two sibling nodes in sorted order."""
+    return keccak(PARENT_PREFIX + (a + b if a < b else b + a))
+
+
+class MerkleTree:
+    """
+    Binary Merkle tree over certificate leaves.
+    An odd node at the end of a level is promoted unchanged to the next level.
+    """
+
+    def __init__(self, leaves):
+        if not leaves:
+            raise ValueError("Cannot build a Merkle tree with no leaves")
+
+        self.levels = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            parents = [hash_pair(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                parents.append(level[-1])
+            self.levels.append(parents)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> list:
+        """Return the sibling hashes needed to prove the leaf at `index`."""
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(level[sibling])
+            index //= 2
+        return proof
+
+
+def verify_proof(leaf: bytes, proof: list, root: bytes) -> bool:
+    """Check a Merkle proof locally (same algorithm as the contract)."""
+    node = leaf
+    for sibling in proof:
+        node = hash_pair(node, sibling)
+    return node == root
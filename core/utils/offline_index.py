@@ -0,0 +1,213 @@
+"""
+Offline verification index: a snapshot of every certificate hash confirmed
+on chain, in a file partners can verify against without the database or an
+RPC. Standard library only, so this module can be shipped on its own.
+
+File layout (little-endian):
+
+    header   96 bytes   magic, version, kind (snapshot / delta), count,
+                        block (state as of), base_block (delta: applies on
+                        top of the file for this block), block_hash,
+                        contract address
+    hashes   32 * count sorted certificate hashes
+    revoked  ceil(count / 8) bytes, bit i set if hashes[i] is revoked
+
+A snapshot holds every certificate issued up to `block`. A delta holds the
+certificates issued or revoked in (base_block, block], with their state at
+`block`. A reader maps the files and binary-searches them in place: nothing
+is loaded or parsed beyond the header, so a lookup touches a few pages.
+
+    python core/utils/offline_index.py registry.idx [delta1.idx ...] -- <hash> [<hash> ...]
+"""
+import os
+import sys
+import mmap
+import struct
+
+MAGIC = b"BCIDX\0\0\0"
+FORMAT_VERSION = 1
+SNAPSHOT = 0
+DELTA = 1
+
+HASH_SIZE = 32
+HEADER = struct.Struct("<8sHHIQQQ32s20s4x")     # 96 bytes
+assert HEADER.size == 96
+
+VALID = "valid"
+REVOKED = "revoked"
+
+
+def _to_bytes(cert_hash) -> bytes:
+    if isinstance(cert_hash, (bytes, bytearray, memoryview)):
+        raw = bytes(cert_hash)
+    else:
+        text = cert_hash.strip()
+        raw = bytes.fromhex(text[2:] if text[:2] in ("0x", "0X") else text)
+    if len(raw) != HASH_SIZE:
+        raise ValueError(f"Expected a {HASH_SIZE}-byte hash, got {len(raw)} bytes")
+    return raw
+
+
+# ----------------------------
+# Writer
+# ----------------------------
+def write_index(path, entries, block, kind=SNAPSHOT, base_block=0, block_hash=b"", contract=b""):
+    """
+    Write an index file from (hash_bytes, revoked) pairs in ascending hash
+    order, streaming: only the revocation bitmap is kept in memory. The file
+    is written next to `path` and renamed into place. Returns the count.
+    """
+    tmp_path = f"{path}.tmp"
+    bitmap = bytearray()
+    count = 0
+    previous = None
+    with open(tmp_path, "wb") as f:
+        f.write(bytes(HEADER.size))
+        for raw, revoked in entries:
+            if previous is not None and raw <= previous:
+                raise ValueError("Index entries must be unique and in ascending hash order")
+            f.write(raw)
+            if count % 8 == 0:
+                bitmap.append(0)
+            if revoked:
+                bitmap[-1] |= 1 << (count % 8)
+            previous = raw
+            count += 1
+        f.write(bitmap)
+        f.seek(0)
+        f.write(HEADER.pack(
+            MAGIC, FORMAT_VERSION, kind, 0, count, block, base_block,
+            block_hash.rjust(32, b"\0"), contract.rjust(20, b"\0"),
+        ))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return count
+
+
+# ----------------------------
+# Reader
+# ----------------------------
+class OfflineIndex:
+    """One memory-mapped index file (snapshot or delta)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER.size:
+            raise ValueError(f"{path}: not an offline index (too short)")
+        (magic, version, self.kind, _, self.count, self.block, self.base_block,
+         self.block_hash, self.contract) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not an offline index")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: index format {version}, this reader supports {FORMAT_VERSION}")
+        self._bitmap_offset = HEADER.size + self.count * HASH_SIZE
+        if len(self._mm) != self._bitmap_offset + (self.count + 7) // 8:
+            raise ValueError(f"{path}: truncated or corrupt (size doesn't match {self.count} entries)")
+
+    def __len__(self):
+        return self.count
+
+    def _position(self, raw: bytes):
+        mm = self._mm
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = HEADER.size + mid * HASH_SIZE
+            probe = mm[offset:offset + HASH_SIZE]
+            if probe < raw:
+                lo = mid + 1
+            elif probe > raw:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def status(self, cert_hash):
+        """VALID, REVOKED, or None if the hash isn't in this file."""
+        position = self._position(_to_bytes(cert_hash))
+        if position is None:
+            return None
+        revoked = self._mm[self._bitmap_offset + position // 8] >> (position % 8) & 1
+        return REVOKED if revoked else VALID
+
+    def __contains__(self, cert_hash):
+        return self.status(cert_hash) is not None
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class OfflineRegistry:
+    """
+    A snapshot plus the deltas that follow it. Deltas must chain: each one's
+    base_block is the block of the file before it.
+    """
+
+    def __init__(self, snapshot_path, delta_paths=()):
+        self.files = [OfflineIndex(snapshot_path)]
+        if self.files[0].kind != SNAPSHOT:
+            raise ValueError(f"{snapshot_path} is a delta; the first file must be a snapshot")
+        for path in delta_paths:
+            delta = OfflineIndex(path)
+            if delta.kind != DELTA:
+                raise ValueError(f"{path} is a snapshot; only the first file can be one")
+            if delta.base_block != self.files[-1].block:
+                raise ValueError(
+                    f"{path} applies on top of block {delta.base_block}, "
+                    f"but the files before it end at block {self.files[-1].block}"
+                )
+            if delta.contract != self.files[0].contract:
+                raise ValueError(f"{path} is for a different contract")
+            self.files.append(delta)
+
+    @property
+    def block(self):
+        return self.files[-1].block
+
+    def status(self, cert_hash):
+        """VALID, REVOKED, or None if the hash was not issued as of `block`. Newest file wins."""
+        raw = _to_bytes(cert_hash)
+        for index in reversed(self.files):
+            state = index.status(raw)
+            if state is not None:
+                return state
+        return None
+
+    def close(self):
+        for index in self.files:
+            index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv):
+    if "--" not in argv or argv.index("--") == 0:
+        print(__doc__.strip().splitlines()[-1].strip())
+        return 2
+    split = argv.index("--")
+    with OfflineRegistry(argv[0], argv[1:split]) as registry:
+        print(f"Registry as of block {registry.block}")
+        for cert_hash in argv[split + 1:]:
+            try:
+                state = registry.status(cert_hash)
+            except ValueError as e:
+                state = f"invalid ({e})"
+            print(f"{cert_hash}: {state or 'not issued'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
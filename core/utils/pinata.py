@@ -1,28 +1,117 @@
 import os
-import requests
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
 
 PINATA_JWT = os.getenv("PINATA_JWT")
-PINATA_BASE_URL = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+PINATA_BASE_URL = os.getenv("PINATA_BASE_URL", "https://api.pinata.cloud/pinning/pinFileToIPFS")
+PINATA_TIMEOUT = float(os.getenv("PINATA_TIMEOUT", "60"))              # seconds per request
+PINATA_MAX_RETRIES = int(os.getenv("PINATA_MAX_RETRIES", "5"))
+PINATA_UPLOAD_WORKERS = int(os.getenv("PINATA_UPLOAD_WORKERS", "8"))   # concurrent uploads in upload_many
+PINATA_POOL_SIZE = int(os.getenv("PINATA_POOL_SIZE", "16"))            # keep-alive connections kept open
+PINATA_CID_VERSION = int(os.getenv("PINATA_CID_VERSION", "0"))         # 0 = "Qm...", 1 = "bafy..."
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
 
-def upload_to_pinata(file_path: str) -> str:
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    """Shared session, so uploads reuse keep-alive connections instead of a new TLS handshake each."""
+    global _session
+    import requests     # deferred: ~60 ms of import time that web workers don't need
+    from requests.adapters import HTTPAdapter
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PINATA_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _read_source(source, filename=None):
+    """Return (filename, bytes) for a path, bytes, or file-like buffer (e.g. BytesIO)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return filename or "certificate.pdf", bytes(source)
+    if hasattr(source, "read"):
+        data = source.getvalue() if hasattr(source, "getvalue") else source.read()
+        name = filename or os.path.basename(getattr(source, "name", "") or "certificate.pdf")
+        return name, data
+    with open(source, "rb") as file:
+        return filename or os.path.basename(source), file.read()
+
+
+def _backoff(attempt, response=None) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(BACKOFF_CAP, float(retry_after))
+    # "Full jitter": spreads retries from many concurrent uploads apart.
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def upload_to_pinata(source, filename: str = None) -> str:
     """
     Upload a file to Pinata (IPFS).
-    :param file_path: Local path of the file
+    :param source: Local file path, bytes, or a file-like buffer
+    :param filename: Name to pin the file under (defaults to the path's basename)
     :return: IPFS hash (CID)
+
+    Connection errors, timeouts and 429/5xx responses are retried with
+    jittered exponential backoff, up to PINATA_MAX_RETRIES times.
     """
     if not PINATA_JWT:
         raise ValueError("❌ Missing PINATA_JWT in .env")
+    import requests
 
     headers = {"Authorization": f"Bearer {PINATA_JWT}"}
+    options = {"pinataOptions": json.dumps({"cidVersion": PINATA_CID_VERSION})}
+    name, data = _read_source(source, filename)
+    session = get_session()
+
+    for attempt in range(PINATA_MAX_RETRIES + 1):
+        try:
+            response = session.post(
+                PINATA_BASE_URL, files={"file": (name, data)}, data=options, headers=headers,
+                timeout=PINATA_TIMEOUT
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == PINATA_MAX_RETRIES:
+                raise Exception(f"❌ Pinata upload failed: {e}") from e
+            time.sleep(_backoff(attempt))
+            continue
+
+        if response.status_code == 200:
+            return response.json().get("IpfsHash")
+        if response.status_code in RETRY_STATUSES and attempt < PINATA_MAX_RETRIES:
+            time.sleep(_backoff(attempt, response))
+            continue
+        raise Exception(f"❌ Pinata upload failed ({response.status_code}): {response.text}")
 
-    with open(file_path, "rb") as file:
-        files = {"file": (os.path.basename(file_path), file)}
-        response = requests.post(PINATA_BASE_URL, files=files, headers=headers)
 
-    if response.status_code == 200:
-        return response.json().get("IpfsHash")
-    raise Exception(f"❌ Pinata upload failed: {response.text}")
+def upload_many(sources, workers: int = PINATA_UPLOAD_WORKERS, return_exceptions: bool = False) -> list:
+    """
+    Upload many files (paths, bytes or buffers) with at most `workers` in
+    flight, returning their CIDs in input order. With return_exceptions, a
+    failed upload's exception takes its place instead of being raised.
+    """
+    def upload(source):
+        try:
+            return upload_to_pinata(source)
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="pinata") as pool:
+        return list(pool.map(upload, sources))
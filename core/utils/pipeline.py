@@ -0,0 +1,154 @@
+import queue
+import threading
+import time
+from django.db import connections
+
+_DONE = object()
+
+
+class StageStats:
+    """Per-stage counters used for the throughput report."""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def record(self, started, seconds, ok):
+        with self._lock:
+            if self.started_at is None or started < self.started_at:
+                self.started_at = started
+            self.finished_at = max(self.finished_at or 0.0, started + seconds)
+            self.busy_seconds += seconds
+            if ok:
+                self.processed += 1
+            else:
+                self.failed += 1
+
+    @property
+    def wall_seconds(self):
+        if self.started_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    @property
+    def throughput(self):
+        """Items completed per second of wall time the stage was active."""
+        wall = self.wall_seconds
+        return self.processed / wall if wall else 0.0
+
+    @property
+    def avg_latency(self):
+        total = self.processed + self.failed
+        return self.busy_seconds / total if total else 0.0
+
+
+class Stage:
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+
+
+class StageFailure:
+    """Wraps an item that failed in a stage; later stages pass it through."""
+
+    def __init__(self, item, stage, error):
+        self.item = item
+        self.stage = stage
+        self.error = error
+
+
+class Pipeline:
+    """
+    Runs items through a chain of stages, each with its own bounded worker
+    pool. Stages are connected by bounded queues so a slow stage applies
+    backpressure instead of letting work pile up in memory.
+
+    Results (and StageFailure objects) are yielded in completion order on the
+    calling thread, so callers can do DB writes without sharing connections.
+    If iterating `items` itself raises, the items already fed are finished
+    and the error is then re-raised from run().
+    """
+
+    def __init__(self, stages, queue_size=32):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = [StageStats(stage.name, stage.workers) for stage in stages]
+        self._feed_error = None
+
+    def run(self, items):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        self._feed_error = None
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]), daemon=True)]
+
+        for index, stage in enumerate(self.stages):
+            workers = [
+                threading.Thread(
+                    target=self._work,
+                    args=(stage, self.stats[index], queues[index], queues[index + 1]),
+                    daemon=True,
+                )
+                for _ in range(stage.workers)
+            ]
+            threads.extend(workers)
+            threads.append(threading.Thread(
+                target=self._close, args=(workers, queues[index + 1]), daemon=True
+            ))
+
+        for thread in threads:
+            thread.start()
+
+        output = queues[-1]
+        while True:
+            result = output.get()
+            if result is _DONE:
+                break
+            yield result
+        if self._feed_error is not None:
+            raise self._feed_error
+
+    def _feed(self, items, out_queue):
+        try:
+            for item in items:
+                out_queue.put(item)
+        except Exception as e:
+            self._feed_error = e
+        finally:
+            out_queue.put(_DONE)
+
+    @staticmethod
+    def _work(stage, stats, in_queue, out_queue):
+        try:
+            while True:
+                item = in_queue.get()
+                if item is _DONE:
+                    # Let sibling workers see the sentinel too.
+                    in_queue.put(_DONE)
+                    return
+                if isinstance(item, StageFailure):
+                    out_queue.put(item)
+                    continue
+
+                started = time.time()
+                try:
+                    result = stage.func(item)
+                except Exception as e:
+                    stats.record(started, time.time() - started, ok=False)
+                    out_queue.put(StageFailure(item, stage.name, e))
+                else:
+                    stats.record(started, time.time() - started, ok=True)
+                    out_queue.put(result)
+        finally:
+            connections.close_all()
+
+    @staticmethod
+    def _close(workers, out_queue):
+        for worker in workers:
+            worker.join()
+        out_queue.put(_DONE)
@@ -0,0 +1,153 @@
+import os
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", os.cpu_count() or 1))
+
+
+def _init_worker(settings_module):
+    """Runs once in each worker process: set up Django and warm the renderer."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    warm_renderer()
+
+
+def warm_renderer():
+    """Build the certificate template (its static layer encodes the logo) up front."""
+    from core.utils.certificate_template import DEFAULT_LOGO_PATH, get_certificate_template
+    get_certificate_template(DEFAULT_LOGO_PATH)
+
+
+def _pool_context():
+    # The pool is used from threads (pipeline stages, job threads). Forking a threaded
+    # process copies locks other threads may be holding, so workers are started from a
+    # clean forkserver process (or spawned where there is no forkserver) instead.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _call(func, args, kwargs):
+    result = func(*args, **kwargs)
+    # BytesIO buffers don't pickle; hand back their contents instead.
+    if hasattr(result, "getvalue"):
+        result = result.getvalue()
+    return result
+
+
+class RenderService:
+    """
+    Runs CPU-bound render functions (e.g. core.issuance.render_certificate)
+    on a process pool, one worker per core by default.
+
+    Functions and their arguments must be picklable (module-level functions,
+    plain values). With workers=1, or where a process pool can't be started,
+    everything runs sequentially in the calling process instead, so the same
+    code works from views, management commands and tests. Long-running
+    commands call start() up front, before they start their own threads.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS):
+        self.workers = max(1, workers)
+        self._pool = None
+        self._sequential = self.workers == 1
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None and not self._sequential:
+                try:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=_pool_context(),
+                        initializer=_init_worker,
+                        initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "blockcreds.settings"),),
+                    )
+                except (OSError, NotImplementedError, ImportError) as e:
+                    logger.warning(f"[Render Service] Process pool unavailable ({e}); rendering sequentially")
+                    self._sequential = True
+            return self._pool
+
+    def start(self):
+        """Create the pool and wait for every worker to be up (Django loaded, renderer warm)."""
+        if self._get_pool() is not None:
+            for future in [self.submit(os.getpid) for _ in range(self.workers)]:
+                future.result()
+        return self
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        """Schedule one render; returns a Future for its result."""
+        pool = self._get_pool()
+        if pool is not None:
+            try:
+                return pool.submit(_call, func, args, kwargs)
+            except BrokenProcessPool:
+                logger.warning("[Render Service] Process pool died; rendering sequentially")
+                self._sequential = True
+
+        future = Future()
+        try:
+            future.set_result(_call(func, args, kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def map(self, func, jobs, return_exceptions=False):
+        """
+        Render every job (a dict of keyword arguments for `func`) and yield
+        the results in input order. Only a few jobs per worker are in flight
+        at once, so `jobs` can be a long generator. With return_exceptions,
+        a failed job yields its exception instead of stopping the run.
+        """
+        window = deque()
+        jobs = iter(jobs)
+        exhausted = False
+        while True:
+            while not exhausted and len(window) < self.workers * 4:
+                try:
+                    window.append(self.submit(func, **next(jobs)))
+                except StopIteration:
+                    exhausted = True
+            if not window:
+                return
+
+            future = window.popleft()
+            try:
+                yield future.result()
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                yield e
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_render_service() -> RenderService:
+    """Process-wide shared service, created on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = RenderService()
+        return _service
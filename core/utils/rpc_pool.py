@@ -0,0 +1,263 @@
+"""
+JSON-RPC provider spread over several endpoints (POLYGON_RPC_URLS).
+
+Each endpoint keeps its own keep-alive session and a rolling picture of its
+health: exponentially weighted latency and error rate, plus a cooldown after
+failures. Every request goes to the healthiest endpoint; connection errors,
+timeouts, non-200 replies (429, 5xx) and "limit exceeded" RPC errors fail
+over to the next one. Reads can optionally be hedged: if the first endpoint
+hasn't answered within RPC_HEDGE_AFTER seconds the same request is also sent
+to the runner-up and whichever answers first wins.
+"""
+import os
+import json
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3.providers.base import JSONBaseProvider
+from dotenv import load_dotenv
+
+load_dotenv()
+
+POLYGON_RPC_URLS = [
+    url.strip()
+    for url in (os.getenv("POLYGON_RPC_URLS") or os.getenv("POLYGON_RPC_URL") or "").split(",")
+    if url.strip()
+]
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))             # seconds per attempt
+RPC_HEDGE_AFTER = float(os.getenv("RPC_HEDGE_AFTER", "0"))      # seconds; 0 disables hedged reads
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", "16"))           # keep-alive connections per endpoint
+RPC_COOLDOWN_BASE = 1.0
+RPC_COOLDOWN_CAP = 60.0
+EWMA_ALPHA = 0.2
+EXPLORE_RATE = 0.05     # share of requests sent to the runner-up, so its latency stays current
+
+# -32005: limit exceeded (rate limit), -32603: internal error. Other RPC errors
+# (e.g. "execution reverted") are real answers and are returned as-is.
+RETRY_RPC_CODES = {-32005, -32603}
+
+# Sent to the primary endpoint (first in the list) whenever it is healthy:
+# nonces and broadcasts should see one node's mempool.
+STICKY_METHODS = {"eth_sendRawTransaction", "eth_getTransactionCount"}
+NEVER_HEDGE = {"eth_sendRawTransaction"}
+
+
+class EndpointError(Exception):
+    """An endpoint failed in a way another endpoint might not."""
+
+
+class RPCUnavailable(ConnectionError):
+    """No endpoint answered; carries each endpoint's error."""
+
+
+class Endpoint:
+    def __init__(self, url, pool_size=RPC_POOL_SIZE):
+        self.url = url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self.latency = None         # EWMA seconds, None until the first answer
+        self.error_rate = 0.0       # EWMA of failures (0..1)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.recent = deque(maxlen=256)
+
+    @property
+    def label(self) -> str:
+        """scheme://host[:port] only; RPC URLs often carry an API key in the path."""
+        parts = urlsplit(self.url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def available(self, now=None) -> bool:
+        return (now or time.monotonic()) >= self.cooldown_until
+
+    def score(self) -> float:
+        """Lower is better: expected latency, inflated by recent errors and queued requests."""
+        latency = self.latency if self.latency is not None else 0.0
+        return latency * (1 + self.in_flight) * (1 + 10 * self.error_rate)
+
+    def post(self, payload: bytes, timeout: float) -> dict:
+        with self._lock:
+            self.in_flight += 1
+        started = time.monotonic()
+        try:
+            response = self.session.post(
+                self.url, data=payload, headers={"Content-Type": "application/json"}, timeout=timeout
+            )
+            if response.status_code != 200:
+                raise EndpointError(f"HTTP {response.status_code}")
+            result = json.loads(response.content)
+            error = result.get("error") if isinstance(result, dict) else None
+            if error and error.get("code") in RETRY_RPC_CODES:
+                raise EndpointError(f"RPC error {error.get('code')}: {error.get('message')}")
+        except EndpointError:
+            self._record(time.monotonic() - started, ok=False)
+            raise
+        except (requests.RequestException, ValueError) as e:
+            self._record(time.monotonic() - started, ok=False)
+            raise EndpointError(str(e)) from e
+        else:
+            self._record(time.monotonic() - started, ok=True)
+            return result
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _record(self, elapsed, ok):
+        with self._lock:
+            self.requests += 1
+            self.error_rate += EWMA_ALPHA * ((0.0 if ok else 1.0) - self.error_rate)
+            if ok:
+                self.latency = elapsed if self.latency is None else self.latency + EWMA_ALPHA * (elapsed - self.latency)
+                self.recent.append(elapsed)
+                self.consecutive_failures = 0
+            else:
+                self.errors += 1
+                self.consecutive_failures += 1
+                backoff = min(RPC_COOLDOWN_CAP, RPC_COOLDOWN_BASE * 2 ** (self.consecutive_failures - 1))
+                self.cooldown_until = time.monotonic() + backoff
+
+    def metrics(self) -> dict:
+        with self._lock:
+            recent = sorted(self.recent)
+            return {
+                "endpoint": self.label,
+                "requests": self.requests,
+                "errors": self.errors,
+                "errorRate": round(self.error_rate, 4),
+                "latencyMs": round(self.latency * 1000, 1) if self.latency is not None else None,
+                "p50Ms": round(recent[len(recent) // 2] * 1000, 1) if recent else None,
+                "p95Ms": round(recent[int(len(recent) * 0.95)] * 1000, 1) if recent else None,
+                "inFlight": self.in_flight,
+                "coolingDown": not self.available(),
+            }
+
+
+class RPCPool:
+    def __init__(self, urls, timeout=RPC_TIMEOUT, hedge_after=RPC_HEDGE_AFTER):
+        if not urls:
+            raise ValueError("❌ No RPC endpoints configured (set POLYGON_RPC_URLS or POLYGON_RPC_URL)")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self._hedge_pool = ThreadPoolExecutor(max_workers=RPC_POOL_SIZE * len(urls), thread_name_prefix="rpc-hedge")
+
+    def ranked(self, sticky=False) -> list:
+        """Endpoints in the order to try them: available ones by health, cooling-down ones last."""
+        now = time.monotonic()
+        available = [e for e in self.endpoints if e.available(now)]
+        cooling = sorted((e for e in self.endpoints if not e.available(now)), key=lambda e: e.cooldown_until)
+        if sticky:
+            return available + cooling     # configured order: the primary first
+        available.sort(key=Endpoint.score)
+        if len(available) > 1 and random.random() < EXPLORE_RATE:
+            available[0], available[1] = available[1], available[0]
+        return available + cooling
+
+    def send(self, method: str, payload: bytes) -> dict:
+        candidates = self.ranked(sticky=method in STICKY_METHODS)
+        if self.hedge_after and len(candidates) > 1 and method not in NEVER_HEDGE:
+            return self._send_hedged(candidates, payload)
+
+        errors = []
+        for endpoint in candidates:
+            try:
+                return endpoint.post(payload, self.timeout)
+            except EndpointError as e:
+                errors.append(f"{endpoint.label}: {e}")
+        raise RPCUnavailable(f"❌ All RPC endpoints failed for {method}: " + "; ".join(errors))
+
+    def send_batch(self, calls) -> list:
+        """
+        Send (method, params) pairs as one JSON-RPC batch request, failing over
+        like send(). Returns one response object per call, in call order; each
+        carries its own "result" or "error".
+        """
+        payload = json.dumps([
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]).encode()
+
+        errors = []
+        for endpoint in self.ranked():
+            try:
+                responses = endpoint.post(payload, self.timeout)
+                if not isinstance(responses, list):
+                    # e.g. a provider that caps or refuses batches answers with a single error object
+                    raise EndpointError(f"batch rejected: {responses.get('error')}")
+            except EndpointError as e:
+                errors.append(f"{endpoint.label}: {e}")
+                continue
+            by_id = {response.get("id"): response for response in responses}
+            missing = {"error": {"code": -32603, "message": "missing from batch response"}}
+            return [by_id.get(i, missing) for i in range(len(calls))]
+        raise RPCUnavailable(f"❌ All RPC endpoints failed for a batch of {len(calls)}: " + "; ".join(errors))
+
+    def _send_hedged(self, candidates, payload) -> dict:
+        """First answer wins; a second endpoint is asked if the first is slow or fails."""
+        remaining = list(candidates)
+        pending = {}
+        errors = []
+
+        def launch():
+            endpoint = remaining.pop(0)
+            pending[self._hedge_pool.submit(endpoint.post, payload, self.timeout)] = endpoint
+
+        launch()
+        while pending:
+            hedge = bool(remaining) and len(pending) < 2
+            done, _ = wait(pending, timeout=self.hedge_after if hedge else None, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    return future.result()
+                except EndpointError as e:
+                    errors.append(f"{endpoint.label}: {e}")
+                    if remaining:
+                        launch()
+        raise RPCUnavailable("❌ All RPC endpoints failed: " + "; ".join(errors))
+
+    def metrics(self) -> list:
+        return [endpoint.metrics() for endpoint in self.endpoints]
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """web3 provider that sends every request through an RPCPool."""
+
+    def __init__(self, pool: RPCPool):
+        super().__init__()
+        self.pool = pool
+
+    def make_request(self, method, params):
+        return self.pool.send(method, self.encode_rpc_request(method, params))
+
+    def __str__(self):
+        return f"RPC pool: {', '.join(e.label for e in self.pool.endpoints)}"
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_rpc_pool() -> RPCPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RPCPool(POLYGON_RPC_URLS)
+    return _pool
@@ -0,0 +1,81 @@
+"""
+Verify-by-upload helpers: digest an uploaded certificate PDF in one
+streaming pass and read the Certificate ID from its document Subject.
+
+Memory stays bounded whatever the file size: the bytes are fed chunk by
+chunk to keccak, SHA-256 and the IPFS CID builder (which holds at most one
+256 KiB chunk). Uploads are untrusted, so the Certificate ID is found by a
+plain byte scan for the Subject entry the certificate template writes; no
+PDF parser runs and no stream is decompressed, so a compression bomb or a
+malformed cross-reference table costs no more than reading the file.
+"""
+import os
+import re
+import hashlib
+
+from core.utils.cid import CidBuilder
+from core.utils.hashing import keccak_stream
+from core.fields import normalize_hash
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+VERIFY_UPLOAD_MAX_BYTES = int(os.getenv("VERIFY_UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# The Info dictionary entry written from certificate_template.CERTIFICATE_ID_SUBJECT
+CERTIFICATE_ID_RE = re.compile(rb"/Subject\s*\(Certificate ID: ((?:0x)?[0-9a-fA-F]{64})\)")
+# Longer than any match, so a match split across two chunks is still seen whole
+CERTIFICATE_ID_OVERLAP = 128
+
+
+def cid_version_of(cid: str) -> int:
+    return 0 if cid.startswith("Qm") else 1
+
+
+def digest_file(f, cid_version=0, chunk_size=UPLOAD_CHUNK_SIZE) -> dict:
+    """
+    keccak256, SHA-256 and IPFS CID of a file-like object (e.g. a Django
+    UploadedFile), in one pass over `chunk_size` pieces.
+    """
+    keccak_digest = keccak_stream()
+    sha256 = hashlib.sha256()
+    cid = CidBuilder(cid_version)
+    size = 0
+    f.seek(0)
+    for chunk in iter(lambda: f.read(chunk_size), b""):
+        keccak_digest.update(chunk)
+        sha256.update(chunk)
+        cid.update(chunk)
+        size += len(chunk)
+    return {
+        "size": size,
+        "keccak256": keccak_digest.digest().hex(),
+        "sha256": sha256.hexdigest(),
+        "cid": cid.cid(),
+    }
+
+
+def file_cid(f, cid_version, chunk_size=UPLOAD_CHUNK_SIZE) -> str:
+    """CID only, for when the pinned CID uses the other version than digest_file() computed."""
+    builder = CidBuilder(cid_version)
+    f.seek(0)
+    for chunk in iter(lambda: f.read(chunk_size), b""):
+        builder.update(chunk)
+    return builder.cid()
+
+
+def extract_certificate_id(f, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    The canonical certificate hash from the document Subject, or None if the
+    file carries none. The last entry wins, as an incremental update appends
+    a newer Info dictionary after the original one.
+    """
+    found = None
+    tail = b""
+    f.seek(0)
+    for chunk in iter(lambda: f.read(chunk_size), b""):
+        window = tail + chunk
+        for match in CERTIFICATE_ID_RE.finditer(window):
+            found = match.group(1)
+        tail = window[-CERTIFICATE_ID_OVERLAP:]
+    if found is None:
+        return None
+    return normalize_hash(found.decode("ascii"))
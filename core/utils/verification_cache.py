@@ -0,0 +1,52 @@
+import threading
+from django.core.cache import caches
+
+KEY_PREFIX = "verify:"
+
+# Hit/miss counters are per process: kept in the cache they would be evicted
+# with the records and cost two extra cache round trips per lookup.
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches["verification"]
+
+
+def _key(cert_hash: str) -> str:
+    return KEY_PREFIX + cert_hash.lower().removeprefix("0x")
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_cached_verification(cert_hash: str):
+    """Return the cached verification record for a hash, or None on a miss."""
+    record = _cache().get(_key(cert_hash))
+    _count("misses" if record is None else "hits")
+    return record
+
+
+def cache_verification(cert_hash: str, record: dict):
+    """Store a verification record (cid, issued_at, revoked, student/course names)."""
+    _cache().set(_key(cert_hash), record)
+
+
+def invalidate_verification(*cert_hashes):
+    """Drop cached records, e.g. after a revocation."""
+    if cert_hashes:
+        _cache().delete_many([_key(h) for h in cert_hashes])
+
+
+def cache_stats() -> dict:
+    """Hit/miss counts of this worker process since it started."""
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+    }
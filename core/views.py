@@ -1,26 +1,40 @@
-import os
-from datetime import timedelta
-from django.shortcuts import render, redirect
+import json
+from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.conf import settings
+from django.http import JsonResponse, HttpResponse, Http404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.contrib import messages
-from django.utils.timezone import now
+from django.conf import settings
+from django.db import transaction
 
-from .models import Student, Certificate, RevokedCertificate
+from .models import Certificate, RevokedCertificate, IssuanceJob
 from .forms import CertificateIssueForm
 from .utils.blockchain import (
-    issue_certificate_on_chain,
     revoke_certificate_on_chain,
-    get_certificate_from_chain
+    revoke_batched_certificate_on_chain,
+    get_certificate_from_chain,
+    get_batched_certificate_from_chain,
+    get_contract,
+    read_many
+)
+from .utils.merkle import certificate_leaf, verify_proof
+from .utils.verification_cache import (
+    get_cached_verification,
+    cache_verification,
+    invalidate_verification,
+    cache_stats
 )
-from .utils.pinata import upload_to_pinata
-from .utils.certificate_utils import generate_certificate_pdf
-from .utils.email_sender import send_certificate_email
+from .issuance import enqueue_issuance_job, job_progress, QR_CODE_BASE_URL
+from .utils.certificate_utils import qr_png_bytes
+from .sync_events import fresh_checkpoint
+from .stats import bump_daily_stats, dashboard_stats
+from .search import certificate_page, serialize_row, PAGE_SIZE
+from .fields import normalize_hash
 
 User = get_user_model()
-QR_CODE_BASE_URL = os.getenv("QR_CODE_BASE_URL", "http://127.0.0.1:8000/verify/?hash=")
 
 
 # ----------------------------
@@ -66,24 +80,8 @@ def logout_view(request):
 # ----------------------------
 @login_required(login_url="admin_login")
 def dashboard_view(request):
-    total_certificates = Certificate.objects.count()
-    active_certificates = Certificate.objects.filter(revoked=False).count()
-    revoked_certificates = Certificate.objects.filter(revoked=True).count()
-
-    issued_labels, issued_data = [], []
-    for i in range(6, -1, -1):
-        day = now().date() - timedelta(days=i)
-        count = Certificate.objects.filter(issued_at__date=day).count()
-        issued_labels.append(day.strftime("%b %d"))
-        issued_data.append(count)
-
-    return render(request, "core/dashboard.html", {
-        "total_certificates": total_certificates,
-        "active_certificates": active_certificates,
-        "revoked_certificates": revoked_certificates,
-        "issued_labels": issued_labels,
-        "issued_data": issued_data,
-    })
+    # Served from the daily rollup (core.stats), not by counting certificates
+    return render(request, "core/dashboard.html", dashboard_stats(days=7))
 
 
 # ----------------------------
@@ -100,88 +98,108 @@ def issue_certificate_view(request):
             course_name = form.cleaned_data["course_name"]
             percentage = form.cleaned_data["percentage"]
 
-            student, _ = Student.objects.get_or_create(
-                email=email,
-                defaults={"name": name, "roll_no": roll_no}
-            )
-
-            # Generate unique hash
-            cert_hash = os.urandom(32).hex()
-            verify_url = f"{QR_CODE_BASE_URL}{cert_hash}"
-
-            # Generate PDF & QR code
-            pdf_path, qr_path = generate_certificate_pdf(
-                student_name=name,
-                course_name=course_name,
-                hash_value=cert_hash,
-                verify_url=verify_url,
-                logo_path=os.path.join(settings.BASE_DIR, "core/static/core/images/logo.png"),
-                cgpa=percentage
-            )
+            # Rendering, IPFS, chain and email run in the issuance worker
+            job = enqueue_issuance_job(name, email, roll_no, course_name, percentage)
+            status_url = reverse("issuance_job_status", args=[job.pk])
 
-            try:
-                # Upload to IPFS
-                ipfs_cid = upload_to_pinata(pdf_path)
-
-                # Issue on blockchain (waits for confirmation)
-                tx_hash = issue_certificate_on_chain(bytes.fromhex(cert_hash), ipfs_cid)
-                if not tx_hash:
-                    messages.error(request, "Failed to issue certificate on blockchain.")
-                    return redirect("issue_certificate")
-
-                # Save to DB
-                certificate = Certificate.objects.create(
-                    student=student,
-                    course_name=course_name,
-                    pdf_file=f"certificates/{os.path.basename(pdf_path)}",
-                    qr_code=f"qr/{cert_hash}.png",
-                    blockchain_hash=cert_hash,
-                    transaction_hash=tx_hash,
-                    ipfs_cid=ipfs_cid,
-                    revoked=False
-                )
+            if "application/json" in request.headers.get("Accept", ""):
+                return JsonResponse({"job_id": job.pk, "status_url": status_url}, status=202)
 
-                # Send email
-                try:
-                    send_certificate_email(email, name, pdf_path, qr_path)
-                except Exception as e:
-                    messages.warning(request, f"Certificate issued but email failed: {str(e)}")
-
-                messages.success(request, "Certificate issued successfully!")
-                return redirect("dashboard")
-
-            except Exception as e:
-                messages.error(request, f"Error issuing certificate: {str(e)}")
-                return redirect("issue_certificate")
+            messages.success(request, f"Certificate queued for issuance (job #{job.pk}).")
+            return redirect("dashboard")
     else:
         form = CertificateIssueForm()
 
     return render(request, "core/issue_certificate.html", {"form": form})
 
 
+# ----------------------------
+# Issuance Job Status (polling)
+# ----------------------------
+@login_required(login_url="admin_login")
+def issuance_job_status_view(request, job_id):
+    job = get_object_or_404(IssuanceJob, pk=job_id)
+    return JsonResponse(job_progress(job))
+
+
+# ----------------------------
+# Certificate QR Code (rendered on demand)
+# ----------------------------
+@login_required(login_url="admin_login")
+def certificate_qr_view(request, cert_hash):
+    try:
+        cert_hash = normalize_hash(cert_hash)
+    except ValueError:
+        raise Http404("Invalid certificate hash.")
+    cert = get_object_or_404(Certificate, blockchain_hash=cert_hash)
+    response = HttpResponse(qr_png_bytes(f"{QR_CODE_BASE_URL}{cert.blockchain_hash}"), content_type="image/png")
+    response["Cache-Control"] = "private, max-age=86400"
+    return response
+
+
 # ----------------------------
 # Revoke Certificate
 # ----------------------------
+def _listing_params(request):
+    try:
+        after = int(request.GET.get("after") or 0) or None
+        limit = int(request.GET.get("limit") or PAGE_SIZE)
+    except ValueError:
+        after, limit = None, PAGE_SIZE
+    return request.GET.get("q", ""), request.GET.get("status", ""), after, limit
+
+
 @login_required(login_url="admin_login")
 def revoke_certificate_view(request):
-    certificates = Certificate.objects.select_related('student').all()
-
     if request.method == "POST":
-        cert_hash = request.POST.get("hash")
         try:
-            tx_hash = revoke_certificate_on_chain(bytes.fromhex(cert_hash))
+            cert_hash = normalize_hash(request.POST.get("hash") or "")
+            cert_obj = Certificate.objects.select_related("batch").get(blockchain_hash=cert_hash)
+            if cert_obj.batch_id:
+                tx_hash = revoke_batched_certificate_on_chain(
+                    bytes.fromhex(cert_obj.batch.merkle_root),
+                    bytes.fromhex(cert_hash),
+                    cert_obj.ipfs_cid,
+                    [bytes.fromhex(node) for node in cert_obj.merkle_proof]
+                )
+            else:
+                tx_hash = revoke_certificate_on_chain(bytes.fromhex(cert_hash))
             if tx_hash:
-                cert_obj = Certificate.objects.get(blockchain_hash=cert_hash)
-                cert_obj.revoked = True
-                cert_obj.save()
-                RevokedCertificate.objects.create(certificate=cert_obj)
+                was_revoked = cert_obj.revoked
+                with transaction.atomic():
+                    cert_obj.revoked = True
+                    cert_obj.save()
+                    RevokedCertificate.objects.get_or_create(certificate=cert_obj)
+                    if not was_revoked:
+                        bump_daily_stats(revoked=[cert_obj.issued_at])
+                invalidate_verification(cert_hash)
                 messages.success(request, "Certificate revoked successfully!")
             else:
                 messages.error(request, "Blockchain transaction failed for revocation.")
         except Exception as e:
             messages.error(request, f"Error: {str(e)}")
+        # Back to the same search/page the revoke was made from
+        return redirect(request.get_full_path())
+
+    query, status, after, limit = _listing_params(request)
+    certificates, next_cursor = certificate_page(query, after, limit, status)
+    return render(request, "core/revoke_certificate.html", {
+        "certificates": certificates,
+        "next_cursor": next_cursor,
+        "query": query,
+        "status": status,
+    })
 
-    return render(request, "core/revoke_certificate.html", {"certificates": certificates})
+
+@login_required(login_url="admin_login")
+def revoke_certificate_data_view(request):
+    """JSON page of the revocation console table (keyset-paginated; follow `next`)."""
+    query, status, after, limit = _listing_params(request)
+    certificates, next_cursor = certificate_page(query, after, limit, status)
+    return JsonResponse({
+        "results": [serialize_row(row) for row in certificates],
+        "next": next_cursor,
+    })
 
 
 # ----------------------------
@@ -208,7 +226,7 @@ def verify_api_view(request):
         return JsonResponse({"status": "error", "message": "No hash provided."})
 
     try:
-        cert = Certificate.objects.get(blockchain_hash=hash_value)
+        cert = Certificate.objects.get(blockchain_hash=normalize_hash(hash_value))
         response = {
             "status": "success",
             "cid": cert.ipfs_cid,
@@ -217,15 +235,161 @@ def verify_api_view(request):
             "studentName": cert.student.name,
             "courseName": cert.course_name,
         }
+    except ValueError:
+        response = {"status": "error", "message": "Invalid hash."}
     except Certificate.DoesNotExist:
         response = {"status": "error", "message": "Certificate not found."}
 
     return JsonResponse(response)
 
 
+# ----------------------------
+# Batched Verification API
+# ----------------------------
+VERIFY_BATCH_MAX_HASHES = 500
+
+
+def _chain_read_call(cert_hash, cert_obj):
+    """Contract read that confirms a certificate (proof-based for Merkle-batched ones)."""
+    if cert_obj and cert_obj.batch_id:
+        return get_contract().functions.getBatchedCertificate(
+            bytes.fromhex(cert_obj.batch.merkle_root),
+            bytes.fromhex(cert_hash),
+            cert_obj.ipfs_cid,
+            [bytes.fromhex(node) for node in cert_obj.merkle_proof]
+        )
+    return get_contract().functions.getCertificate(bytes.fromhex(cert_hash))
+
+
+@csrf_exempt
+@require_POST
+def verify_batch_api_view(request):
+    """
+    Verify many hashes in one request.
+    Body: {"hashes": ["<hash>", ...], "chain": false}
+    With "chain": true every hash is also confirmed on chain through one
+    Multicall3 eth_call per chunk instead of one eth_call per hash.
+    """
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"status": "error", "message": "Invalid JSON body."}, status=400)
+
+    hashes = payload.get("hashes")
+    if not isinstance(hashes, list) or not hashes or not all(isinstance(h, str) for h in hashes):
+        return JsonResponse({"status": "error", "message": "Provide a non-empty list of hashes."}, status=400)
+    if len(hashes) > VERIFY_BATCH_MAX_HASHES:
+        return JsonResponse({
+            "status": "error",
+            "message": f"At most {VERIFY_BATCH_MAX_HASHES} hashes per request."
+        }, status=400)
+
+    hashes = list(dict.fromkeys(hashes))
+    normalized = {}
+    for hash_value in hashes:
+        try:
+            normalized[hash_value] = normalize_hash(hash_value)
+        except ValueError:
+            pass
+    by_hash = {
+        cert.blockchain_hash: cert
+        for cert in Certificate.objects.select_related("student", "batch").filter(
+            blockchain_hash__in=set(normalized.values())
+        )
+    }
+    certs = {hash_value: by_hash.get(canonical) for hash_value, canonical in normalized.items()}
+
+    results = {}
+    for hash_value in hashes:
+        cert = certs.get(hash_value)
+        if hash_value not in normalized:
+            results[hash_value] = {"hash": hash_value, "status": "error", "message": "Invalid hash."}
+            continue
+        if cert is None:
+            results[hash_value] = {"hash": hash_value, "status": "error", "message": "Certificate not found."}
+            continue
+        results[hash_value] = {
+            "hash": hash_value,
+            "status": "success",
+            "cid": cert.ipfs_cid,
+            "issuedAt": int(cert.issued_at.timestamp()),
+            "revoked": cert.revoked,
+            "studentName": cert.student.name,
+            "courseName": cert.course_name,
+        }
+
+    response = {"status": "success", "count": len(hashes)}
+    if payload.get("chain"):
+        checkable = []
+        for hash_value in hashes:
+            try:
+                checkable.append((hash_value, _chain_read_call(normalized[hash_value], certs.get(hash_value))))
+            except Exception:
+                results[hash_value]["onChain"] = {"found": False, "message": "Invalid hash."}
+
+        try:
+            outputs = read_many([fn for _, fn in checkable])
+        except Exception as e:
+            response["chainError"] = str(e)
+        else:
+            for (hash_value, fn), output in zip(checkable, outputs):
+                if output is None:
+                    results[hash_value]["onChain"] = {"found": False}
+                elif fn.fn_name == "getBatchedCertificate":
+                    issued_at, revoked = output
+                    results[hash_value]["onChain"] = {"found": True, "issuedAt": issued_at, "revoked": revoked}
+                else:
+                    cid, issued_at, revoked = output
+                    results[hash_value]["onChain"] = {
+                        "found": True, "cid": cid, "issuedAt": issued_at, "revoked": revoked
+                    }
+
+    response["results"] = [results[h] for h in hashes]
+    return JsonResponse(response)
+
+
 # ----------------------------
 # Verify Result Page
 # ----------------------------
+def _fetch_chain_record(cert_hash, cert_obj):
+    """
+    Return (cid, issuedAt, revoked) from the chain. Merkle-batched certificates
+    are checked by their inclusion proof against the batch root.
+    """
+    if cert_obj and cert_obj.batch_id:
+        root = bytes.fromhex(cert_obj.batch.merkle_root)
+        proof = [bytes.fromhex(node) for node in cert_obj.merkle_proof]
+        leaf = certificate_leaf(bytes.fromhex(cert_hash), cert_obj.ipfs_cid)
+        if not verify_proof(leaf, proof, root):
+            raise ValueError("Merkle proof does not match batch root")
+        return get_batched_certificate_from_chain(root, bytes.fromhex(cert_hash), cert_obj.ipfs_cid, proof)
+    return get_certificate_from_chain(bytes.fromhex(cert_hash))
+
+
+def _verification_record(cert_hash):
+    """Cached {cid, issued_at, revoked, student_name, course_name} for a canonical hash; raises if not on chain."""
+    record = get_cached_verification(cert_hash)
+    if record is None:
+        cert_obj = Certificate.objects.select_related("student", "batch").filter(blockchain_hash=cert_hash).first()
+        checkpoint = fresh_checkpoint(settings.CHAIN_FOLLOWER_MAX_LAG) if cert_obj and cert_obj.issued_block else None
+        if checkpoint and cert_obj.issued_block <= checkpoint:
+            # follow_chain has seen this row's Issued event and keeps the table current, so
+            # the row is authoritative. Rows it hasn't confirmed (just saved by the issuer, a
+            # reverted issuance, Merkle-batched) are checked on chain.
+            cid, issued_at, revoked = cert_obj.ipfs_cid, int(cert_obj.issued_at.timestamp()), cert_obj.revoked
+        else:
+            cid, issued_at, revoked = _fetch_chain_record(cert_hash, cert_obj)
+        record = {
+            "cid": cid,
+            "issued_at": issued_at,
+            "revoked": revoked,
+            "student_name": cert_obj.student.name if cert_obj else "Unknown",
+            "course_name": cert_obj.course_name if cert_obj else "Unknown"
+        }
+        cache_verification(cert_hash, record)
+    return record
+
+
 def verify_result(request):
     cert_hash = request.GET.get('hash')
     context = {
@@ -240,10 +404,9 @@ def verify_result(request):
 
     if cert_hash:
         try:
-            cid, issued_at, revoked = get_certificate_from_chain(bytes.fromhex(cert_hash))
-            cert_obj = Certificate.objects.filter(blockchain_hash=cert_hash).first()
+            record = _verification_record(normalize_hash(cert_hash))
 
-            if revoked:
+            if record["revoked"]:
                 context["status"] = "revoked"
                 context["message"] = "This certificate has been revoked."
             else:
@@ -251,12 +414,16 @@ def verify_result(request):
                 context["message"] = "This certificate is valid."
 
             context.update({
-                "cid": cid,
-                "issued_at": issued_at,
-                "student_name": cert_obj.student.name if cert_obj else "Unknown",
-                "course_name": cert_obj.course_name if cert_obj else "Unknown"
+                "cid": record["cid"],
+                "issued_at": record["issued_at"],
+                "student_name": record["student_name"],
+                "course_name": record["course_name"]
             })
 
+        except ConnectionError:
+            # Every RPC endpoint failed: we couldn't check, which is not the same as tampered.
+            context["status"] = "error"
+            context["message"] = "The blockchain network is unreachable right now. Please try again shortly."
         except Exception:
             context["status"] = "tampered"
             context["message"] = "Certificate is invalid or tampered."
@@ -265,6 +432,138 @@ def verify_result(request):
         context["message"] = "No hash provided."
 
     return render(request, "core/verify_result.html", context)
+
+
+# ----------------------------
+# Verification Cache Stats
+# ----------------------------
+@login_required(login_url="admin_login")
+def verification_cache_stats_view(request):
+    """
+    Hit/miss counts of the verification cache, for the worker process that
+    answered this request only: counters aren't shared between gunicorn
+    workers, so successive requests may report different workers.
+    """
+    return JsonResponse(cache_stats())
+
+
+# ----------------------------
+# RPC Endpoint Stats
+# ----------------------------
+@login_required(login_url="admin_login")
+def rpc_stats_view(request):
+    """Per-endpoint latency and error metrics of this worker's RPC pool, and its fee oracle cache."""
+    from .utils.rpc_pool import get_rpc_pool
+    from .utils.fee_oracle import get_fee_oracle
+    return JsonResponse({"endpoints": get_rpc_pool().metrics(), "fees": get_fee_oracle().stats()})
+
+
+# ----------------------------
+# Verify by Upload
+# ----------------------------
+def _upload_too_large():
+    from .utils.upload_verify import VERIFY_UPLOAD_MAX_BYTES
+    return {
+        "status": "error",
+        "message": f"The file is larger than {VERIFY_UPLOAD_MAX_BYTES // (1024 * 1024)} MB."
+    }
+
+
+def _verify_uploaded_file(request):
+    """
+    Check an uploaded certificate PDF: find its certificate by the file's
+    CID or, for a file that isn't a pinned original, by the Certificate ID
+    in its document Subject, and compare the file with the copy pinned on IPFS.
+    Returns (result dict, HTTP status).
+    """
+    from .utils.pinata import PINATA_CID_VERSION
+    from .utils.upload_verify import (
+        VERIFY_UPLOAD_MAX_BYTES, cid_version_of, digest_file, extract_certificate_id, file_cid
+    )
+
+    # Requests announcing a larger body never get here (core.middleware.UploadSizeLimitMiddleware)
+    upload = request.FILES.get("file")
+    if upload is None:
+        return {"status": "error", "message": "No file uploaded."}, 400
+    if upload.size > VERIFY_UPLOAD_MAX_BYTES:
+        return _upload_too_large(), 413
+
+    digest = digest_file(upload, cid_version=PINATA_CID_VERSION)
+    # An unmodified file is found by its CID alone; only other files are scanned for a Certificate ID
+    result = {"status": "tampered", "file": digest}
+    result["hash"] = Certificate.objects.filter(ipfs_cid=digest["cid"]).values_list(
+        "blockchain_hash", flat=True
+    ).first() or extract_certificate_id(upload)
+    if result["hash"] is None:
+        result["message"] = "No Certificate ID found in this file, and it matches no issued certificate."
+        return result, 200
+
+    try:
+        record = _verification_record(result["hash"])
+    except ConnectionError:
+        result.update(status="error", message="The blockchain network is unreachable right now. Please try again shortly.")
+        return result, 503
+    except Exception:
+        result["message"] = "The Certificate ID in this file is not on the blockchain."
+        return result, 200
+
+    result.update({
+        "cid": record["cid"],
+        "issuedAt": record["issued_at"],
+        "revoked": record["revoked"],
+        "studentName": record["student_name"],
+        "courseName": record["course_name"],
+    })
+    pinned = record["cid"] or ""
+    uploaded_cid = digest["cid"]
+    if pinned and cid_version_of(pinned) != PINATA_CID_VERSION:
+        uploaded_cid = file_cid(upload, cid_version_of(pinned))
+    result["cidMatches"] = bool(pinned) and uploaded_cid == pinned
+
+    if not result["cidMatches"]:
+        result["message"] = "This file is not the issued certificate: its content differs from the pinned copy."
+    elif record["revoked"]:
+        result.update(status="revoked", message="This certificate has been revoked.")
+    else:
+        result.update(status="valid", message="This certificate is valid and the file is the issued original.")
+    return result, 200
+
+
+def _render_upload_result(request, result, status=200):
+    context = {
+        "status": result["status"],
+        "message": result["message"],
+        "student_name": result.get("studentName"),
+        "course_name": result.get("courseName"),
+        "issued_at": result.get("issuedAt"),
+        "cid": result.get("cid"),
+        "hash": result.get("hash"),
+        "file": result.get("file"),
+    }
+    return render(request, "core/verify_result.html", context, status=status)
+
+
+@require_POST
+def verify_upload_view(request):
+    result, _ = _verify_uploaded_file(request)
+    return _render_upload_result(request, result)
+
+
+@csrf_exempt
+@require_POST
+def verify_upload_api_view(request):
+    """multipart/form-data with the PDF in "file"; returns the verdict plus the file's keccak256, SHA-256 and CID."""
+    result, status = _verify_uploaded_file(request)
+    return JsonResponse(result, status=status)
+
+
+def upload_too_large_response(request):
+    """The 413 UploadSizeLimitMiddleware sends, in the form the upload view would have answered in."""
+    if request.resolver_match.url_name == "verify_upload_api":
+        return JsonResponse(_upload_too_large(), status=413)
+    return _render_upload_result(request, _upload_too_large(), status=413)
+
+
 # ----------------------------
 # Verifier Result Page
 # ----------------------------
@@ -282,7 +581,7 @@ def verifier_result_view(request):
 
     if cert_hash:
         try:
-            cert = Certificate.objects.filter(blockchain_hash=cert_hash).first()
+            cert = Certificate.objects.filter(blockchain_hash=normalize_hash(cert_hash)).first()
             if cert:
                 context["status"] = "revoked" if cert.revoked else "valid"
                 context["message"] = "This certificate has been revoked." if cert.revoked else "This certificate is valid."
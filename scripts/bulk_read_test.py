@@ -0,0 +1,149 @@
+"""
+Compare bulk getCertificate reads against a local fake JSON-RPC node.
+
+    python scripts/bulk_read_test.py --hashes 5000 --missing 0.1 --latency 0.02
+
+The fake node answers eth_call for getCertificate and Multicall3.aggregate3
+from an in-memory certificate table, reverts with "Certificate not found"
+for unknown hashes, and waits --latency seconds per HTTP request (not per
+call), like a remote RPC. The same hashes are read one eth_call at a time,
+as JSON-RPC batches and through Multicall3, and the results are checked
+against each other. Nothing leaves the machine.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTRACT = "0x" + "11" * 20
+
+
+class FakeNodeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.0
+    certificates = {}
+    selectors = {}
+    stats = {"requests": 0, "calls": 0}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        time.sleep(self.latency)
+        calls = body if isinstance(body, list) else [body]
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["calls"] += len(calls)
+        answers = [self.answer(call) for call in calls]
+        self.reply(answers if isinstance(body, list) else answers[0])
+
+    def answer(self, call):
+        reply = {"jsonrpc": "2.0", "id": call["id"]}
+        if call["method"] == "eth_chainId":
+            return {**reply, "result": "0x13882"}
+        if call["method"] != "eth_call":
+            return {**reply, "error": {"code": -32601, "message": "method not found"}}
+
+        from eth_abi import encode, decode
+        data = bytes.fromhex(call["params"][0]["data"][2:])
+        if data[:4] == self.selectors["aggregate3"]:
+            (inner_calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = [self.get_certificate(inner[2][4:]) for inner in inner_calls]
+            returned = [(output is not None, output or b"") for output in results]
+            return {**reply, "result": "0x" + encode(["(bool,bytes)[]"], [returned]).hex()}
+        output = self.get_certificate(data[4:])
+        if output is None:
+            return {**reply, "error": {"code": 3, "message": "execution reverted: Certificate not found"}}
+        return {**reply, "result": "0x" + output.hex()}
+
+    def get_certificate(self, argument):
+        from eth_abi import encode
+        record = self.certificates.get(argument[:32])
+        return None if record is None else encode(["string", "uint256", "bool"], list(record))
+
+    def reply(self, body):
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hashes", type=int, default=5000)
+    parser.add_argument("--missing", type=float, default=0.1, help="Share of hashes that aren't on chain")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per HTTP request")
+    parser.add_argument("--sequential-sample", type=int, default=300,
+                        help="One-call-at-a-time reads are timed on this many hashes and extrapolated")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeNodeHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["POLYGON_RPC_URLS"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["CONTRACT_ADDRESS"] = CONTRACT
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from eth_hash.auto import keccak
+    from core.utils import blockchain
+
+    FakeNodeHandler.latency = args.latency
+    FakeNodeHandler.selectors = {"aggregate3": keccak(b"aggregate3((address,bool,bytes)[])")[:4]}
+    rng = random.Random(1)
+    hashes = [rng.randbytes(32) for _ in range(args.hashes)]
+    for h in hashes:
+        if rng.random() >= args.missing:
+            FakeNodeHandler.certificates[h] = (f"Qm{h.hex()[:44]}", rng.randrange(1_600_000_000, 1_800_000_000),
+                                               rng.random() < 0.05)
+
+    contract = blockchain.get_contract()
+    fn_calls = [contract.functions.getCertificate(h) for h in hashes]
+    expected = [FakeNodeHandler.certificates.get(h) for h in hashes]
+
+    def timed(label, read, calls):
+        before = dict(FakeNodeHandler.stats)
+        started = time.perf_counter()
+        results = read(calls)
+        elapsed = time.perf_counter() - started
+        requests = FakeNodeHandler.stats["requests"] - before["requests"]
+        ok = results == expected[:len(calls)]
+        print(f"{label:<28}{elapsed:>9.2f}s{requests:>10}{len(calls) / elapsed:>12.0f}   {'ok' if ok else 'MISMATCH'}")
+        return ok, elapsed
+
+    def one_by_one(calls):
+        results = []
+        for fn in calls:
+            try:
+                results.append(tuple(fn.call()))
+            except Exception as e:
+                if "Certificate not found" not in str(e):
+                    raise
+                results.append(None)
+        return results
+
+    print(f"{args.hashes} hashes ({args.missing:.0%} missing), {args.latency * 1000:.0f} ms per HTTP request")
+    print(f"{'mode':<28}{'time':>10}{'requests':>10}{'hashes/s':>12}")
+    sample = fn_calls[:args.sequential_sample]
+    ok, elapsed = timed(f"one eth_call each (n={len(sample)})", one_by_one, sample)
+    print(f"{'  extrapolated to all':<28}{elapsed / len(sample) * len(fn_calls):>9.2f}s")
+    results = [ok]
+    for workers in (1, 4):
+        results.append(timed(f"JSON-RPC batch, {workers} worker(s)",
+                             lambda c: blockchain.batch_call(c, workers=workers), fn_calls)[0])
+        results.append(timed(f"Multicall3, {workers} worker(s)",
+                             lambda c: blockchain.multicall(c, workers=workers), fn_calls)[0])
+    server.shutdown()
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Build a synthetic offline verification index and time lookups against it.
+
+    python scripts/offline_index_test.py --certificates 10000000 --lookups 200000
+
+Writes a snapshot of N evenly spread pseudo-random hashes (every 50th
+revoked) plus a delta of 1% more, then maps both with OfflineRegistry and
+looks up issued, revoked and unknown hashes. Reports file sizes, lookup
+latency and how much the process RSS grows, which is the pages the lookups
+actually touched.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+GOLDEN = 0x9E3779B97F4A7C15
+
+
+def synthetic_hash(i, step, salt=0):
+    """The i-th of N sorted hashes: one per 2**256 / N bucket, at a pseudo-random offset inside it."""
+    offset = ((i + salt) * GOLDEN) % (step - 1) + 1
+    return (i * step + offset).to_bytes(32, "big")
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--certificates", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--dir", default=tempfile.gettempdir(), help="Where to write the index files")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from core.utils.offline_index import DELTA, REVOKED, VALID, OfflineRegistry, write_index
+
+    n = args.certificates
+    step = 2 ** 256 // n
+    delta_n = max(1, n // 100)
+    delta_step = 2 ** 256 // delta_n
+    snapshot_path = os.path.join(args.dir, "offline_registry.idx")
+    delta_path = os.path.join(args.dir, "offline_registry.delta.idx")
+
+    started = time.perf_counter()
+    write_index(snapshot_path, ((synthetic_hash(i, step), i % 50 == 0) for i in range(n)), block=1_000_000)
+    # The delta's hashes come from a different salt, so they're new certificates
+    write_index(delta_path, ((synthetic_hash(i, delta_step, salt=7), False) for i in range(delta_n)),
+                block=1_000_500, kind=DELTA, base_block=1_000_000)
+    print(f"Wrote {n} + {delta_n} certificates in {time.perf_counter() - started:.1f}s: "
+          f"{os.path.getsize(snapshot_path) / 2 ** 20:.1f} MB + {os.path.getsize(delta_path) / 2 ** 20:.1f} MB")
+
+    rng = random.Random(5)
+    issued = [rng.randrange(n) for _ in range(args.lookups)]
+    probes = {
+        "issued": [synthetic_hash(i, step) for i in issued],
+        "revoked": [synthetic_hash(i - i % 50, step) for i in issued],
+        "delta": [synthetic_hash(rng.randrange(delta_n), delta_step, salt=7) for _ in range(args.lookups)],
+        "unknown": [rng.randbytes(32) for _ in range(args.lookups)],
+    }
+    expected = {"issued": {VALID, REVOKED}, "revoked": {REVOKED}, "delta": {VALID}, "unknown": {None}}
+
+    rss_before = rss_mb()
+    with OfflineRegistry(snapshot_path, [delta_path]) as registry:
+        print(f"Registry at block {registry.block}; RSS after mapping {rss_mb() - rss_before:+.1f} MB")
+        print(f"{'lookups':<10}{'count':>9}{'mean us':>10}{'p99 us':>10}   result")
+        for name, hashes in probes.items():
+            timings = []
+            results = set()
+            for cert_hash in hashes:
+                t = time.perf_counter()
+                results.add(registry.status(cert_hash))
+                timings.append(time.perf_counter() - t)
+            timings.sort()
+            mean = sum(timings) / len(timings) * 1e6
+            p99 = timings[int(len(timings) * 0.99)] * 1e6
+            ok = results <= expected[name]
+            print(f"{name:<10}{len(hashes):>9}{mean:>10.1f}{p99:>10.1f}   {'ok' if ok else results}")
+        print(f"RSS growth after all lookups: {rss_mb() - rss_before:+.1f} MB "
+              f"(files total {(os.path.getsize(snapshot_path) + os.path.getsize(delta_path)) / 2 ** 20:.0f} MB)")
+
+    os.remove(snapshot_path)
+    os.remove(delta_path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
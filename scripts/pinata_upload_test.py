@@ -0,0 +1,91 @@
+"""
+Exercise core/utils/pinata.py against a local fake Pinata server.
+
+    python scripts/pinata_upload_test.py --files 200 --workers 8 --failure-rate 0.2
+
+The fake server answers pinFileToIPFS with a CID derived from the upload,
+and fails a share of requests with 429/503 so the retry path is exercised.
+Nothing leaves the machine.
+"""
+import os
+import sys
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakePinataHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real API
+    failure_rate = 0.0
+    stats = {"requests": 0, "failed": 0, "connections": set()}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["connections"].add(self.client_address)
+            fail = random.random() < self.failure_rate
+            if fail:
+                self.stats["failed"] += 1
+
+        if fail:
+            self.reply(random.choice((429, 503)), b'{"error": "try again"}')
+        elif not self.headers.get("Authorization", "").startswith("Bearer "):
+            self.reply(401, b'{"error": "missing JWT"}')
+        else:
+            cid = "Qm" + hashlib.sha256(body).hexdigest()[:44]
+            self.reply(200, f'{{"IpfsHash": "{cid}", "PinSize": {len(body)}}}'.encode())
+
+    def reply(self, status, payload):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--size", type=int, default=30_000, help="Bytes per fake PDF")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--failure-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from core.utils import pinata
+
+    FakePinataHandler.failure_rate = args.failure_rate
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakePinataHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    pinata.PINATA_BASE_URL = f"http://127.0.0.1:{server.server_port}/pinning/pinFileToIPFS"
+    pinata.PINATA_JWT = pinata.PINATA_JWT or "fake-jwt"
+    pinata.BACKOFF_BASE = 0.01   # keep the demo fast; real uploads use the module default
+
+    buffers = [os.urandom(args.size) for _ in range(args.files)]
+    started = time.time()
+    cids = pinata.upload_many(buffers, workers=args.workers, return_exceptions=True)
+    elapsed = time.time() - started
+    server.shutdown()
+
+    failed = [c for c in cids if isinstance(c, Exception)]
+    stats = FakePinataHandler.stats
+    print(f"Uploaded {len(cids) - len(failed)}/{len(cids)} files in {elapsed:.2f}s "
+          f"({len(cids) / elapsed:.1f} files/s)")
+    print(f"Server saw {stats['requests']} requests ({stats['failed']} answered 429/503) "
+          f"over {len(stats['connections'])} connections")
+    for e in failed[:5]:
+        print(f"  failed: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Exercise core/utils/rpc_pool.py against local fake JSON-RPC endpoints.
+
+    python scripts/rpc_pool_test.py --requests 2000 --workers 16 --hedge-after 0.05
+
+Three fake endpoints answer eth_blockNumber: a fast one, a slow one with a
+long latency tail, and a flaky one that returns 429 / -32005 for a share of
+requests. Halfway through, the fast endpoint starts dropping every request
+so failover is exercised. The run is repeated without and with hedged reads.
+Nothing leaves the machine.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(delay, tail_rate=0.0, tail_delay=0.0, failure_rate=0.0):
+    class FakeRPCHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+        down = False
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if self.down:
+                self.close_connection = True    # drop the request, like a node that went away
+                return
+            time.sleep(tail_delay if random.random() < tail_rate else delay)
+            roll = random.random()
+            if roll < failure_rate / 2:
+                self.reply(429, {"error": "too many requests"})
+            elif roll < failure_rate:
+                self.reply(200, {"jsonrpc": "2.0", "id": request["id"],
+                                 "error": {"code": -32005, "message": "limit exceeded"}})
+            else:
+                self.reply(200, {"jsonrpc": "2.0", "id": request["id"], "result": "0x10"})
+
+        def reply(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return FakeRPCHandler
+
+
+def start_servers():
+    servers = {
+        "fast": ThreadingHTTPServer(("127.0.0.1", 0), make_handler(0.005, tail_rate=0.02, tail_delay=0.3)),
+        "slow": ThreadingHTTPServer(("127.0.0.1", 0), make_handler(0.02, tail_rate=0.05, tail_delay=0.5)),
+        "flaky": ThreadingHTTPServer(("127.0.0.1", 0), make_handler(0.01, failure_rate=0.2)),
+    }
+    for server in servers.values():
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return servers
+
+
+def run(rpc_pool, args, hedge_after):
+    servers = start_servers()
+    urls = [f"http://127.0.0.1:{s.server_port}" for s in servers.values()]
+    pool = rpc_pool.RPCPool(urls, timeout=2, hedge_after=hedge_after)
+    payload = json.dumps({"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1}).encode()
+
+    def call(i):
+        if i == args.requests // 2:
+            servers["fast"].RequestHandlerClass.down = True
+        started = time.perf_counter()
+        try:
+            pool.send("eth_blockNumber", payload)
+            return time.perf_counter() - started, None
+        except rpc_pool.RPCUnavailable as e:
+            return time.perf_counter() - started, e
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(call, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    for server in servers.values():
+        server.shutdown()
+
+    latencies = sorted(r[0] for r in results)
+    failed = [r[1] for r in results if r[1] is not None]
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    mode = f"hedged after {hedge_after * 1000:.0f} ms" if hedge_after else "failover only"
+    print(f"\n{mode}: {len(results) - len(failed)}/{len(results)} ok in {elapsed:.2f}s, "
+          f"p50 {pct(0.5):.1f} ms, p95 {pct(0.95):.1f} ms, p99 {pct(0.99):.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+    for name, metrics in zip(servers, pool.metrics()):
+        print(f"  {name:<6} requests {metrics['requests']:>5}  errors {metrics['errors']:>4}  "
+              f"ewma {metrics['latencyMs']} ms  p95 {metrics['p95Ms']} ms  cooling down: {metrics['coolingDown']}")
+    for e in failed[:3]:
+        print(f"  failed: {e}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--hedge-after", type=float, default=0.05, help="Seconds before a hedged read")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault("POLYGON_RPC_URLS", "http://127.0.0.1")
+    from core.utils import rpc_pool
+
+    failed = run(rpc_pool, args, hedge_after=0)
+    failed += run(rpc_pool, args, hedge_after=args.hedge_after)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())